@@ -1,12 +1,15 @@
 from datetime import datetime
 from pathlib import Path
-from typing import TypeAlias
+from typing import Callable, TypeAlias
 
 from ..logger import get_main_thread_logger
 from ..threads.base_thread import BaseThread
 
 StrPath: TypeAlias = str | Path
 
+# The suffix of the checkpoint directory being written.
+PARTIAL_CHECKPOINT_SUFFIX = ".partial"
+
 
 class Checkpointing:
     """Handles the saving and loading of checkpoints.
@@ -41,18 +44,38 @@ class Checkpointing:
         Returns:
             Path: The path to the saved checkpoint directory.
         """
+        checkpoint_path, write = self.take_snapshot()
+        write()
+        return checkpoint_path
+
+    def take_snapshot(self) -> tuple[Path, Callable[[], None]]:
+        """Takes the in-memory snapshot of all threads for a new checkpoint
+        named with the current time.
+
+        Call this while the threads are paused, and call the returned function to write the snapshot after
+        resuming them. The checkpoint is written to the directory with `PARTIAL_CHECKPOINT_SUFFIX`, and renamed
+        to the checkpoint path when completed. So the interrupted checkpoint is never loaded.
+
+        Returns:
+            tuple[Path, Callable[[], None]]: The path to the checkpoint directory and the function which writes it.
+        """
         checkpoint_path = self.checkpoints_dir / datetime.now().strftime(self.checkpoint_name_format)
-        if checkpoint_path.exists():
+        partial_path = checkpoint_path.with_name(checkpoint_path.name + PARTIAL_CHECKPOINT_SUFFIX)
+        if checkpoint_path.exists() or partial_path.exists():
             self._logger.warning(
                 f"Aborted saving checkpoint because the checkpoint path already exists.: '{checkpoint_path}.'"
             )
-            return checkpoint_path
+            return checkpoint_path, lambda: None
 
-        checkpoint_path.mkdir()
-        for thread in self._threads:
-            thread.save_state(checkpoint_path / thread.thread_name)
+        partial_path.mkdir()
+        writers = [thread.snapshot_state(partial_path / thread.thread_name) for thread in self._threads]
 
-        return checkpoint_path
+        def write() -> None:
+            for writer in writers:
+                writer()
+            partial_path.rename(checkpoint_path)
+
+        return checkpoint_path, write
 
     def load_checkpoint(self, checkpoint_path: StrPath) -> None:
         """Loads a checkpoint from the specified path.
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Callable
 
 
 class SaveAndLoadStateMixin:
@@ -12,3 +13,15 @@ class SaveAndLoadStateMixin:
     def load_state(self, path: Path) -> None:
         """Loads the internal state from the `path`"""
         pass
+
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Takes the in-memory snapshot of the internal state, and returns the
+        function which writes it to the `path`.
+
+        The snapshot is taken while the threads are paused, and the returned function is called after resuming
+        them (See `Checkpointing.take_snapshot`). So the function must not refer to the state mutated after
+        resuming. The default implementation saves the state immediately by :meth:`save_state`. Override it
+        to shorten the pause.
+        """
+        self.save_state(path)
+        return lambda: None
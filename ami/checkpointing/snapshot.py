@@ -0,0 +1,36 @@
+"""This file contains the utilities for taking the in-memory snapshots of the
+states."""
+from typing import Callable, TypeVar
+
+import torch
+
+T = TypeVar("T")
+
+
+def copy_tensors_to_cpu(obj: T) -> T:
+    """Copies the tensors in the nested dicts, lists and tuples (e.g., the
+    state dict of models and optimizers) to the cpu.
+
+    The tensors are always copied, so the returned object is not changed
+    by the in-place updates of the original.
+    """
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)  # type: ignore[return-value]
+    if isinstance(obj, dict):
+        copied = type(obj)((k, copy_tensors_to_cpu(v)) for k, v in obj.items())
+        if hasattr(obj, "_metadata"):  # The module versions of the model state dict.
+            copied._metadata = obj._metadata  # type: ignore[attr-defined]
+        return copied  # type: ignore[return-value]
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(copy_tensors_to_cpu(v) for v in obj)  # type: ignore[return-value]
+    return obj
+
+
+def chain_writers(*writers: Callable[[], None]) -> Callable[[], None]:
+    """Returns the function which calls the snapshot writers in order."""
+
+    def write() -> None:
+        for writer in writers:
+            writer()
+
+    return write
@@ -1,14 +1,17 @@
 """This file contains all base data buffer class."""
 import copy
 from abc import ABC, abstractmethod
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping
 
+from torch import Tensor
 from torch.utils.data import Dataset
 from typing_extensions import Self
 
 from ami.checkpointing import SaveAndLoadStateMixin
 
-from ..step_data import StepData
+from ..step_data import DataKeys, StepData
+from .codecs import BaseCodec
 
 
 class BaseDataBuffer(ABC, SaveAndLoadStateMixin):
@@ -25,6 +28,8 @@ class BaseDataBuffer(ABC, SaveAndLoadStateMixin):
 
     _init_args: tuple[Any, ...]
     _init_kwds: dict[str, Any]
+    # The storage codecs of the keys. See :meth:`encode` and :meth:`decode`.
+    codecs: Mapping[DataKeys, BaseCodec] = MappingProxyType({})
 
     @classmethod
     def reconstructable_init(cls, *args: Any, **kwds: Any) -> Self:
@@ -57,6 +62,18 @@ class BaseDataBuffer(ABC, SaveAndLoadStateMixin):
         """
         raise NotImplementedError
 
+    def add_batch(self, step_data_list: list[StepData]) -> None:
+        """Stores the steps of data collected at the same time from the
+        vectorized environments.
+
+        Override if the buffer depends on the order of the added data.
+
+        Args:
+            step_data_list: A single step of data for each environment.
+        """
+        for step_data in step_data_list:
+            self.add(step_data)
+
     @abstractmethod
     def concatenate(self, new_data: Self) -> None:
         """Concatenates the current data with new data.
@@ -74,3 +91,24 @@ class BaseDataBuffer(ABC, SaveAndLoadStateMixin):
             dataset: Dataset object for training.
         """
         raise NotImplementedError
+
+    def encode(self, key: DataKeys, tensor: Tensor) -> Tensor:
+        """Encodes the tensor for storing with the codec of the key.
+
+        The tensor already in the storage dtype is stored as is.
+        """
+        codec = self.codecs.get(key)
+        if codec is None or tensor.dtype == codec.storage_dtype:
+            return tensor
+        return codec.encode(tensor)
+
+    def decode(self, key: DataKeys, tensor: Tensor) -> Tensor:
+        """Decodes the stored tensor of the key.
+
+        Call in the trainer after transferring the batch to the
+        computing device.
+        """
+        codec = self.codecs.get(key)
+        if codec is None:
+            return tensor
+        return codec.decode(tensor)
@@ -2,6 +2,7 @@ import pickle
 import time
 from collections import deque
 from pathlib import Path
+from typing import Callable, Mapping
 
 import torch
 from torch.utils.data import TensorDataset
@@ -9,19 +10,29 @@ from typing_extensions import Self, override
 
 from ..step_data import DataKeys, StepData
 from .base_data_buffer import BaseDataBuffer
+from .codecs import BaseCodec
 
 
 class CausalDataBuffer(BaseDataBuffer):
     """A data buffer which preserve data order."""
 
-    def __init__(self, max_len: int, key_list: list[DataKeys | str]) -> None:
+    def __init__(
+        self,
+        max_len: int,
+        key_list: list[DataKeys | str],
+        codecs: Mapping[DataKeys | str, BaseCodec] | None = None,
+    ) -> None:
         """Initializes data buffer.
 
         Args:
             max_len: max length of buffer.
             key_list: a list of keys to save whose values to buffer.
+            codecs: The storage codecs of the keys (e.g., `UInt8Codec` for images, `Float16Codec` for
+                hidden states). The stored data are decoded by the trainer via :meth:`decode`.
         """
         assert len(key_list) > 0, "`key_list` must have at least one element!"
+        if codecs is not None:
+            self.codecs = {DataKeys(key): codec for key, codec in codecs.items()}
 
         self.__max_len = max_len
         self._key_list = [DataKeys(key) for key in key_list]
@@ -46,10 +57,24 @@ class CausalDataBuffer(BaseDataBuffer):
             step_data: A single step of data.
         """
         for key in self._key_list:
-            self.__buffer_dict[key].append(torch.Tensor(step_data[key]).cpu())
+            self.__buffer_dict[key].append(self.encode(key, torch.Tensor(step_data[key]).cpu()))
 
         self._added_times.append(time.time())
 
+    @override
+    def add_batch(self, step_data_list: list[StepData]) -> None:
+        """Adds a single step of data.
+
+        The data of multiple environments can not be added, because they
+        are interleaved and break the causal order.
+        """
+        if len(step_data_list) > 1:
+            raise ValueError(
+                f"{self.__class__.__name__} can not store the data of {len(step_data_list)} environments. "
+                "Use a single environment."
+            )
+        super().add_batch(step_data_list)
+
     @property
     def buffer_dict(self) -> dict[DataKeys, deque[torch.Tensor]]:
         return self.__buffer_dict
@@ -100,12 +125,34 @@ class CausalDataBuffer(BaseDataBuffer):
         with open(path / "_added_times.pkl", "wb") as f:
             pickle.dump(self._added_times, f)
 
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Copies the references to the stored tensors, and returns the
+        function which saves them to `path`.
+
+        The stored tensors are never modified in place, so copying the
+        containers is enough.
+        """
+        path.mkdir()
+        buffer_dict = {key: value.copy() for key, value in self.__buffer_dict.items()}
+        added_times = self._added_times.copy()
+
+        def write() -> None:
+            for key, value in buffer_dict.items():
+                with open(path / (key + ".pkl"), "wb") as f:
+                    pickle.dump(value, f)
+            with open(path / "_added_times.pkl", "wb") as f:
+                pickle.dump(added_times, f)
+
+        return write
+
     @override
     def load_state(self, path: Path) -> None:
         for key in self.__buffer_dict.keys():
             file_name = path / (key + ".pkl")
             with open(file_name, "rb") as f:
-                self.__buffer_dict[key] = deque(pickle.load(f), maxlen=self.__max_len)
+                # Encodes the data saved without the codec.
+                self.__buffer_dict[key] = deque((self.encode(key, v) for v in pickle.load(f)), maxlen=self.__max_len)
 
         with open(path / "_added_times.pkl", "rb") as f:
             self._added_times = deque(pickle.load(f), maxlen=self.__max_len)
@@ -0,0 +1,93 @@
+"""This file contains the storage codecs which quantize the tensors stored in
+the data buffers."""
+from abc import ABC, abstractmethod
+
+import torch
+from torch import Tensor
+
+
+class BaseCodec(ABC):
+    """Base class for the storage codecs.
+
+    The data buffer encodes the tensor when adding it, and the trainer
+    decodes the batch after the device transfer (See
+    `BaseDataBuffer.decode`). So, the decoding runs on the batch on the
+    computing device.
+    """
+
+    @property
+    @abstractmethod
+    def storage_dtype(self) -> torch.dtype:
+        """The dtype of the encoded tensor."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def encode(self, tensor: Tensor) -> Tensor:
+        raise NotImplementedError
+
+    @abstractmethod
+    def decode(self, tensor: Tensor) -> Tensor:
+        raise NotImplementedError
+
+
+class UInt8Codec(BaseCodec):
+    """Quantizes the tensor into uint8 as `round((x - offset) / scale)`.
+
+    The default scale and offset are for the images normalized to [0, 1],
+    which are stored without loss if they are originally uint8.
+    """
+
+    def __init__(self, scale: float = 1 / 255, offset: float = 0.0, dtype: torch.dtype = torch.float32) -> None:
+        """
+        Args:
+            scale: The value range per quantization step.
+            offset: The value of the quantized 0.
+            dtype: The dtype of the decoded tensor.
+        """
+        self.scale = scale
+        self.offset = offset
+        self.dtype = dtype
+
+    @property
+    def storage_dtype(self) -> torch.dtype:
+        return torch.uint8
+
+    def encode(self, tensor: Tensor) -> Tensor:
+        return ((tensor - self.offset) / self.scale).round_().clamp_(0, 255).to(torch.uint8)
+
+    def decode(self, tensor: Tensor) -> Tensor:
+        return tensor.to(self.dtype) * self.scale + self.offset
+
+
+class CastCodec(BaseCodec):
+    """Stores the tensor in the lower precision dtype (e.g., for embeddings
+    and hidden states)."""
+
+    def __init__(self, storage_dtype: torch.dtype, dtype: torch.dtype = torch.float32) -> None:
+        """
+        Args:
+            storage_dtype: The dtype of the stored tensor.
+            dtype: The dtype of the decoded tensor.
+        """
+        self._storage_dtype = storage_dtype
+        self.dtype = dtype
+
+    @property
+    def storage_dtype(self) -> torch.dtype:
+        return self._storage_dtype
+
+    def encode(self, tensor: Tensor) -> Tensor:
+        return tensor.to(self._storage_dtype)
+
+    def decode(self, tensor: Tensor) -> Tensor:
+        return tensor.to(self.dtype)
+
+
+class Float16Codec(CastCodec):
+    def __init__(self, dtype: torch.dtype = torch.float32) -> None:
+        super().__init__(torch.float16, dtype)
+
+
+class BFloat16Codec(CastCodec):
+    def __init__(self, dtype: torch.dtype = torch.float32) -> None:
+        super().__init__(torch.bfloat16, dtype)
@@ -2,6 +2,7 @@ import pickle
 import time
 from collections import deque
 from pathlib import Path
+from typing import Callable, Mapping
 
 import numpy as np
 import torch
@@ -10,19 +11,29 @@ from typing_extensions import Self, override
 
 from ..step_data import DataKeys, StepData
 from .base_data_buffer import BaseDataBuffer
+from .codecs import BaseCodec
 
 
 class RandomDataBuffer(BaseDataBuffer):
     """A data buffer which does not preserve data order."""
 
-    def __init__(self, max_len: int, key_list: list[DataKeys | str]) -> None:
+    def __init__(
+        self,
+        max_len: int,
+        key_list: list[DataKeys | str],
+        codecs: Mapping[DataKeys | str, BaseCodec] | None = None,
+    ) -> None:
         """Initializes data buffer.
 
         Args:
             max_len: max length of buffer.
             key_list: a list of keys to save whose values to buffer.
+            codecs: The storage codecs of the keys (e.g., `UInt8Codec` for images, `Float16Codec` for
+                hidden states). The stored data are decoded by the trainer via :meth:`decode`.
         """
         assert len(key_list) > 0, "`key_list` must have at least one element!"
+        if codecs is not None:
+            self.codecs = {DataKeys(key): codec for key, codec in codecs.items()}
 
         self.__max_len = max_len
         self.__key_list = [DataKeys(key) for key in key_list]
@@ -46,13 +57,16 @@ class RandomDataBuffer(BaseDataBuffer):
         Args:
             step_data: A single step of data.
         """
+        self._add_encoded({key: self.encode(key, torch.Tensor(step_data[key]).cpu()) for key in self.__key_list})
+
+    def _add_encoded(self, encoded_data: dict[DataKeys, torch.Tensor]) -> None:
         if len(self) < self.__max_len:
             for key in self.__key_list:
-                self.__buffer_dict[key].append(torch.Tensor(step_data[key]).cpu())
+                self.__buffer_dict[key].append(encoded_data[key])
         else:
             replace_index = np.random.randint(0, self.__max_len)
             for key in self.__key_list:
-                self.__buffer_dict[key][replace_index] = torch.Tensor(step_data[key]).cpu()
+                self.__buffer_dict[key][replace_index] = encoded_data[key]
         self._added_times.append(time.time())
 
     @property
@@ -66,10 +80,8 @@ class RandomDataBuffer(BaseDataBuffer):
             new_data: A buffer to concatenate.
         """
         for i in range(len(new_data)):
-            step_data = StepData()
-            for key in self.__key_list:
-                step_data[key] = new_data.buffer_dict[key][i]
-            self.add(step_data)
+            # The data of `new_data` are already encoded by the same codecs.
+            self._add_encoded({key: new_data.buffer_dict[key][i] for key in self.__key_list})
 
     def make_dataset(self) -> TensorDataset:
         """Make a TensorDataset from current buffer.
@@ -107,12 +119,34 @@ class RandomDataBuffer(BaseDataBuffer):
         with open(path / "_added_times.pkl", "wb") as f:
             pickle.dump(self._added_times, f)
 
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Copies the references to the stored tensors, and returns the
+        function which saves them to `path`.
+
+        The stored tensors are never modified in place, so copying the
+        containers is enough.
+        """
+        path.mkdir()
+        buffer_dict = {key: value.copy() for key, value in self.__buffer_dict.items()}
+        added_times = self._added_times.copy()
+
+        def write() -> None:
+            for key, value in buffer_dict.items():
+                with open(path / (key + ".pkl"), "wb") as f:
+                    pickle.dump(value, f)
+            with open(path / "_added_times.pkl", "wb") as f:
+                pickle.dump(added_times, f)
+
+        return write
+
     @override
     def load_state(self, path: Path) -> None:
         for key in self.__buffer_dict.keys():
             file_name = path / (key + ".pkl")
             with open(file_name, "rb") as f:
-                self.__buffer_dict[key] = pickle.load(f)[: self.__max_len]
+                # Encodes the data saved without the codec.
+                self.__buffer_dict[key] = [self.encode(key, v) for v in pickle.load(f)[: self.__max_len]]
 
         with open(path / "_added_times.pkl", "rb") as f:
             self._added_times = deque(pickle.load(f), maxlen=self.__max_len)
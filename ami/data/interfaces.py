@@ -2,7 +2,7 @@
 threading."""
 import threading
 from pathlib import Path
-from typing import Any, Generic, TypeVar
+from typing import Any, Callable, Generic, TypeVar
 
 from torch.utils.data import Dataset
 from typing_extensions import override
@@ -22,11 +22,36 @@ class ThreadSafeDataCollector(Generic[BufferType]):
         """Constructs data collector class."""
         self._buffer = buffer
         self._lock = threading.RLock()
+        self._collected_count = 0
+        self._moved_count = 0
 
     def collect(self, step_data: StepData) -> None:
         """Collects `step_data` in a thread-safe manner."""
         with self._lock:
             self._buffer.add(step_data)
+            self._collected_count += 1
+
+    def collect_batch(self, step_data_list: list[StepData]) -> None:
+        """Collects the steps of data of the vectorized environments at once
+        in a thread-safe manner."""
+        with self._lock:
+            self._buffer.add_batch(step_data_list)
+            self._collected_count += len(step_data_list)
+
+    @property
+    def collected_count(self) -> int:
+        """The total number of collected data.
+
+        This counter increases monotonically and can be read cheaply
+        without locking.
+        """
+        return self._collected_count
+
+    @property
+    def num_new_data(self) -> int:
+        """The number of data collected since the last `move_data` or
+        `renew`."""
+        return self._collected_count - self._moved_count
 
     @property
     def new_data_buffer(self) -> BufferType:
@@ -37,6 +62,7 @@ class ThreadSafeDataCollector(Generic[BufferType]):
         """Renews the internal data buffer in a thread-safe manner."""
         with self._lock:
             self._buffer = self.new_data_buffer
+            self._moved_count = self._collected_count
 
     def move_data(self) -> BufferType:
         """Move data's pointer to other object."""
@@ -57,7 +83,13 @@ class ThreadSafeDataUser(Generic[BufferType], SaveAndLoadStateMixin):
 
     def update(self) -> None:
         """Updates the internal data buffer with new buffer from the
-        collector."""
+        collector.
+
+        Skipped cheaply if no data has been collected since the last
+        update.
+        """
+        if self.collector.num_new_data == 0:
+            return
         with self._lock:
             buffer = self.collector.move_data()
             self._buffer.concatenate(buffer)
@@ -87,6 +119,13 @@ class ThreadSafeDataUser(Generic[BufferType], SaveAndLoadStateMixin):
         self.update()
         self._buffer.save_state(path)
 
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Takes the snapshot of the buffer state."""
+        with self._lock:
+            self.update()
+            return self._buffer.snapshot_state(path)
+
     @override
     def load_state(self, path: Path) -> None:
         """Loads the buffer state."""
@@ -0,0 +1,326 @@
+"""This file contains the recorder which persists the collected step data, and
+the reader which replays them."""
+import threading
+import time
+from enum import Enum, auto
+from pathlib import Path
+from queue import Full, Queue
+from typing import Any, Iterator, Mapping
+
+import h5py
+import numpy as np
+import numpy.typing as npt
+import torch
+from torch import Tensor
+from torch.utils.data import TensorDataset
+
+from ami.logger import get_inference_thread_logger
+
+from .buffers.base_data_buffer import BaseDataBuffer
+from .buffers.codecs import BaseCodec
+from .step_data import DataKeys, StepData
+
+TIMESTAMPS_DATASET_NAME = "timestamps"
+DATA_GROUP_NAME = "data"
+# The data larger than this number of elements per step (e.g., images, hidden states) are compressed by the
+# fast `lzf` filter, and the smaller ones (e.g., actions, rewards) by `gzip`.
+LARGE_DATA_NUMEL = 1024
+# The interval [s] to check whether the writer thread is alive while waiting for it.
+WRITER_CHECK_INTERVAL = 0.1
+
+
+class _ControlCommands(Enum):
+    FLUSH = auto()
+    CLOSE = auto()
+
+
+def default_compression(shape: tuple[int, ...]) -> str:
+    """Returns the default compression filter for the data of the step shape."""
+    return "lzf" if int(np.prod(shape)) >= LARGE_DATA_NUMEL else "gzip"
+
+
+class TrajectoryRecorder:
+    """Records every collected step data into a single append-only HDF5
+    file.
+
+    Add the instance as the subscriber of `DataCollectorsDict` (See `InferenceThread`), so it receives the same
+    `StepData` as the data buffers. The values are copied to the cpu in the caller thread, and written by the
+    background writer thread in chunks.
+
+    File layout:
+        - `timestamps`: The unix time when each step is collected, shape (N,).
+        - `data/<key>`: The value of each step, shape (N, *). Aligned with `timestamps`.
+
+    All datasets are resizable and chunked. Use `TrajectoryReader` to replay the file.
+    """
+
+    def __init__(
+        self,
+        file_path: str | Path,
+        keys: list[DataKeys | str] | None = None,
+        flush_size: int = 256,
+        chunk_size: int = 256,
+        compressions: Mapping[DataKeys | str, str | None] | None = None,
+        codecs: Mapping[DataKeys | str, BaseCodec] | None = None,
+        queue_size: int = 4096,
+        swmr: bool = False,
+    ) -> None:
+        """Constructs the recorder.
+
+        Args:
+            file_path: The path to the HDF5 file. The data are appended if the file exists.
+            keys: The keys to record. If None, the keys of the first step data.
+            flush_size: The number of steps buffered before writing to the file.
+            chunk_size: The number of steps per HDF5 chunk.
+            compressions: The compression filter of the keys. The default is chosen by `default_compression`.
+            codecs: The storage codecs of the keys (e.g., `UInt8Codec` for images). Pass the same codecs to
+                `TrajectoryReader`.
+            queue_size: The maximum number of steps waiting for the writer thread. The caller waits if full.
+            swmr: Whether to write in the SWMR mode, so the file can be read while recording.
+        """
+        self.file_path = Path(file_path)
+        self.keys = None if keys is None else [DataKeys(k) for k in keys]
+        self.flush_size = flush_size
+        self.chunk_size = chunk_size
+        self.compressions = {DataKeys(k): v for k, v in (compressions or {}).items()}
+        self.codecs = {DataKeys(k): v for k, v in (codecs or {}).items()}
+        self.swmr = swmr
+
+        self._logger = get_inference_thread_logger(self.__class__.__name__)
+        self._queue: Queue[tuple[float, dict[DataKeys, Tensor]] | _ControlCommands] = Queue(queue_size)
+        self._flushed = threading.Event()
+        self._writer_thread: threading.Thread | None = None
+        self._writer_error: BaseException | None = None
+
+    def start(self) -> None:
+        """Starts the writer thread."""
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer_thread = threading.Thread(target=self._writer, daemon=True)
+        self._writer_thread.start()
+
+    def __call__(self, step_data: StepData) -> None:
+        """Records the step data. Called as the subscriber of
+        `DataCollectorsDict`."""
+        if self._writer_thread is None:
+            return
+        self._check_writer()
+        if self.keys is None:
+            self.keys = [DataKeys(k) for k in step_data.keys()]
+        values = {}
+        for key in self.keys:
+            # Copies the value, because the caller may reuse the tensor.
+            value = torch.as_tensor(step_data[key]).detach().to("cpu", copy=True)
+            codec = self.codecs.get(key)
+            values[key] = value if codec is None else codec.encode(value)
+        self._put((time.time(), values))
+
+    def flush(self) -> None:
+        """Writes all recorded steps to the file, and waits for it.
+
+        Raises:
+            RuntimeError: If the writer thread has failed.
+        """
+        if self._writer_thread is None:
+            return
+        self._check_writer()
+        self._flushed.clear()
+        self._put(_ControlCommands.FLUSH)
+        while not self._flushed.wait(WRITER_CHECK_INTERVAL):
+            self._check_writer()
+        self._check_writer()
+
+    def close(self) -> None:
+        """Writes all recorded steps and stops the writer thread."""
+        if self._writer_thread is None:
+            return
+        if self._writer_thread.is_alive():
+            self._put(_ControlCommands.CLOSE)
+            self._writer_thread.join()
+        self._writer_thread = None
+
+    def _check_writer(self) -> None:
+        """Raises the error if the writer thread has failed or stopped."""
+        if self._writer_error is not None:
+            raise RuntimeError("The trajectory writer thread has failed.") from self._writer_error
+        if self._writer_thread is not None and not self._writer_thread.is_alive():
+            raise RuntimeError("The trajectory writer thread has stopped.")
+
+    def _put(self, item: tuple[float, dict[DataKeys, Tensor]] | _ControlCommands) -> None:
+        """Puts the item into the queue, without waiting forever for the
+        stopped writer thread."""
+        while True:
+            try:
+                self._queue.put(item, timeout=WRITER_CHECK_INTERVAL)
+                return
+            except Full:
+                if item is _ControlCommands.CLOSE and self._writer_error is not None:
+                    return  # `close` finishes without raising the error.
+                self._check_writer()
+
+    def _writer(self) -> None:
+        timestamps: list[float] = []
+        rows: dict[DataKeys, list[Tensor]] = {}
+        self._logger.info(f"Recording trajectory to '{self.file_path}'")
+        try:
+            file_kwds = {"libver": "latest"} if self.swmr else {}
+            with h5py.File(self.file_path, "a", **file_kwds) as file:
+                while True:
+                    item = self._queue.get()
+                    if isinstance(item, _ControlCommands):
+                        self._write(file, timestamps, rows)
+                        file.flush()
+                        self._flushed.set()
+                        if item == _ControlCommands.CLOSE:
+                            break
+                        continue
+                    timestamp, values = item
+                    timestamps.append(timestamp)
+                    for key, value in values.items():
+                        rows.setdefault(key, []).append(value)
+                    if len(timestamps) >= self.flush_size:
+                        self._write(file, timestamps, rows)
+        except Exception as e:
+            self._logger.exception("Failed to record the trajectory.")
+            self._writer_error = e
+            self._flushed.set()
+
+    def _write(self, file: h5py.File, timestamps: list[float], rows: dict[DataKeys, list[Tensor]]) -> None:
+        if len(timestamps) == 0:
+            return
+        arrays: dict[str, npt.NDArray[Any]] = {}
+        for key, values in rows.items():
+            arrays[f"{DATA_GROUP_NAME}/{key.value}"] = torch.stack(values).numpy()
+        # The timestamps are written last as the commit marker, so the SWMR readers never see the steps whose
+        # data are not written yet.
+        arrays[TIMESTAMPS_DATASET_NAME] = np.asarray(timestamps, dtype=np.float64)
+
+        for name, array in arrays.items():
+            if name not in file:
+                if name == TIMESTAMPS_DATASET_NAME:
+                    compression: str | None = "gzip"
+                else:
+                    key = DataKeys(name.removeprefix(f"{DATA_GROUP_NAME}/"))
+                    compression = self.compressions.get(key, default_compression(array.shape[1:]))
+                file.create_dataset(
+                    name,
+                    shape=(0, *array.shape[1:]),
+                    maxshape=(None, *array.shape[1:]),
+                    dtype=array.dtype,
+                    chunks=(self.chunk_size, *array.shape[1:]),
+                    compression=compression,
+                )
+        if self.swmr and not file.swmr_mode:
+            # No datasets can be created after enabling the SWMR mode.
+            file.swmr_mode = True
+
+        for name, array in arrays.items():
+            dataset = file[name]
+            size = dataset.shape[0]
+            dataset.resize(size + len(array), axis=0)
+            dataset[size:] = array
+            if self.swmr:
+                dataset.flush()
+
+        self._logger.debug(f"Wrote {len(timestamps)} steps.")
+        timestamps.clear()
+        rows.clear()
+
+
+class TrajectoryReader:
+    """Reads the file written by `TrajectoryRecorder`, and replays it into
+    the data buffers or offline trainers.
+
+    The data are read in contiguous chunks, so replaying runs at the disk
+    speed.
+    """
+
+    def __init__(
+        self,
+        file_path: str | Path,
+        codecs: Mapping[DataKeys | str, BaseCodec] | None = None,
+        swmr: bool = False,
+    ) -> None:
+        """Opens the file.
+
+        Args:
+            file_path: The path to the HDF5 file.
+            codecs: The storage codecs used for recording, to decode the data.
+            swmr: Whether to read the file being recorded in the SWMR mode.
+        """
+        self.file_path = Path(file_path)
+        self.codecs = {DataKeys(k): v for k, v in (codecs or {}).items()}
+        file_kwds: dict[str, Any] = {"libver": "latest", "swmr": True} if swmr else {}
+        self._file = h5py.File(self.file_path, "r", **file_kwds)
+
+    @property
+    def keys(self) -> list[DataKeys]:
+        return [DataKeys(k) for k in self._file[DATA_GROUP_NAME].keys()]
+
+    @property
+    def timestamps(self) -> npt.NDArray[np.float64]:
+        return self._file[TIMESTAMPS_DATASET_NAME][:]
+
+    def __len__(self) -> int:
+        if TIMESTAMPS_DATASET_NAME not in self._file:
+            return 0
+        # Refreshes the dataset for the SWMR reading.
+        dataset = self._file[TIMESTAMPS_DATASET_NAME]
+        if self._file.swmr_mode:
+            dataset.refresh()
+        # All datasets are written after the timestamps, so they have at least this length.
+        return dataset.shape[0]
+
+    def read(self, start: int, stop: int, keys: list[DataKeys | str] | None = None) -> StepData:
+        """Reads the steps [start, stop) as the batched step data, shape (stop
+        - start, *)."""
+        step_data = StepData()
+        for key in self.keys if keys is None else [DataKeys(k) for k in keys]:
+            dataset = self._file[f"{DATA_GROUP_NAME}/{key.value}"]
+            if self._file.swmr_mode:
+                dataset.refresh()
+            value = torch.from_numpy(dataset[start:stop])
+            codec = self.codecs.get(key)
+            step_data[key] = value if codec is None else codec.decode(value)
+        return step_data
+
+    def iter_chunks(self, chunk_size: int = 1024, keys: list[DataKeys | str] | None = None) -> Iterator[StepData]:
+        """Iterates the batched step data of `chunk_size` steps."""
+        length = len(self)
+        for start in range(0, length, chunk_size):
+            yield self.read(start, min(start + chunk_size, length), keys)
+
+    def __iter__(self) -> Iterator[StepData]:
+        """Iterates the step data of each step."""
+        for chunk in self.iter_chunks():
+            size = len(next(iter(chunk.values())))
+            for i in range(size):
+                yield StepData({k: v[i] for k, v in chunk.items()})
+
+    def replay_into(self, buffer: BaseDataBuffer, chunk_size: int = 1024) -> int:
+        """Adds all recorded steps to the data buffer in the recorded order.
+
+        Returns:
+            int: The number of added steps.
+        """
+        count = 0
+        for chunk in self.iter_chunks(chunk_size):
+            size = len(next(iter(chunk.values())))
+            for i in range(size):
+                buffer.add(StepData({k: v[i] for k, v in chunk.items()}))
+            count += size
+        return count
+
+    def make_dataset(self, keys: list[DataKeys | str]) -> TensorDataset:
+        """Loads the data of the keys into the `TensorDataset` for offline
+        training."""
+        step_data = self.read(0, len(self), keys)
+        return TensorDataset(*(step_data[DataKeys(k)] for k in keys))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "TrajectoryReader":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -16,13 +16,16 @@ Assumed usage:
     >>> cfg = OmegaConf.load("config.yaml")
     >>> collector = hydra.utils.instantiate(cfg)
 """
+import math
+import threading
 from collections import UserDict
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from typing_extensions import Self, override
 
 from ami.checkpointing import SaveAndLoadStateMixin
+from ami.checkpointing.snapshot import chain_writers
 
 from .buffers.base_data_buffer import BaseDataBuffer
 from .interfaces import ThreadSafeDataCollector, ThreadSafeDataUser
@@ -40,6 +43,12 @@ class DataUsersDict(UserDict[str, ThreadSafeDataUser[Any]], SaveAndLoadStateMixi
         for name, user in self.items():
             user.save_state(path / name)
 
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Takes the snapshots of the internal data buffers."""
+        path.mkdir()
+        return chain_writers(*(user.snapshot_state(path / name) for name, user in self.items()))
+
     @override
     def load_state(self, path: Path) -> None:
         """Loads the internal buffer state from `path`."""
@@ -47,14 +56,105 @@ class DataUsersDict(UserDict[str, ThreadSafeDataUser[Any]], SaveAndLoadStateMixi
             user.load_state(path / name)
 
 
+class DataArrivalNotifier:
+    """Notifies the waiting threads of the arrival of new data.
+
+    The inference thread calls :meth:`notify` for each collected step,
+    and the training thread waits for new data with
+    :meth:`wait_for_new_data` instead of sleep polling. The waiting
+    threads are woken up after `notify_every_n` new steps arrive.
+    """
+
+    def __init__(self, notify_every_n: int = 1) -> None:
+        assert notify_every_n >= 1
+        self.notify_every_n = notify_every_n
+        self._condition = threading.Condition()
+        self._count = 0
+        # The smallest count which the waiting threads wait for.
+        self._wake_count: float = math.inf
+
+    @property
+    def count(self) -> int:
+        """The total number of notified steps."""
+        return self._count
+
+    def notify(self) -> None:
+        """Counts a new step and wakes up the waiting threads if their
+        awaited count is reached."""
+        with self._condition:
+            self._count += 1
+            if self._count >= self._wake_count:
+                self._wake_count = math.inf
+                self._condition.notify_all()
+
+    def wait_for_new_data(self, since_count: int, timeout: float | None = None) -> bool:
+        """Waits until `notify_every_n` new steps arrive after the `count`
+        was `since_count`.
+
+        Returns:
+            bool: False if timed out.
+        """
+        target_count = since_count + self.notify_every_n
+
+        def is_arrived() -> bool:
+            if self._count >= target_count:
+                return True
+            # Registered again after the other threads are woken up.
+            self._wake_count = min(self._wake_count, target_count)
+            return False
+
+        with self._condition:
+            return self._condition.wait_for(is_arrived, timeout)
+
+
 class DataCollectorsDict(UserDict[str, ThreadSafeDataCollector[Any]]):
     """A class for aggregating `DataCollectors` to invoke their `collect`
     methods within the agent class."""
 
+    def __init__(self, *args: Any, **kwds: Any) -> None:
+        super().__init__(*args, **kwds)
+        self._notifier: DataArrivalNotifier | None = None
+        self._subscribers: list[Callable[[StepData], None]] = []
+
+    def attach_notifier(self, notifier: DataArrivalNotifier) -> None:
+        """Attaches the notifier which is notified after each `collect`."""
+        self._notifier = notifier
+
+    def add_subscriber(self, subscriber: Callable[[StepData], None]) -> None:
+        """Adds the callback which receives every collected `step_data`.
+
+        The subscriber is called in the inference thread, so it must
+        return quickly.
+        """
+        self._subscribers.append(subscriber)
+
     def collect(self, step_data: StepData) -> None:
         """Calls the `collect` method on every `DataCollector` item."""
         for v in self.values():
             v.collect(step_data)
+        for subscriber in self._subscribers:
+            subscriber(step_data)
+        if self._notifier is not None:
+            self._notifier.notify()
+
+    def collect_batch(self, batch_step_data: StepData) -> None:
+        """Collects the batched step data of the vectorized environments.
+
+        Each value of `batch_step_data` must be a sequence (e.g., Tensor) whose first dimension is the
+        environment, and it is split into a single step of data for each environment.
+        """
+        sizes = {len(v) for v in batch_step_data.values()}
+        if len(sizes) != 1:
+            raise ValueError(f"The batch sizes of the step data values are different: {sizes}")
+        step_data_list = [StepData({k: v[i] for k, v in batch_step_data.items()}) for i in range(sizes.pop())]
+
+        for v in self.values():
+            v.collect_batch(step_data_list)
+        for step_data in step_data_list:
+            for subscriber in self._subscribers:
+                subscriber(step_data)
+            if self._notifier is not None:
+                self._notifier.notify()
 
     @classmethod
     def from_data_buffers(cls, **data_buffers: BaseDataBuffer) -> Self:
@@ -16,6 +16,7 @@ from ...models.model_wrapper import ThreadSafeInferenceWrapper
 from ...models.policy_or_value_network import PolicyOrValueNetwork
 from ...models.policy_value_common_net import PolicyValueCommonNet
 from .base_agent import BaseAgent
+from .utils import PipelineExecutor
 
 
 class PredictionErrorReward:
@@ -54,6 +55,7 @@ class CuriosityImagePPOAgent(BaseAgent[Tensor, Tensor]):
         logger: TimeIntervalLogger,
         reward: PredictionErrorReward,
         use_embed_obs_for_policy: bool = False,
+        pipelined: bool = False,
     ) -> None:
         """Constructs Agent.
 
@@ -61,6 +63,8 @@ class CuriosityImagePPOAgent(BaseAgent[Tensor, Tensor]):
             initial_hidden: Initial hidden state for the forward dynamics model.
             use_embed_obs_for_policy: Use embed observation as observation for policy input.
                 Implemented for adapting the world models learning method.
+            pipelined: If True, the action is returned as soon as it is sampled, and the forward dynamics
+                prediction and the data collection run concurrently until the start of the next step.
         """
         super().__init__()
 
@@ -68,6 +72,7 @@ class CuriosityImagePPOAgent(BaseAgent[Tensor, Tensor]):
         self.logger = logger
         self.reward_computer = reward
         self.use_embed_obs_for_policy = use_embed_obs_for_policy
+        self.pipeline = PipelineExecutor(enabled=pipelined)
 
     def on_inference_models_attached(self) -> None:
         super().on_inference_models_attached()
@@ -93,15 +98,19 @@ class CuriosityImagePPOAgent(BaseAgent[Tensor, Tensor]):
         # \phi(o_t) -> z_t
         embed_obs = self.image_encoder(observation)
 
+        # The prediction of the previous step is required from here.
+        self.pipeline.wait()
+
+        previous_step_data = None
         if not initial_step:
             # 報酬計算は初期ステップではできないためスキップ。
             reward = self.reward_computer.compute(self.predicted_next_embed_observation_dist, embed_obs)
             self.step_data[DataKeys.REWARD] = reward  # r_{t+1}
             self.logger.log("agent/reward", reward)
+            previous_step_data = self.step_data
 
-            # ステップの冒頭でデータコレクトすることで前ステップのデータを収集する。
-            self.data_collectors.collect(self.step_data)
-
+        # The step data is created for each step because the previous one may be collected concurrently.
+        self.step_data = StepData()
         self.step_data[DataKeys.OBSERVATION] = observation  # o_t
         self.step_data[DataKeys.EMBED_OBSERVATION] = embed_obs  # z_t
 
@@ -121,14 +130,26 @@ class CuriosityImagePPOAgent(BaseAgent[Tensor, Tensor]):
         self.step_data[DataKeys.HIDDEN] = self.forward_dynamics_hidden_state  # h_t
         self.logger.log("agent/value", value)
 
-        pred, hidden = self.forward_dynamics(embed_obs, self.forward_dynamics_hidden_state, action)
-        self.predicted_next_embed_observation_dist = pred  # p(\hat{z}_{t+1} | z_t, h_t, a_t)
-        self.forward_dynamics_hidden_state = hidden  # h_{t+1}
+        self.pipeline.submit(self._predict_next_step, embed_obs, action, previous_step_data)
 
         self.logger.update()
 
         return action
 
+    def _predict_next_step(self, embed_obs: Tensor, action: Tensor, previous_step_data: StepData | None) -> None:
+        """Collects the previous step data and predicts the next embed
+        observation.
+
+        Runs concurrently with the environment if pipelined.
+        """
+        if previous_step_data is not None:
+            # ステップの冒頭でデータコレクトすることで前ステップのデータを収集する。
+            self.data_collectors.collect(previous_step_data)
+
+        pred, hidden = self.forward_dynamics(embed_obs, self.forward_dynamics_hidden_state, action)
+        self.predicted_next_embed_observation_dist = pred  # p(\hat{z}_{t+1} | z_t, h_t, a_t)
+        self.forward_dynamics_hidden_state = hidden  # h_{t+1}
+
     def setup(self, observation: Tensor) -> Tensor:
         super().setup(observation)
 
@@ -139,13 +160,23 @@ class CuriosityImagePPOAgent(BaseAgent[Tensor, Tensor]):
     def step(self, observation: Tensor) -> Tensor:
         return self._common_step(observation, initial_step=False)
 
+    def teardown(self, observation: Tensor) -> Tensor | None:
+        self.pipeline.shutdown()
+        return super().teardown(observation)
+
+    @override
+    def on_paused(self) -> None:
+        self.pipeline.wait()
+
     @override
     def save_state(self, path: Path) -> None:
+        self.pipeline.wait()
         path.mkdir()
         torch.save(self.forward_dynamics_hidden_state, path / "forward_dynamics_hidden_state.pt")
 
     @override
     def load_state(self, path: Path) -> None:
+        self.pipeline.wait()
         self.forward_dynamics_hidden_state = torch.load(path / "forward_dynamics_hidden_state.pt", map_location="cpu")
 
 
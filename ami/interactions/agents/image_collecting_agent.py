@@ -7,11 +7,20 @@ from .base_agent import BaseAgent
 class ImageCollectingAgent(BaseAgent[Tensor, None]):
     """Collects the observed image."""
 
-    def __init__(self) -> None:
+    def __init__(self, batched: bool = False) -> None:
+        """Constructs the agent.
+
+        Args:
+            batched: If True, the observation is the batch of the vectorized environments, shape (N, C, H, W).
+        """
         super().__init__()
+        self.batched = batched
         self.step_data = StepData()
 
     def step(self, observation: Tensor) -> None:
         self.step_data[DataKeys.OBSERVATION] = observation
-        self.data_collectors.collect(self.step_data)
+        if self.batched:
+            self.data_collectors.collect_batch(self.step_data)
+        else:
+            self.data_collectors.collect(self.step_data)
         return
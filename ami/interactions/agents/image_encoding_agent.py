@@ -8,8 +8,15 @@ from .base_agent import BaseAgent
 class ImageEncodingAgent(BaseAgent[Tensor, Tensor]):
     """Encodes the observed image with `IMAGE_ENCODER` model."""
 
-    def __init__(self) -> None:
+    def __init__(self, batched: bool = False) -> None:
+        """Constructs the agent.
+
+        Args:
+            batched: If True, the observation is the batch of the vectorized environments, shape (N, C, H, W),
+                and it is encoded at once.
+        """
         super().__init__()
+        self.batched = batched
         self.step_data = StepData()
 
     def on_inference_models_attached(self) -> None:
@@ -19,5 +26,8 @@ class ImageEncodingAgent(BaseAgent[Tensor, Tensor]):
         encoded: Tensor = self.image_encoder(observation)
         self.step_data[DataKeys.OBSERVATION] = observation
         self.step_data[DataKeys.EMBED_OBSERVATION] = encoded
-        self.data_collectors.collect(self.step_data)
+        if self.batched:
+            self.data_collectors.collect_batch(self.step_data)
+        else:
+            self.data_collectors.collect(self.step_data)
         return encoded
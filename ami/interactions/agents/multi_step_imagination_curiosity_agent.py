@@ -2,22 +2,15 @@ from collections import deque
 from pathlib import Path
 from typing import Any, Callable
 
-import matplotlib.pyplot as plt
 import numpy as np
 import numpy.typing as npt
-import seaborn
 import torch
 import torch.nn as nn
-import torchvision
-import torchvision.transforms.v2.functional
-from matplotlib.cm import ScalarMappable
-from matplotlib.colors import Normalize
 from torch import Tensor
 from torch.distributions import Distribution
 from typing_extensions import override
 
 from ami.tensorboard_loggers import TimeIntervalLogger
-from ami.utils import min_max_normalize
 
 from ...data.step_data import DataKeys, StepData
 from ...models.forward_dynamics import ForwardDynamcisWithActionReward
@@ -26,7 +19,13 @@ from ...models.model_wrapper import ThreadSafeInferenceWrapper
 from ...models.policy_or_value_network import PolicyOrValueNetwork
 from ...models.policy_value_common_net import PolicyValueCommonNet
 from .base_agent import BaseAgent
-from .utils import PolicyValueCommonProxy
+from .utils import PipelineExecutor, PolicyValueCommonProxy
+from .visualization_renderer import (
+    VisualizationRenderer,
+    render_image_grid,
+    render_reward_imaginations_curves,
+    render_reward_imaginations_heatmap,
+)
 
 
 class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
@@ -50,6 +49,10 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
         # 再構成画像（軌道）の可視化ログについて
         log_imagination_trajectory: bool = True,
         log_imagination_trajectory_every_n_steps: int | None = None,
+        # 可視化の描画について
+        render_visualizations_in_background: bool = True,
+        max_pending_renders: int = 2,
+        pipelined: bool = False,
     ) -> None:
         """Constructs Agent.
 
@@ -68,6 +71,11 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
             log_reconstruction_imaginations_append_interval: Number of steps between each append to the reconstruction imaginations log.
             log_imagination_trajectory: Whether or not to log imagination trajectroy.
             log_imagination_trajectory_every_n_steps: Number of steps between each logging of imagination trajectory.
+            render_visualizations_in_background: Whether to render the visualizations in the worker process.
+                If False, they are rendered in the inference thread.
+            max_pending_renders: Max number of unfinished renders. Visualizations exceeding it are dropped.
+            pipelined: If True, the action is returned as soon as it is sampled, and the forward dynamics
+                imaginations and the data collection run concurrently until the start of the next step.
         """
         super().__init__()
         assert max_imagination_steps > 0
@@ -106,6 +114,11 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
         self.log_imagination_trajectory_every_n_steps = log_imagination_trajectory_every_n_steps
         self.prepare_log_imagination_trajectory()
 
+        self.visualization_renderer = VisualizationRenderer(
+            logger, max_pending=max_pending_renders, inline=not render_visualizations_in_background
+        )
+        self.pipeline = PipelineExecutor(enabled=pipelined)
+
     @property
     def global_step(self) -> int:
         return self.logger.global_step
@@ -143,6 +156,10 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
         """
         embed_obs: Tensor = self.image_encoder(observation)
 
+        # The imaginations of the previous step are required from here.
+        self.pipeline.wait()
+
+        previous_step_data = None
         if not initial_step:
             # 報酬計算は初期ステップではできないためスキップ。
             embed_obs = embed_obs.type(self.predicted_embed_obs_imaginations.dtype)
@@ -158,9 +175,8 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
             # for i, r in enumerate(reward_imaginations, start=1):
             #     self.logger.log(f"agent/reward_{i}step", r)
 
-            # ステップの冒頭でデータコレクトすることで前ステップのデータを収集する。
             self.step_data[DataKeys.REWARD] = reward
-            self.data_collectors.collect(self.step_data)
+            previous_step_data = self.step_data
 
             if self.log_reward_imaginations:
                 self.reward_imaginations_logging_step(reward_imaginations)
@@ -172,6 +188,8 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
             if self.log_imagination_trajectory and self.image_decoder is not None:
                 self.imagination_trajectory_logging_step(observation, self.image_decoder)
 
+        # The step data is created for each step because the previous one may be collected concurrently.
+        self.step_data = StepData()
         self.step_data[DataKeys.OBSERVATION] = observation  # o_t
         self.step_data[DataKeys.EMBED_OBSERVATION] = embed_obs  # z_t
 
@@ -190,28 +208,50 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
         action = action_dist.sample()
         action_log_prob = action_dist.log_prob(action)
 
-        pred_obs_dist_imaginations, _, _, next_hidden_imaginations = self.forward_dynamics(
-            embed_obs_imaginations, hidden_imaginations, action.expand(len(embed_obs_imaginations), *action.shape)
-        )
-        pred_obs_imaginations = pred_obs_dist_imaginations.sample()
-
         self.step_data[DataKeys.ACTION] = action  # a_t
         self.step_data[DataKeys.ACTION_LOG_PROBABILITY] = action_log_prob  # log \pi(a_t | o_t, h_t)
         self.step_data[DataKeys.VALUE] = value  # v_t
         self.step_data[DataKeys.HIDDEN] = self.exact_forward_dynamics_hidden_state  # h_t
         self.logger.log("agent/value", value)
 
-        self.predicted_embed_obs_dist_imaginations = pred_obs_dist_imaginations
-        self.predicted_embed_obs_imaginations = pred_obs_imaginations
-        self.forward_dynamics_hidden_state_imaginations = next_hidden_imaginations
-        self.exact_forward_dynamics_hidden_state = next_hidden_imaginations[0]
+        self.pipeline.submit(
+            self._imagine_next_steps, embed_obs_imaginations, hidden_imaginations, action, previous_step_data
+        )
 
         self.logger.update()
 
         return action
 
+    def _imagine_next_steps(
+        self,
+        embed_obs_imaginations: Tensor,
+        hidden_imaginations: Tensor,
+        action: Tensor,
+        previous_step_data: StepData | None,
+    ) -> None:
+        """Collects the previous step data and predicts the next embed
+        observations of the imaginations.
+
+        Runs concurrently with the environment if pipelined.
+        """
+        if previous_step_data is not None:
+            # ステップの冒頭でデータコレクトすることで前ステップのデータを収集する。
+            self.data_collectors.collect(previous_step_data)
+
+        pred_obs_dist_imaginations, _, _, next_hidden_imaginations = self.forward_dynamics(
+            embed_obs_imaginations, hidden_imaginations, action.expand(len(embed_obs_imaginations), *action.shape)
+        )
+        pred_obs_imaginations = pred_obs_dist_imaginations.sample()
+
+        self.predicted_embed_obs_dist_imaginations = pred_obs_dist_imaginations
+        self.predicted_embed_obs_imaginations = pred_obs_imaginations
+        self.forward_dynamics_hidden_state_imaginations = next_hidden_imaginations
+        self.exact_forward_dynamics_hidden_state = next_hidden_imaginations[0]
+
+    @override
     def setup(self, observation: Tensor) -> Tensor:
         super().setup(observation)
+        self.visualization_renderer.start()
         self.step_data = StepData()
 
         device = self.exact_forward_dynamics_hidden_state.device
@@ -224,13 +264,25 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
     def step(self, observation: Tensor) -> Tensor:
         return self._common_step(observation, initial_step=False)
 
+    @override
+    def teardown(self, observation: Tensor) -> Tensor | None:
+        self.pipeline.shutdown()
+        self.visualization_renderer.shutdown()
+        return super().teardown(observation)
+
+    @override
+    def on_paused(self) -> None:
+        self.pipeline.wait()
+
     @override
     def save_state(self, path: Path) -> None:
+        self.pipeline.wait()
         path.mkdir()
         torch.save(self.exact_forward_dynamics_hidden_state, path / "exact_forward_dynamics_hidden_state.pt")
 
     @override
     def load_state(self, path: Path) -> None:
+        self.pipeline.wait()
         self.exact_forward_dynamics_hidden_state = torch.load(
             path / "exact_forward_dynamics_hidden_state.pt",
             map_location=self.exact_forward_dynamics_hidden_state.device,
@@ -260,132 +312,36 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
             self.visualize_reward_imaginations_curves()
 
     def visualize_reward_imaginations(self) -> None:
-        """Creates and logs a heatmap visualization of reward imaginations.
+        """Submits the heatmap visualization of reward imaginations to the
+        renderer.
 
-        This method generates a heatmap using the collected reward
-        imagination data, where each row represents a different global
-        step and each column represents an imagination step. The heatmap
-        is then logged to TensorBoard for visual analysis.
-
-        The heatmap provides insights into how the predicted rewards
-        change over time and across different imagination steps, helping
-        to track the agent's performance and the accuracy of its reward
-        predictions.
+        Each row of the heatmap represents a different global step and
+        each column represents an imagination step. It provides insights
+        into how the predicted rewards change over time and across
+        different imagination steps.
         """
-
-        BASE_FIG_SIZE = 0.6
-        ADJUST_FIG_WIDTH = 5
-        COLOR_MAP = "plasma"
-
-        imaginations_history_size = len(self.reward_imaginations_deque)
-        figsize = (
-            BASE_FIG_SIZE * self.max_imagination_steps + ADJUST_FIG_WIDTH,
-            BASE_FIG_SIZE * imaginations_history_size,
+        self.visualization_renderer.submit(
+            self.global_step,
+            render_reward_imaginations_heatmap,
+            "agent/multistep-imagination-errors",
+            np.stack(self.reward_imaginations_deque),
+            list(self.reward_imaginations_global_step_deque),
         )
 
-        data = np.stack(self.reward_imaginations_deque)[::-1]
-        xticklabels = np.arange(self.max_imagination_steps) + 1
-        yticklabels = list(reversed(self.reward_imaginations_global_step_deque))
-
-        fig = plt.figure(figsize=figsize)
-        ax = fig.subplots()
-        seaborn.heatmap(
-            data=data,
-            ax=ax,
-            annot=True,
-            cmap=COLOR_MAP,
-            linewidths=0.5,
-            xticklabels=xticklabels,
-            yticklabels=yticklabels,
-        )
-        ax.set_xlabel("imagination steps")
-        ax.set_ylabel("global steps")
-
-        self.logger.tensorboard.add_figure("agent/multistep-imagination-errors", fig, self.global_step)
-
     def visualize_reward_imaginations_curves(self) -> None:
-        """Visualizes the reward imaginations as curves across imagination
-        steps.
-
-        This method creates three different visualizations:
-        1. Original Reward Imaginations: Shows the raw reward values for each imagination step.
-        2. Normalized Reward Imaginations: Displays the reward values normalized between 0 and 1.
-        3. Average Normalized Reward Imaginations: Presents the mean and standard deviation of normalized rewards.
-
-        Each visualization is color-coded based on the global step, allowing for easy tracking of how
-        reward predictions evolve over time. The resulting figures are logged to TensorBoard for analysis.
-
-        The visualizations help in understanding:
-        - How reward predictions change across different imagination steps
-        - The consistency of predictions over global steps
-        - The overall trend and variability in the agent's reward predictions
-
-        Note:
-        - The color of each curve represents its corresponding global step.
-        - A colorbar is included in the first two plots to map colors to global steps.
-        - The third plot shows the mean as a blue line and the standard deviation as a shaded area.
-        """
+        """Submits the curve visualizations of reward imaginations to the
+        renderer.
 
-        global_steps = np.array(self.reward_imaginations_global_step_deque)
-        reward_imaginations = np.array(self.reward_imaginations_deque)
-        normalized_reward_imaginations = reward_imaginations - reward_imaginations.min(-1, keepdims=True)
-        normalized_reward_imaginations = normalized_reward_imaginations / (
-            normalized_reward_imaginations.max(-1, keepdims=True) + 1e-8
-        )
-
-        # グラフセットアップ
-        BASE_FIG_WIDTH = 0.6
-        FIG_HEIGHT = 4.8
-        COLOR_MAP = "viridis"
-        FIG_WIDTH = BASE_FIG_WIDTH * len(global_steps)
-
-        cmap = plt.get_cmap(COLOR_MAP)
-        norm = Normalize(vmin=min(global_steps), vmax=max(global_steps))
-        x_indices = np.arange(self.max_imagination_steps) + 1
-
-        def create_figure(title: str, ylabel: str) -> tuple[plt.Figure, plt.Axes]:
-            fig, ax = plt.subplots(figsize=(FIG_WIDTH, FIG_HEIGHT))
-            ax.set_xlabel("Imagination Steps")
-            ax.set_ylabel(ylabel)
-            ax.set_title(title)
-            return fig, ax
-
-        # オリジナルの曲線プロット
-        fig1, ax1 = create_figure("Original Reward Imaginations", "Reward")
-        for i, curve in enumerate(reward_imaginations):
-            color = cmap(norm(global_steps[i]))
-            ax1.plot(x_indices, curve, color=color)
-        fig1.colorbar(ScalarMappable(cmap=cmap, norm=norm), ax=ax1, label="Global Steps", pad=0.1)
-        self.logger.tensorboard.add_figure("agent/multistep-reward-imaginations-curves", fig1, self.global_step)
-
-        # 正規化された曲線プロット
-        fig2, ax2 = create_figure("Normalized Reward Imaginations", "Normalized Reward")
-        for i, curve in enumerate(normalized_reward_imaginations):
-            color = cmap(norm(global_steps[i]))
-            ax2.plot(x_indices, curve, color=color)
-            ax2.set_ylim(top=1.0)
-        fig2.colorbar(ScalarMappable(cmap=cmap, norm=norm), ax=ax2, label="Global Steps", pad=0.1)
-        self.logger.tensorboard.add_figure(
-            "agent/multistep-reward-imaginations-curves (normalized)", fig2, self.global_step
-        )
-
-        # 平均化された正規化曲線プロット
-        fig3, ax3 = create_figure("Average Normalized Reward Imaginations", "Normalized Reward")
-        mean_normalized_curve = np.mean(normalized_reward_imaginations, axis=0)
-        std_normalized_curve = np.std(normalized_reward_imaginations, axis=0)
-
-        ax3.plot(x_indices, mean_normalized_curve, color="blue", label="Mean")
-        ax3.fill_between(
-            x_indices,
-            mean_normalized_curve - std_normalized_curve,
-            mean_normalized_curve + std_normalized_curve,
-            color="blue",
-            alpha=0.2,
-            label="Standard Deviation",
-        )
-        ax3.legend()
-        self.logger.tensorboard.add_figure(
-            "agent/multistep-reward-imaginations-curves (normalized & averaged)", fig3, self.global_step
+        The original, normalized and averaged normalized curves across
+        imagination steps are rendered. The color of each curve represents
+        its corresponding global step. See `render_reward_imaginations_curves`.
+        """
+        self.visualization_renderer.submit(
+            self.global_step,
+            render_reward_imaginations_curves,
+            "agent/multistep-reward-imaginations-curves",
+            np.stack(self.reward_imaginations_deque),
+            list(self.reward_imaginations_global_step_deque),
         )
 
     def reconstruction_imaginations_logging_step(
@@ -428,17 +384,13 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
         internal world model.
         """
 
-        reconstructions = torch.stack(list(self.reconstruction_imaginations_deque))  # (H, T, C, H, W)
-        image_size = reconstructions.size()[-2:]
-        ground_truth = torch.stack(list(self.reconstruction_imaginations_ground_truth_deque))  # (H, C, H, W)
-        ground_truth = torchvision.transforms.v2.functional.resize(ground_truth, image_size)
-
-        log_images = torch.cat([ground_truth.unsqueeze(1), reconstructions], dim=1)  # (H, T+1, C, H, W)
-        log_images = log_images.flatten(0, 1)  # # ((H * T+1), C, H, W)
-        log_images = min_max_normalize(log_images.flatten(1), 0, 1, dim=-1).reshape(log_images.shape)
-        grid_image = torchvision.utils.make_grid(log_images, self.max_imagination_steps + 1, normalize=True)
-
-        self.logger.tensorboard.add_image("agent/multistep-imagination-recontructions", grid_image, self.global_step)
+        self.visualization_renderer.submit(
+            self.global_step,
+            render_image_grid,
+            "agent/multistep-imagination-recontructions",
+            torch.stack(list(self.reconstruction_imaginations_ground_truth_deque)).numpy(),  # (H, C, H, W)
+            torch.stack(list(self.reconstruction_imaginations_deque)).numpy(),  # (H, T, C, H, W)
+        )
 
     def prepare_log_imagination_trajectory(self) -> None:
         """Initializes variables for logging imagination trajectories."""
@@ -479,18 +431,12 @@ class MultiStepImaginationCuriosityImageAgent(BaseAgent[Tensor, Tensor]):
     def visualize_imagination_trajectory(self) -> None:
         """Creates and logs a visualization of the imagination trajectory
         compared to ground truth observations."""
-        reconstructions = torch.stack(self.imagination_trajectory_reconstruction).cpu()  # (T, C, H, W)
-        image_size = reconstructions.size()[-2:]
-        ground_truth = torch.stack(self.imagination_trajectory_ground_truth).cpu()
-        ground_truth = torchvision.transforms.v2.functional.resize(ground_truth, image_size)  # (T, C, H, W)
-        row = reconstructions.size(0)
-
-        log_images = torch.cat([reconstructions, ground_truth])  # (2T, C, H ,W)
-        log_images = min_max_normalize(log_images.flatten(1), 0, 1, dim=-1).reshape(log_images.shape)
-        grid_image = torchvision.utils.make_grid(log_images, row, normalize=True)
-
-        self.logger.tensorboard.add_image(
-            "agent/imagination-trajectory (below ground truth)", grid_image, self.global_step
+        self.visualization_renderer.submit(
+            self.global_step,
+            render_image_grid,
+            "agent/imagination-trajectory (below ground truth)",
+            torch.stack(self.imagination_trajectory_ground_truth).cpu().numpy(),  # (T, C, H, W)
+            torch.stack(self.imagination_trajectory_reconstruction).cpu().numpy(),  # (T, C, H, W)
         )
 
 
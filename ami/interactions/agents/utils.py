@@ -1,4 +1,5 @@
-from typing import Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
 
 from torch import Tensor
 from torch.distributions import Distribution
@@ -21,3 +22,43 @@ class PolicyValueCommonProxy:
 
     def __call__(self, *args: Any, **kwds: Any) -> tuple[Distribution, Tensor]:
         return self.policy_net(*args, **kwds), self.value_net(*args, **kwds).sample()
+
+
+class PipelineExecutor:
+    """Runs the deferred part of the agent step in a background thread.
+
+    The agent returns the action as soon as it is sampled, and submits the
+    rest of the step (e.g., the forward dynamics prediction and the data
+    collection) which is only needed by the next step. At most one task is
+    pending, and :meth:`wait` is the barrier at the start of the next step.
+
+    If `enabled` is False, the submitted task runs immediately in the caller
+    thread.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: Future[Any] | None = None
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwds: Any) -> None:
+        """Submits the task after waiting for the pending task."""
+        self.wait()
+        if not self.enabled:
+            fn(*args, **kwds)
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AgentPipeline")
+        self._pending = self._executor.submit(fn, *args, **kwds)
+
+    def wait(self) -> None:
+        """Waits for the pending task, and re-raises its exception."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def shutdown(self) -> None:
+        self.wait()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
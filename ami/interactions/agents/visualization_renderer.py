@@ -0,0 +1,272 @@
+"""Off-thread rendering of the agent's diagnostic visualizations.
+
+The render functions in this module take only NumPy arrays and plain
+python values, and return the rendered images as `(tag, image)` pairs
+(image is HWC). They do not touch the pyplot global state, so they can
+run in worker processes without holding the GIL of the inference
+thread.
+"""
+import multiprocessing as mp
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, TypeAlias
+
+import matplotlib
+import numpy as np
+import numpy.typing as npt
+import seaborn
+import torch
+import torchvision
+import torchvision.transforms.v2.functional
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+
+from ami.logger import get_inference_thread_logger
+from ami.tensorboard_loggers import TensorBoardLogger
+from ami.utils import min_max_normalize
+
+RenderedImages: TypeAlias = list[tuple[str, npt.NDArray[Any]]]
+
+
+def _figure_to_array(fig: Figure) -> npt.NDArray[np.uint8]:
+    """Renders the figure by Agg backend and returns RGB image (HWC)."""
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    return np.asarray(canvas.buffer_rgba())[..., :3].copy()
+
+
+def render_reward_imaginations_heatmap(
+    tag: str, reward_imaginations: npt.NDArray[Any], global_steps: list[int]
+) -> RenderedImages:
+    """Renders the heatmap of reward imaginations.
+
+    Args:
+        tag: The tag for logging.
+        reward_imaginations: shape (history, imaginations).
+        global_steps: The global steps of each history.
+    """
+    BASE_FIG_SIZE = 0.6
+    ADJUST_FIG_WIDTH = 5
+    COLOR_MAP = "plasma"
+
+    history_size, max_imagination_steps = reward_imaginations.shape
+    figsize = (
+        BASE_FIG_SIZE * max_imagination_steps + ADJUST_FIG_WIDTH,
+        BASE_FIG_SIZE * history_size,
+    )
+
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    seaborn.heatmap(
+        data=reward_imaginations[::-1],
+        ax=ax,
+        annot=True,
+        cmap=COLOR_MAP,
+        linewidths=0.5,
+        xticklabels=np.arange(max_imagination_steps) + 1,
+        yticklabels=list(reversed(global_steps)),
+    )
+    ax.set_xlabel("imagination steps")
+    ax.set_ylabel("global steps")
+
+    return [(tag, _figure_to_array(fig))]
+
+
+def render_reward_imaginations_curves(
+    tag: str, reward_imaginations: npt.NDArray[Any], global_steps: list[int]
+) -> RenderedImages:
+    """Renders the original, normalized and averaged normalized curves of
+    reward imaginations.
+
+    Args:
+        tag: The base tag for logging.
+        reward_imaginations: shape (history, imaginations).
+        global_steps: The global steps of each history.
+    """
+    steps = np.array(global_steps)
+    normalized = reward_imaginations - reward_imaginations.min(-1, keepdims=True)
+    normalized = normalized / (normalized.max(-1, keepdims=True) + 1e-8)
+
+    BASE_FIG_WIDTH = 0.6
+    FIG_HEIGHT = 4.8
+    COLOR_MAP = "viridis"
+    FIG_WIDTH = BASE_FIG_WIDTH * len(steps)
+
+    cmap = matplotlib.colormaps[COLOR_MAP]
+    norm = Normalize(vmin=steps.min(), vmax=steps.max())
+    x_indices = np.arange(reward_imaginations.shape[-1]) + 1
+
+    def create_figure(title: str, ylabel: str) -> tuple[Figure, Any]:
+        fig = Figure(figsize=(FIG_WIDTH, FIG_HEIGHT))
+        ax = fig.subplots()
+        ax.set_xlabel("Imagination Steps")
+        ax.set_ylabel(ylabel)
+        ax.set_title(title)
+        return fig, ax
+
+    fig1, ax1 = create_figure("Original Reward Imaginations", "Reward")
+    for step, curve in zip(steps, reward_imaginations):
+        ax1.plot(x_indices, curve, color=cmap(norm(step)))
+    fig1.colorbar(ScalarMappable(cmap=cmap, norm=norm), ax=ax1, label="Global Steps", pad=0.1)
+
+    fig2, ax2 = create_figure("Normalized Reward Imaginations", "Normalized Reward")
+    for step, curve in zip(steps, normalized):
+        ax2.plot(x_indices, curve, color=cmap(norm(step)))
+    ax2.set_ylim(top=1.0)
+    fig2.colorbar(ScalarMappable(cmap=cmap, norm=norm), ax=ax2, label="Global Steps", pad=0.1)
+
+    fig3, ax3 = create_figure("Average Normalized Reward Imaginations", "Normalized Reward")
+    mean_curve = np.mean(normalized, axis=0)
+    std_curve = np.std(normalized, axis=0)
+    ax3.plot(x_indices, mean_curve, color="blue", label="Mean")
+    ax3.fill_between(
+        x_indices,
+        mean_curve - std_curve,
+        mean_curve + std_curve,
+        color="blue",
+        alpha=0.2,
+        label="Standard Deviation",
+    )
+    ax3.legend()
+
+    return [
+        (tag, _figure_to_array(fig1)),
+        (f"{tag} (normalized)", _figure_to_array(fig2)),
+        (f"{tag} (normalized & averaged)", _figure_to_array(fig3)),
+    ]
+
+
+def render_image_grid(tag: str, ground_truth: npt.NDArray[Any], reconstructions: npt.NDArray[Any]) -> RenderedImages:
+    """Renders the grid image of ground truth and reconstructed images.
+
+    Args:
+        tag: The tag for logging.
+        ground_truth: shape (N, C, H, W). Resized to the size of reconstructions.
+        reconstructions: shape (N, T, C, H, W) or (T, C, H, W). If 5 dim, each row of the grid is
+            `[ground_truth[i], *reconstructions[i]]`. Otherwise, the reconstructions row is placed above the
+            ground truth row.
+    """
+    recons = torch.from_numpy(reconstructions).float()
+    truth = torch.from_numpy(ground_truth).float()
+    truth = torchvision.transforms.v2.functional.resize(truth, list(recons.shape[-2:]))
+
+    if recons.ndim == 5:
+        images = torch.cat([truth.unsqueeze(1), recons], dim=1)  # (N, T+1, C, H, W)
+        nrow = images.size(1)
+        images = images.flatten(0, 1)
+    else:
+        images = torch.cat([recons, truth])  # (2T, C, H, W)
+        nrow = recons.size(0)
+
+    images = min_max_normalize(images.flatten(1), 0, 1, dim=-1).reshape(images.shape)
+    grid_image = torchvision.utils.make_grid(images, nrow, normalize=True)
+    return [(tag, grid_image.permute(1, 2, 0).numpy())]
+
+
+def _initialize_render_worker() -> None:
+    matplotlib.use("Agg")
+    torch.set_num_threads(1)
+
+
+def _warm_up_render_worker() -> None:
+    pass
+
+
+class VisualizationRenderer:
+    """Renders the visualizations in a process pool and logs the rendered
+    images to TensorBoard.
+
+    `submit` never blocks the caller: if the number of pending renders
+    reaches `max_pending`, the request is dropped and counted in
+    `dropped_count`.
+    """
+
+    def __init__(
+        self, logger: TensorBoardLogger, num_workers: int = 1, max_pending: int = 2, inline: bool = False
+    ) -> None:
+        """Constructs the renderer.
+
+        Args:
+            logger: The logger whose tensorboard writer receives the rendered images.
+            num_workers: The number of render worker processes.
+            max_pending: The max number of renders submitted but not finished.
+            inline: If True, renders in the caller thread (for debugging).
+        """
+        self.tensorboard_logger = logger
+        self.num_workers = num_workers
+        self.max_pending = max_pending
+        self.inline = inline
+
+        self._logger = get_inference_thread_logger(self.__class__.__name__)
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._num_pending = 0
+        self.dropped_count = 0
+
+    def start(self) -> None:
+        """Spawns the worker processes.
+
+        Call this in the setup (e.g., `BaseAgent.setup`), otherwise the
+        first `submit` stalls the caller while spawning them.
+        """
+        if self.inline or self._executor is not None:
+            return
+        # The workers are spawned in order not to fork the CUDA context and threads.
+        self._executor = ProcessPoolExecutor(
+            self.num_workers, mp_context=mp.get_context("spawn"), initializer=_initialize_render_worker
+        )
+        for _ in range(self.num_workers):
+            self._executor.submit(_warm_up_render_worker)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._logger.warning("The render workers are spawned at the first submit. Call `start` in the setup.")
+            self.start()
+        assert self._executor is not None
+        return self._executor
+
+    def submit(self, global_step: int, render_fn: Callable[..., RenderedImages], *args: Any) -> bool:
+        """Submits the render function and its NumPy snapshot arguments.
+
+        Args:
+            global_step: The global step for logging the rendered images.
+            render_fn: The module level render function.
+            *args: Arguments for `render_fn`. Must be picklable and must not be modified after submitting.
+
+        Returns:
+            bool: Whether the render has been accepted.
+        """
+        if self.inline:
+            self._log_images(render_fn(*args), global_step)
+            return True
+
+        with self._lock:
+            if self._num_pending >= self.max_pending:
+                self.dropped_count += 1
+                return False
+            self._num_pending += 1
+
+        future = self._get_executor().submit(render_fn, *args)
+        future.add_done_callback(lambda f: self._on_done(f, global_step))
+        return True
+
+    def _on_done(self, future: Future[RenderedImages], global_step: int) -> None:
+        with self._lock:
+            self._num_pending -= 1
+        if future.cancelled():
+            return
+        if (e := future.exception()) is not None:
+            self._logger.error(f"Failed to render the visualization: {e!r}")
+            return
+        self._log_images(future.result(), global_step)
+
+    def _log_images(self, images: RenderedImages, global_step: int) -> None:
+        for tag, image in images:
+            self.tensorboard_logger.tensorboard.add_image(tag, image, global_step, dataformats="HWC")
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
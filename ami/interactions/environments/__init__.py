@@ -1,2 +1,9 @@
 """This file contains import statements."""
-from . import actuators, base_environment, sensor_actuator_env, sensors
+from . import (
+    actuators,
+    base_environment,
+    sensor_actuator_env,
+    sensors,
+    subprocess_environment,
+    vectorized_environment,
+)
@@ -1,10 +1,14 @@
+import time
 from datetime import datetime
 from enum import Enum, auto
 from pathlib import Path
 from queue import Queue
 from threading import Thread
+from typing import Any
 
 import h5py
+import numpy as np
+import numpy.typing as npt
 import torch
 from torch import Tensor
 from typing_extensions import override
@@ -21,12 +25,26 @@ class ControlCommands(Enum):
     FLUSH = auto()
 
 
+class StorageModes(str, Enum):
+    """Enumerates how the batches are stored in the HDF5 file."""
+
+    BATCHES = "batches"  # Creates a dataset per flushed batch, named by the written time.
+    APPEND = "append"  # Appends to a single resizable dataset with the parallel timestamp dataset.
+
+
 class TensorActionHDF5Recorder(BaseActuatorWrapper[Tensor, Tensor]):
     """Records tensor actions to an HDF5 file.
 
     This class wraps a BaseActuator and records its actions (which are
     tensors) into an HDF5 file. Actions are queued and written to the
     file in batches to optimize performance and reduce I/O operations.
+
+    In the `append` storage mode, the actions are appended to a single
+    resizable chunked dataset `dataset_name`, and their recorded unix times are
+    appended to `timestamp_dataset_name` in parallel. With `swmr=True`, the
+    file is written in the SWMR (single writer multiple reader) mode, so
+    analysis tools can read it while recording (e.g.,
+    `h5py.File(path, "r", libver="latest", swmr=True)`).
     """
 
     @override
@@ -38,6 +56,13 @@ class TensorActionHDF5Recorder(BaseActuatorWrapper[Tensor, Tensor]):
         batch_name_format: str = "written_time.%Y-%m-%d_%H-%M-%S.%f",
         recording_dtype: torch.dtype | None = None,
         recording_shape: tuple[int, ...] | None = None,
+        storage_mode: str | StorageModes = StorageModes.BATCHES,
+        dataset_name: str = "actions",
+        timestamp_dataset_name: str = "timestamps",
+        chunk_size: int | None = None,
+        compression: str | None = None,
+        compression_opts: Any = None,
+        swmr: bool = False,
     ) -> None:
         """Initializes the TensorActionHDF5Recorder.
 
@@ -48,6 +73,13 @@ class TensorActionHDF5Recorder(BaseActuatorWrapper[Tensor, Tensor]):
             batch_name_format: Format string for naming batches in the HDF5 file.
             recording_dtype: Data type to convert tensors before recording.
             recording_shape: Shape to reshape tensors before recording.
+            storage_mode: `batches` or `append`.
+            dataset_name: The name of the action dataset in the `append` mode.
+            timestamp_dataset_name: The name of the timestamp dataset in the `append` mode.
+            chunk_size: The number of actions per HDF5 chunk in the `append` mode. If None, `flush_batch_size`.
+            compression: The compression filter of the datasets in the `append` mode. e.g., "lzf", "gzip".
+            compression_opts: The options of the compression filter. e.g., gzip level.
+            swmr: Whether to write in the SWMR mode. Requires the `append` mode.
         """
         super().__init__(actuator)
         self._logger = get_inference_thread_logger(self.__class__.__name__)
@@ -56,9 +88,19 @@ class TensorActionHDF5Recorder(BaseActuatorWrapper[Tensor, Tensor]):
         self._batch_name_format = batch_name_format
         self._recording_dtype = recording_dtype
         self._recording_shape = recording_shape
+        self._storage_mode = StorageModes(storage_mode)
+        self._dataset_name = dataset_name
+        self._timestamp_dataset_name = timestamp_dataset_name
+        self._chunk_size = flush_batch_size if chunk_size is None else chunk_size
+        self._compression = compression
+        self._compression_opts = compression_opts
+        self._swmr = swmr
+        if swmr and self._storage_mode != StorageModes.APPEND:
+            raise ValueError("The SWMR mode requires the `append` storage mode.")
 
         self._current_batch: list[Tensor] = []
-        self._data_or_command_queue: Queue[Tensor | ControlCommands] = Queue()
+        self._current_timestamps: list[float] = []
+        self._data_or_command_queue: Queue[tuple[float, Tensor] | ControlCommands] = Queue()
 
     def writer(self) -> None:
         """Writer thread function.
@@ -69,15 +111,17 @@ class TensorActionHDF5Recorder(BaseActuatorWrapper[Tensor, Tensor]):
         """
         running = True
         self._logger.info(f"Saving actions to '{self._file_path}'")
-        with h5py.File(self._file_path, "a") as file_writer:
+        file_kwds = {"libver": "latest"} if self._swmr else {}
+        with h5py.File(self._file_path, "a", **file_kwds) as file_writer:
             while running:
                 match value := self._data_or_command_queue.get():
                     case ControlCommands.TEARDOWN:
                         running = False
                     case ControlCommands.FLUSH:
                         self.flush_batch(file_writer)
-                    case Tensor():
-                        self._current_batch.append(value)
+                    case (float() as timestamp, Tensor() as action):
+                        self._current_batch.append(action)
+                        self._current_timestamps.append(timestamp)
                         if len(self._current_batch) % self._flush_batch_size == 0:
                             self.flush_batch(file_writer)
 
@@ -91,12 +135,61 @@ class TensorActionHDF5Recorder(BaseActuatorWrapper[Tensor, Tensor]):
         """
         if len(self._current_batch) == 0:
             return
-        self._logger.info(f"Flushing batch, data size: {len(self._current_batch)}")
+        self._logger.debug(f"Flushing batch, data size: {len(self._current_batch)}")
 
         batch = torch.stack(self._current_batch).numpy()
-        batch_name = datetime.now().strftime(self._batch_name_format)
-        file_writer.create_dataset(batch_name, data=batch)
+        if self._storage_mode == StorageModes.APPEND:
+            timestamps = np.asarray(self._current_timestamps, dtype=np.float64)
+            for dataset, data in zip(self._require_append_datasets(file_writer, batch), (batch, timestamps)):
+                size = dataset.shape[0]
+                dataset.resize(size + len(data), axis=0)
+                dataset[size:] = data
+                if self._swmr:
+                    dataset.flush()  # Makes the appended data visible to the readers.
+        else:
+            batch_name = datetime.now().strftime(self._batch_name_format)
+            file_writer.create_dataset(batch_name, data=batch)
         self._current_batch.clear()
+        self._current_timestamps.clear()
+
+    def _require_append_datasets(
+        self, file_writer: h5py.File, batch: npt.NDArray[Any]
+    ) -> tuple[h5py.Dataset, h5py.Dataset]:
+        """Returns the action and timestamp datasets of the `append` mode.
+
+        The datasets are created at the first flush, or reused if they
+        exist in the file.
+        """
+        if self._dataset_name in file_writer:
+            dataset = file_writer[self._dataset_name]
+            timestamp_dataset = file_writer[self._timestamp_dataset_name]
+            if dataset.shape[1:] != batch.shape[1:] or dataset.dtype != batch.dtype:
+                raise ValueError(
+                    f"The existing dataset {self._dataset_name!r} has the shape {dataset.shape} and dtype "
+                    f"{dataset.dtype}, but the action has the shape {batch.shape[1:]} and dtype {batch.dtype}."
+                )
+        else:
+            filter_kwds = {"compression": self._compression, "compression_opts": self._compression_opts}
+            dataset = file_writer.create_dataset(
+                self._dataset_name,
+                shape=(0, *batch.shape[1:]),
+                maxshape=(None, *batch.shape[1:]),
+                dtype=batch.dtype,
+                chunks=(self._chunk_size, *batch.shape[1:]),
+                **filter_kwds,
+            )
+            timestamp_dataset = file_writer.create_dataset(
+                self._timestamp_dataset_name,
+                shape=(0,),
+                maxshape=(None,),
+                dtype=np.float64,
+                chunks=(self._chunk_size,),
+                **filter_kwds,
+            )
+        if self._swmr and not file_writer.swmr_mode:
+            # No datasets can be created after enabling the SWMR mode.
+            file_writer.swmr_mode = True
+        return dataset, timestamp_dataset
 
     @override
     def wrap_action(self, action: Tensor) -> Tensor:
@@ -115,7 +208,7 @@ class TensorActionHDF5Recorder(BaseActuatorWrapper[Tensor, Tensor]):
             put_action = put_action.type(self._recording_dtype)
         if self._recording_shape is not None:
             put_action = put_action.view(self._recording_shape)
-        self._data_or_command_queue.put(put_action)
+        self._data_or_command_queue.put((time.time(), put_action))
         return action
 
     @override
@@ -1,6 +1,12 @@
 import copy
+from pathlib import Path
 from typing import Any, Callable, Generic
 
+import torch
+from torch import Tensor
+
+from ami.checkpointing import SaveAndLoadStateMixin
+
 from .._types import ActType, ObsType
 from .base_environment import BaseEnvironment
 
@@ -36,6 +42,20 @@ class DummyEnvironment(BaseEnvironment[ObsType, ActType], Generic[ObsType, ActTy
     def affect(self, action: ActType) -> None:
         self.action_checker(action)
 
+    def teardown(self) -> None:
+        # Stops the background work of the generator (e.g., prefetching video frames).
+        close = getattr(self.observation_generator, "close", None)
+        if callable(close):
+            close()
+
+    def save_state(self, path: Path) -> None:
+        if isinstance(self.observation_generator, SaveAndLoadStateMixin):
+            self.observation_generator.save_state(path)
+
+    def load_state(self, path: Path) -> None:
+        if isinstance(self.observation_generator, SaveAndLoadStateMixin):
+            self.observation_generator.load_state(path)
+
 
 class SameObservationGenerator(Generic[ObsType]):
     """Generates a consistent observation on each call."""
@@ -80,3 +100,34 @@ class ActionTypeChecker(Generic[ActType]):
         """
         if not isinstance(action, self.action_type):
             raise ValueError(f"Unexpected action type: {type(action)}, expected: {self.action_type}")
+
+
+class StepCounterEnvironment(BaseEnvironment[Tensor, Tensor | None]):
+    """Lightweight CPU environment for verifying the environment transports
+    (e.g., `SubprocessEnvironment`, `VectorizedEnvironment`).
+
+    The observation is filled with the number of `affect` calls, and the
+    last action is kept in `last_action`. The counter is saved and loaded
+    as the state.
+    """
+
+    def __init__(self, observation_shape: tuple[int, ...] = (3, 84, 84), dtype: torch.dtype = torch.float32) -> None:
+        super().__init__()
+        self.observation_shape = tuple(observation_shape)
+        self.dtype = dtype
+        self.step_count = 0
+        self.last_action: Tensor | None = None
+
+    def observe(self) -> Tensor:
+        return torch.full(self.observation_shape, self.step_count, dtype=self.dtype)
+
+    def affect(self, action: Tensor | None) -> None:
+        self.last_action = action
+        self.step_count += 1
+
+    def save_state(self, path: Path) -> None:
+        path.mkdir()
+        (path / "step_count.txt").write_text(str(self.step_count))
+
+    def load_state(self, path: Path) -> None:
+        self.step_count = int((path / "step_count.txt").read_text())
@@ -1 +1 @@
-from . import base_sensor, opencv_image_sensor
+from . import background_capture_sensor, base_sensor, opencv_image_sensor
@@ -0,0 +1,160 @@
+"""This file contains the sensor wrapper which reads the wrapped sensor in a
+background thread."""
+import threading
+import time
+from typing import Any
+
+import torch
+from typing_extensions import override
+
+from ami.logger import get_inference_thread_logger
+
+from .base_sensor import BaseSensor, BaseSensorWrapper
+
+
+class BackgroundCaptureSensorWrapper(BaseSensorWrapper[torch.Tensor, torch.Tensor]):
+    """Reads the wrapped sensor continuously in a background thread.
+
+    The capture and preprocessing of the wrapped sensor (e.g., `OpenCVImageSensor`)
+    overlap with the model inference, and :meth:`read` only returns the latest
+    frame (latest-frame-wins). The frames are written into the preallocated
+    double buffer, so no tensor is allocated per capture.
+
+    The frames captured but not read before the next capture are counted in
+    `overwritten_count`. The capture time of the latest read frame is
+    `latest_timestamp` (`time.perf_counter`).
+    """
+
+    def __init__(
+        self,
+        sensor: BaseSensor[torch.Tensor],
+        first_frame_timeout: float = 10.0,
+        clone_on_read: bool = True,
+        capture_interval: float = 0.0,
+    ) -> None:
+        """Constructs the wrapper.
+
+        Args:
+            sensor: The sensor read in the background thread.
+            first_frame_timeout: The timeout for waiting the first frame in :meth:`read`.
+            clone_on_read: Whether to return a copy of the frame. If False, the returned tensor is
+                overwritten by the capture thread after the next capture, so it must be consumed in the step.
+            capture_interval: The minimum seconds between captures. 0 means capturing as fast as the sensor.
+        """
+        super().__init__(sensor)
+        self.first_frame_timeout = first_frame_timeout
+        self.clone_on_read = clone_on_read
+        self.capture_interval = capture_interval
+
+        self._logger = get_inference_thread_logger(self.__class__.__name__)
+        self._buffers: list[torch.Tensor] = []
+        self._latest_index = -1
+        self._latest_timestamp = -1.0
+        self._latest_frame_id = -1
+        self._read_frame_id = -1
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._resumed_event = threading.Event()
+        self._resumed_event.set()
+        self._exception: BaseException | None = None
+        self._thread: threading.Thread | None = None
+
+        self.captured_count = 0
+        self.overwritten_count = 0
+        self.latest_timestamp = -1.0
+
+    @override
+    def wrap_observation(self, observation: torch.Tensor) -> torch.Tensor:
+        return observation
+
+    @override
+    def setup(self) -> None:
+        super().setup()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._capture_loop, name="BackgroundCapture", daemon=True)
+        self._thread.start()
+
+    def _capture_loop(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                if not self._resumed_event.wait(0.1):
+                    continue
+                start = time.perf_counter()
+                frame = self._sensor.read()
+                timestamp = time.perf_counter()
+                self._store(frame, timestamp)
+                if (remaining := self.capture_interval - (time.perf_counter() - start)) > 0:
+                    self._stop_event.wait(remaining)
+        except Exception as e:
+            self._logger.exception("An exception occurred in the capture thread.")
+            with self._condition:
+                self._exception = e
+                self._condition.notify_all()
+
+    def _store(self, frame: torch.Tensor, timestamp: float) -> None:
+        if len(self._buffers) == 0:
+            self._buffers = [torch.empty_like(frame), torch.empty_like(frame)]
+
+        # The buffer not published as the latest is written without the lock.
+        write_index = 1 - self._latest_index if self._latest_index >= 0 else 0
+        self._buffers[write_index].copy_(frame)
+
+        with self._condition:
+            if self._latest_frame_id > self._read_frame_id:
+                self.overwritten_count += 1
+            self._latest_index = write_index
+            self._latest_timestamp = timestamp
+            self._latest_frame_id += 1
+            self.captured_count += 1
+            self._condition.notify_all()
+
+    @override
+    def read(self) -> torch.Tensor:
+        """Returns the latest captured frame.
+
+        Blocks only until the first frame is captured.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: self._latest_index >= 0 or self._exception is not None, self.first_frame_timeout
+            ):
+                raise TimeoutError(f"No frame is captured in {self.first_frame_timeout} seconds.")
+            if self._exception is not None:
+                raise RuntimeError("The capture thread has stopped.") from self._exception
+
+            frame = self._buffers[self._latest_index]
+            if self.clone_on_read:
+                frame = frame.clone()
+            self._read_frame_id = self._latest_frame_id
+            self.latest_timestamp = self._latest_timestamp
+        return frame
+
+    @property
+    def latest_frame_age(self) -> float:
+        """The seconds since the capture of the latest read frame."""
+        return time.perf_counter() - self.latest_timestamp
+
+    @override
+    def teardown(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        super().teardown()
+
+    @override
+    def on_paused(self) -> None:
+        self._resumed_event.clear()
+        super().on_paused()
+
+    @override
+    def on_resumed(self) -> None:
+        super().on_resumed()
+        self._resumed_event.set()
+
+    def statistics(self) -> dict[str, Any]:
+        return {
+            "captured_count": self.captured_count,
+            "overwritten_count": self.overwritten_count,
+            "latest_frame_age": self.latest_frame_age,
+        }
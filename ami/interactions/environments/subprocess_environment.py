@@ -0,0 +1,279 @@
+"""This file contains the environment wrapper which runs the environment in a
+child process."""
+import logging
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from torch import Tensor
+from typing_extensions import override
+
+from ami.logger import get_inference_thread_logger
+
+from .base_environment import BaseEnvironment
+
+
+class _Commands:
+    SETUP = "setup"
+    OBSERVE = "observe"
+    AFFECT = "affect"
+    TEARDOWN = "teardown"
+    SAVE = "save"
+    LOAD = "load"
+    PAUSE = "pause"
+    RESUME = "resume"
+
+
+class _Responses:
+    OK = "ok"
+    ERROR = "error"
+
+
+class SubprocessEnvironment(BaseEnvironment[Tensor, Tensor | None]):
+    """Runs the environment in a spawned child process.
+
+    The python work of the environment (e.g., ML-Agents communication of
+    `UnityEnvironment`) is moved off the GIL of the inference thread.
+
+    Transport:
+        - Observations: The child process writes each observation into a ring of
+            `ring_size` slots in the shared memory, and the parent maps the slot as a
+            tensor without copying.
+        - Actions and commands: Sent over the pipe. The actions are sent as NumPy arrays.
+            `affect` does not wait for the child process, and its error is raised at the
+            next call.
+
+    If the child process does not respond in `timeout`, it is terminated, because the
+    later responses can no longer be matched with the commands.
+
+    The observation must be a tensor of fixed shape and dtype.
+    """
+
+    def __init__(
+        self,
+        environment_factory: Callable[[], BaseEnvironment[Tensor, Any]],
+        ring_size: int = 4,
+        clone_observation: bool = True,
+        timeout: float | None = 600.0,
+    ) -> None:
+        """Constructs the wrapper.
+
+        Args:
+            environment_factory: The picklable callable which creates the environment in the child process.
+                e.g., hydra config with `_partial_: true`.
+            ring_size: The number of observation slots in the shared memory.
+            clone_observation: Whether to return a copy of the observation. If False, the returned tensor is a
+                view of the shared memory, and it is overwritten after `ring_size` observations.
+            timeout: The timeout for waiting the response of the child process.
+        """
+        super().__init__()
+        assert ring_size > 0
+        self.environment_factory = environment_factory
+        self.ring_size = ring_size
+        self.clone_observation = clone_observation
+        self.timeout = timeout
+
+        self._logger = get_inference_thread_logger(self.__class__.__name__)
+        self._context = mp.get_context("spawn")
+        self._connection: Connection | None = None
+        self._process: Any = None
+        self._observation_ring: Tensor | None = None
+        self._num_pending_affects = 0
+
+    @property
+    def observation_ring(self) -> Tensor:
+        if self._observation_ring is None:
+            raise RuntimeError("The environment has not been set up.")
+        return self._observation_ring
+
+    def _send(self, *command: Any) -> None:
+        if self._connection is None:
+            raise RuntimeError("The environment process is not running.")
+        self._connection.send(command)
+
+    def _receive(self) -> Any:
+        if self._connection is None:
+            raise RuntimeError("The environment process is not running.")
+        if not self._connection.poll(self.timeout):
+            self._terminate_process()
+            raise TimeoutError(f"The environment process did not respond in {self.timeout} seconds.")
+        response = self._connection.recv()
+        if response[0] == _Responses.ERROR:
+            raise RuntimeError(f"An error occurred in the environment process: {response[1]}")
+        return response[1]
+
+    def _request(self, *command: Any) -> Any:
+        """Sends the command and waits for its response.
+
+        The responses of the pending `affect` and the command are always
+        received before raising an error, so the later responses are not
+        shifted.
+        """
+        self._send(*command)
+        affect_error = self._receive_pending_affects()
+        result = self._receive()
+        if affect_error is not None:
+            raise affect_error
+        return result
+
+    def _receive_pending_affects(self) -> RuntimeError | None:
+        """Receives all responses of the pending `affect`, and returns the
+        first error of them."""
+        error = None
+        while self._num_pending_affects > 0:
+            self._num_pending_affects -= 1
+            try:
+                self._receive()
+            except RuntimeError as e:
+                if self._connection is None:  # The process is not running.
+                    raise
+                error = error or e
+        return error
+
+    def _terminate_process(self) -> None:
+        self._logger.error("Terminating the environment process...")
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+        if self._connection is not None:
+            self._connection.close()
+        self._process = None
+        self._connection = None
+        self._observation_ring = None
+        self._num_pending_affects = 0
+
+    @override
+    def setup(self) -> None:
+        parent_connection, child_connection = self._context.Pipe()
+        self._connection = parent_connection
+        self._process = self._context.Process(
+            target=_environment_process_main,
+            args=(self.environment_factory, child_connection, self.ring_size, logging.getLogger().level),
+            daemon=True,
+        )
+        self._process.start()
+        child_connection.close()
+        self._observation_ring = self._request(_Commands.SETUP)
+
+    @override
+    def observe(self) -> Tensor:
+        slot = self._request(_Commands.OBSERVE)
+        observation = self.observation_ring[slot]
+        if self.clone_observation:
+            observation = observation.clone()
+        return observation
+
+    @override
+    def affect(self, action: Tensor | None) -> None:
+        if (error := self._receive_pending_affects()) is not None:
+            raise error
+        self._send(_Commands.AFFECT, None if action is None else action.detach().cpu().numpy())
+        self._num_pending_affects += 1
+
+    @override
+    def teardown(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._request(_Commands.TEARDOWN)
+        finally:
+            if self._process is not None:  # Not terminated by the timeout.
+                self._process.join(self.timeout)
+                if self._process.is_alive():
+                    self._logger.error("The environment process did not exit. Terminating...")
+                    self._process.terminate()
+            if self._connection is not None:
+                self._connection.close()
+            self._process = None
+            self._connection = None
+            self._observation_ring = None
+
+    @override
+    def save_state(self, path: Path) -> None:
+        self._request(_Commands.SAVE, str(path))
+
+    @override
+    def load_state(self, path: Path) -> None:
+        self._request(_Commands.LOAD, str(path))
+
+    @override
+    def on_paused(self) -> None:
+        self._request(_Commands.PAUSE)
+
+    @override
+    def on_resumed(self) -> None:
+        self._request(_Commands.RESUME)
+
+
+def _environment_process_main(
+    environment_factory: Callable[[], BaseEnvironment[Tensor, Any]],
+    connection: Connection,
+    ring_size: int,
+    log_level: int,
+) -> None:
+    """The entry point of the environment process."""
+    logging.basicConfig(level=log_level, format="[%(asctime)s][%(name)s][%(levelname)s] - %(message)s")
+    logger = logging.getLogger("environment_process")
+
+    environment: BaseEnvironment[Tensor, Any] | None = None
+    ring: Tensor | None = None
+    slot = -1
+    # The first observation is used for allocating the ring, and returned at the first `observe`.
+    first_observation: Tensor | None = None
+
+    while True:
+        try:
+            command = connection.recv()
+        except EOFError:  # The parent process has exited.
+            break
+
+        try:
+            result: Any = None
+            match command:
+                case (_Commands.SETUP,):
+                    environment = environment_factory()
+                    environment.setup()
+                    first_observation = environment.observe()
+                    ring = torch.empty((ring_size, *first_observation.shape), dtype=first_observation.dtype)
+                    ring.share_memory_()
+                    result = ring
+                case (_Commands.OBSERVE,):
+                    assert environment is not None and ring is not None
+                    if first_observation is not None:
+                        observation, first_observation = first_observation, None
+                    else:
+                        observation = environment.observe()
+                    slot = (slot + 1) % ring_size
+                    ring[slot].copy_(observation)
+                    result = slot
+                case (_Commands.AFFECT, action):
+                    assert environment is not None
+                    environment.affect(None if action is None else torch.from_numpy(np.asarray(action)))
+                case (_Commands.TEARDOWN,):
+                    if environment is not None:
+                        environment.teardown()
+                    connection.send((_Responses.OK, None))
+                    break
+                case (_Commands.SAVE, path):
+                    assert environment is not None
+                    environment.save_state(Path(path))
+                case (_Commands.LOAD, path):
+                    assert environment is not None
+                    environment.load_state(Path(path))
+                case (_Commands.PAUSE,):
+                    assert environment is not None
+                    environment.on_paused()
+                case (_Commands.RESUME,):
+                    assert environment is not None
+                    environment.on_resumed()
+                case _:
+                    raise ValueError(f"Unknown command: {command!r}")
+            connection.send((_Responses.OK, result))
+        except Exception as e:
+            logger.exception(f"Failed to process the command {command[0]!r}.")
+            connection.send((_Responses.ERROR, repr(e)))
+
+    connection.close()
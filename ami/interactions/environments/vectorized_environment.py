@@ -0,0 +1,134 @@
+"""This file contains the environment class which steps multiple
+environments as a batch."""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+import torch
+from torch import Tensor
+from typing_extensions import override
+
+from .base_environment import BaseEnvironment
+
+T = TypeVar("T")
+
+
+class VectorizedEnvironment(BaseEnvironment[Tensor, Tensor | None]):
+    """Steps N environments as a single environment whose observation and
+    action are batched along the first dimension.
+
+    The environments are observed and affected concurrently in a thread
+    pool, so the I/O and the GIL releasing work (e.g., video decoding,
+    socket communication with Unity) overlap. Wrap each environment with
+    `SubprocessEnvironment` if its python work is heavy.
+
+    Use with the batched agent (e.g., `ImageCollectingAgent(batched=True)`)
+    which collects the data by `DataCollectorsDict.collect_batch`.
+    """
+
+    def __init__(
+        self,
+        environments: list[BaseEnvironment[Tensor, Any]] | None = None,
+        num_workers: int | None = None,
+        environment_factory: Callable[[], BaseEnvironment[Tensor, Any]] | None = None,
+        num_environments: int | None = None,
+    ) -> None:
+        """Constructs the vectorized environment.
+
+        Specify either `environments`, or `environment_factory` and `num_environments`.
+
+        Args:
+            environments: The environments observing the tensors of the same shape.
+            num_workers: The number of threads for stepping the environments. If None, the number of environments.
+                If 1, the environments are stepped sequentially in the caller thread.
+            environment_factory: The callable which creates each environment. e.g., hydra config with
+                `_partial_: true`.
+            num_environments: The number of environments created by `environment_factory`.
+        """
+        if environment_factory is not None:
+            if environments is not None:
+                raise ValueError("Specify either `environments` or `environment_factory`, not both.")
+            if num_environments is None:
+                raise ValueError("`num_environments` is required with `environment_factory`.")
+            environments = [environment_factory() for _ in range(num_environments)]
+        if environments is None:
+            raise ValueError("Specify `environments` or `environment_factory`.")
+        assert len(environments) > 0
+        self.environments = environments
+        self.num_workers = len(environments) if num_workers is None else num_workers
+        self._executor: ThreadPoolExecutor | None = None
+
+    @property
+    def num_environments(self) -> int:
+        return len(self.environments)
+
+    def _map(self, fn: Callable[..., T], *iterables: Any) -> list[T]:
+        if self._executor is None:
+            return list(map(fn, self.environments, *iterables))
+        return list(self._executor.map(fn, self.environments, *iterables))
+
+    @override
+    def setup(self) -> None:
+        if self.num_workers > 1:
+            self._executor = ThreadPoolExecutor(self.num_workers, thread_name_prefix="VectorizedEnvironment")
+        self._map(_setup)
+
+    @override
+    def observe(self) -> Tensor:
+        """Returns the stacked observations, shape (N, *)."""
+        return torch.stack(self._map(_observe))
+
+    @override
+    def affect(self, action: Tensor | None) -> None:
+        """Affects each action of the batch, shape (N, *), to the
+        environments."""
+        if action is None:
+            self._map(_affect, [None] * self.num_environments)
+            return
+        if len(action) != self.num_environments:
+            raise ValueError(f"The batch size of action ({len(action)}) must be {self.num_environments}.")
+        self._map(_affect, action.unbind(0))
+
+    @override
+    def teardown(self) -> None:
+        self._map(_teardown)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    @override
+    def save_state(self, path: Path) -> None:
+        path.mkdir()
+        for i, env in enumerate(self.environments):
+            env.save_state(path / str(i))
+
+    @override
+    def load_state(self, path: Path) -> None:
+        for i, env in enumerate(self.environments):
+            env.load_state(path / str(i))
+
+    @override
+    def on_paused(self) -> None:
+        for env in self.environments:
+            env.on_paused()
+
+    @override
+    def on_resumed(self) -> None:
+        for env in self.environments:
+            env.on_resumed()
+
+
+def _setup(environment: BaseEnvironment[Tensor, Any]) -> None:
+    environment.setup()
+
+
+def _observe(environment: BaseEnvironment[Tensor, Any]) -> Tensor:
+    return environment.observe()
+
+
+def _affect(environment: BaseEnvironment[Tensor, Any], action: Tensor | None) -> None:
+    environment.affect(action)
+
+
+def _teardown(environment: BaseEnvironment[Tensor, Any]) -> None:
+    environment.teardown()
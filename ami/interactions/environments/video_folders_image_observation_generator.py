@@ -1,9 +1,27 @@
+import bisect
+import itertools
+import json
+import queue
+import threading
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Iterator
 
 import cv2
+import numpy as np
+import numpy.typing as npt
 import torch
-from torchvision.transforms import v2
+
+from ami.checkpointing import SaveAndLoadStateMixin
+from ami.logger import get_inference_thread_logger
+
+try:
+    import av
+except ImportError:
+    av = None
+
+FRAME_COUNT_INDEX_FILE_NAME = ".frame_counts.json"
+# The maximum number of frames decoded forward instead of seeking when the keyframes are unknown.
+MAX_FORWARD_GRAB_FRAMES = 30
 
 
 class FolderAsVideo:
@@ -18,6 +36,10 @@ class FolderAsVideo:
         start_frame: int = 0,
         max_frames: int | None = None,
         normalize: bool = True,
+        frame_size: tuple[int, int] | None = None,
+        hw_acceleration: bool = False,
+        use_frame_count_index: bool = True,
+        index_entries: list[dict[str, Any]] | None = None,
     ) -> None:
         """Initialize the FolderAsVideo object.
 
@@ -28,6 +50,15 @@ class FolderAsVideo:
             start_frame (int): The frame number to start reading from.
             max_frames (int | None): Maximum number of frames to read. If None, read all available frames.
             normalize (bool): Whether to normalize the value range to [0,1].
+            frame_size (tuple[int, int] | None): The size (height, width) for resizing the frames.
+                The frames are resized in uint8 before the float conversion. If None, not resized.
+            hw_acceleration (bool): Whether to request the hardware accelerated decoding to OpenCV.
+                Ignored if OpenCV does not support it.
+            use_frame_count_index (bool): Whether to cache the frame counts and keyframes of the video files in the
+                sidecar index file (`.frame_counts.json`) of the folder, instead of opening all files on every
+                construction. The keyframes are indexed only if PyAV is installed.
+            index_entries (list[dict[str, Any]] | None): The `index_entries` of the other `FolderAsVideo` of the
+                same folder. If given, the index is not loaded (e.g., for the worker processes).
 
         Raises:
             ValueError: If start_frame is greater than or equal to total frames,
@@ -37,9 +68,23 @@ class FolderAsVideo:
         self.extensions = extensions
         self.start_frame = start_frame
         self.normalize = normalize
+        self.frame_size = frame_size
+        self.hw_acceleration = hw_acceleration
+        self.use_frame_count_index = use_frame_count_index
+        self._logger = get_inference_thread_logger(self.__class__.__name__)
 
         self.video_files = self._get_video_files(sort_by_name)
-        self.total_frames = self._count_total_frames()
+        if index_entries is None:
+            index_entries = self._load_index()
+        elif len(index_entries) != len(self.video_files):
+            raise ValueError("`index_entries` does not match the video files in the folder.")
+        # The frame count and keyframes of each video file.
+        self.index_entries = index_entries
+        self.frame_counts: list[int] = [entry["frames"] for entry in index_entries]
+        self.keyframes: list[list[int] | None] = [entry["keyframes"] for entry in index_entries]
+        # The global frame number of the first frame of each video file. The last item is the total frames.
+        self.frame_offsets = [0, *itertools.accumulate(self.frame_counts)]
+        self.total_frames = self.frame_offsets[-1]
 
         if self.start_frame >= self.total_frames:
             raise ValueError(f"start_frame ({self.start_frame}) must be less than total frames ({self.total_frames})")
@@ -55,7 +100,9 @@ class FolderAsVideo:
 
         self.current_video_index = 0
         self.current_frame = 0
-        self.current_video: cv2.VideoCapture
+        self.current_video = cv2.VideoCapture()
+        # The capture for `__getitem__`: (video index, next frame in the video, capture).
+        self._random_access_video: tuple[int, int, cv2.VideoCapture] | None = None
         self._initialize_video()
 
     def _get_video_files(self, sort_by_name: bool) -> list[Path]:
@@ -65,37 +112,158 @@ class FolderAsVideo:
             video_files.extend(self.folder.glob(f"*.{ext}"))
         return sorted(video_files) if sort_by_name else video_files
 
-    def _count_total_frames(self) -> int:
-        """Count the total number of frames across all video files."""
-        total = 0
-        for video_file in self.video_files:
-            cap = self._open_video_file(video_file)
-            total += int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            cap.release()
-        return total
+    def _load_index(self) -> list[dict[str, Any]]:
+        """Load the frame count and keyframes of each video file.
 
-    @staticmethod
-    def _open_video_file(path: Path) -> cv2.VideoCapture:
+        The entries are read from the sidecar index file if the size and
+        modification time of the video file are not changed, and the
+        updated entries are written back to it.
+        """
+        index_path = self.folder / FRAME_COUNT_INDEX_FILE_NAME
+        index: dict[str, Any] = {}
+        if self.use_frame_count_index and index_path.exists():
+            try:
+                index = json.loads(index_path.read_text())
+            except (OSError, ValueError):
+                self._logger.warning(f"Failed to read the frame count index '{index_path}'. Recounting...")
+
+        entries = []
+        updated = False
+        for video_file in self.video_files:
+            stat = video_file.stat()
+            entry = index.get(video_file.name)
+            if (
+                entry is None
+                or entry["size"] != stat.st_size
+                or entry["mtime_ns"] != stat.st_mtime_ns
+                or "keyframes" not in entry
+                # Indexed without PyAV, which is installed now.
+                or (entry["keyframes"] is None and not entry.get("pyav", False) and av is not None)
+            ):
+                cap = self._open_video_file(video_file)
+                entry = {
+                    "frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "keyframes": self._read_keyframes(video_file),
+                    # Whether the keyframes were read with PyAV. If so, None means the video can not be demuxed.
+                    "pyav": av is not None,
+                }
+                cap.release()
+                index[video_file.name] = entry
+                updated = True
+            entries.append(entry)
+
+        if self.use_frame_count_index and updated:
+            try:
+                index_path.write_text(json.dumps(index))
+            except OSError:
+                self._logger.warning(f"Failed to write the frame count index '{index_path}'.")
+        return entries
+
+    def _read_keyframes(self, path: Path) -> list[int] | None:
+        """Read the frame numbers of the keyframes by demuxing the video
+        without decoding.
+
+        Returns None if PyAV is not installed or the video can not be
+        demuxed, and then the seek relies on `CAP_PROP_POS_FRAMES`.
+        """
+        if av is None:
+            return None
+        try:
+            with av.open(str(path)) as container:
+                stream = container.streams.video[0]
+                if stream.average_rate is None or stream.time_base is None:
+                    return None
+                start_time = stream.start_time or 0
+                keyframes = set()
+                for packet in container.demux(stream):
+                    if packet.is_keyframe and packet.pts is not None:
+                        keyframes.add(round(float((packet.pts - start_time) * stream.time_base * stream.average_rate)))
+        except Exception:
+            self._logger.warning(f"Failed to read the keyframes of '{path}'.")
+            return None
+        return sorted(keyframes)
+
+    def _open_video_file(self, path: Path) -> cv2.VideoCapture:
         """Open a video file and return the VideoCapture object."""
-        cap = cv2.VideoCapture(str(path))
+        if self.hw_acceleration and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            cap = cv2.VideoCapture(str(path), cv2.CAP_ANY, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+        else:
+            cap = cv2.VideoCapture(str(path))
         if not cap.isOpened():
             raise RuntimeError(f"Cannot open video file '{path}'")
         return cap
 
+    def locate(self, frame: int) -> tuple[int, int]:
+        """Return the video index and the frame number in the video of the
+        global frame number in O(log n)."""
+        video_index = bisect.bisect_right(self.frame_offsets, frame) - 1
+        return video_index, frame - self.frame_offsets[video_index]
+
+    def _seek_video(self, cap: cv2.VideoCapture, video_index: int, frame_in_video: int) -> None:
+        """Seek the capture to the frame.
+
+        The capture seeks to the nearest preceding keyframe, where the
+        seek is accurate, and decodes forward to the frame.
+        """
+        keyframes = self.keyframes[video_index]
+        if keyframes is None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_in_video)
+            return
+        i = bisect.bisect_right(keyframes, frame_in_video) - 1
+        keyframe = keyframes[i] if i >= 0 else 0
+        cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+        for _ in range(frame_in_video - keyframe):
+            if not cap.grab():
+                raise RuntimeError(f"Error seeking to frame {frame_in_video} of {self.video_files[video_index]}")
+
+    def _should_seek(self, video_index: int, current_frame: int, target_frame: int) -> bool:
+        """Whether seeking to the target frame is faster than decoding
+        forward from the current frame."""
+        if target_frame < current_frame:
+            return True
+        keyframes = self.keyframes[video_index]
+        if keyframes is None:
+            return target_frame - current_frame > MAX_FORWARD_GRAB_FRAMES
+        # Seek if a keyframe lies in (current_frame, target_frame].
+        i = bisect.bisect_right(keyframes, current_frame)
+        return i < len(keyframes) and keyframes[i] <= target_frame
+
     def _initialize_video(self) -> None:
         """Initialize the video to the correct file and frame position."""
-        remaining_frames = self.start_frame
-        for i, video_file in enumerate(self.video_files):
-            cap = self._open_video_file(video_file)
-            frames_in_video = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            if remaining_frames < frames_in_video:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, remaining_frames)
-                self.current_video = cap
-                self.current_video_index = i
-                self.current_frame = self.start_frame
-                return
-            remaining_frames -= frames_in_video
-            cap.release()
+        self.seek(self.start_frame)
+
+    def seek(self, frame: int) -> None:
+        """Seek the read position to the global frame number.
+
+        Args:
+            frame: The frame number in the folder, in the range of
+                [`start_frame`, `start_frame` + `max_frames`]. The end
+                means all frames have been read.
+        """
+        end_frame = self.start_frame + self.max_frames
+        if not self.start_frame <= frame <= end_frame:
+            raise ValueError(f"frame ({frame}) must be in the range [{self.start_frame}, {end_frame}]")
+        self.current_video.release()
+        self.current_frame = frame
+        if frame == end_frame:
+            return
+        self.current_video_index, frame_in_video = self.locate(frame)
+        self.current_video = self._open_video_file(self.video_files[self.current_video_index])
+        if frame_in_video > 0:
+            self._seek_video(self.current_video, self.current_video_index, frame_in_video)
+
+    def _to_tensor(self, frame: npt.NDArray[np.uint8]) -> torch.Tensor:
+        """Convert the decoded BGR frame to the RGB tensor."""
+        if self.frame_size is not None and frame.shape[:2] != tuple(self.frame_size):
+            height, width = self.frame_size
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        frame_tensor = torch.from_numpy(frame).permute(2, 0, 1)
+        if self.normalize:
+            frame_tensor = frame_tensor.float() / 255.0
+        return frame_tensor
 
     def read(self) -> torch.Tensor:
         """Read one frame from the video.
@@ -129,11 +297,44 @@ class FolderAsVideo:
                 raise RuntimeError("All frames have been read")
 
         self.current_frame += 1
-        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        frame_tensor = torch.from_numpy(frame).permute(2, 0, 1)
-        if self.normalize:
-            frame_tensor = frame_tensor.float() / 255.0
-        return frame_tensor
+        return self._to_tensor(frame)
+
+    def __len__(self) -> int:
+        return self.max_frames
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        """Read the frame at `start_frame + index` without changing the
+        read position of `read`.
+
+        Ascending indices are decoded forward without seeking as long as
+        no keyframe is skipped, so strided reads (e.g., frame sampling)
+        are efficient.
+        """
+        if index < 0:
+            index += self.max_frames
+        if not 0 <= index < self.max_frames:
+            raise IndexError(f"index {index} is out of range [0, {self.max_frames})")
+        video_index, frame_in_video = self.locate(self.start_frame + index)
+
+        if self._random_access_video is not None and self._random_access_video[0] == video_index:
+            _, next_frame, cap = self._random_access_video
+        else:
+            if self._random_access_video is not None:
+                self._random_access_video[2].release()
+            cap = self._open_video_file(self.video_files[video_index])
+            next_frame = 0
+        if self._should_seek(video_index, next_frame, frame_in_video):
+            self._seek_video(cap, video_index, frame_in_video)
+        else:
+            for _ in range(frame_in_video - next_frame):
+                if not cap.grab():
+                    raise RuntimeError(f"Error seeking to frame {frame_in_video} of {self.video_files[video_index]}")
+        self._random_access_video = (video_index, frame_in_video + 1, cap)
+
+        ret, frame = cap.read()
+        if not ret:
+            raise RuntimeError(f"Error reading frame {frame_in_video} from video file {self.video_files[video_index]}")
+        return self._to_tensor(frame)
 
     @property
     def is_finished(self) -> bool:
@@ -149,13 +350,20 @@ class FolderAsVideo:
         return self.read()
 
 
-class VideoFoldersImageObservationGenerator:
+class VideoFoldersImageObservationGenerator(SaveAndLoadStateMixin):
     """Generates image observations from multiple video folders.
 
     This class processes video files from specified folders
     sequentially, yielding image tensors as observations. It supports
     various video formats, custom starting frames, and frame limits for
     each video folder.
+
+    The frames are resized in uint8 right after decoding. If
+    `prefetch_size` > 0, the frames are decoded in a background thread
+    into a bounded queue, so the decoding overlaps with the agent step.
+
+    The read position is saved and loaded as the state, and the frames
+    can be read randomly by `__getitem__` (e.g., for building datasets).
     """
 
     def __init__(
@@ -166,6 +374,9 @@ class VideoFoldersImageObservationGenerator:
         folder_start_frames: int | list[int] = 0,
         folder_frame_limits: int | None | list[int | None] = None,
         normalize: bool = True,
+        prefetch_size: int = 0,
+        hw_acceleration: bool = False,
+        use_frame_count_index: bool = True,
     ):
         """Initialize the VideoFoldersImageObservationGenerator.
 
@@ -177,6 +388,10 @@ class VideoFoldersImageObservationGenerator:
             folder_frame_limits: Maximum number of frames to use from each folder.
                                  None means use all available frames.
             normalize (bool): Whether to normalize the value range to [0,1].
+            prefetch_size: The maximum number of frames decoded ahead in the background thread.
+                0 means decoding in the caller thread.
+            hw_acceleration: Whether to request the hardware accelerated decoding to OpenCV.
+            use_frame_count_index: Whether to cache the frame counts in the sidecar index file of each folder.
 
         Raises:
             ValueError: If the length of folder_start_frames or folder_frame_limits
@@ -184,6 +399,8 @@ class VideoFoldersImageObservationGenerator:
         """
         self.folder_paths = [Path(folder) for folder in folder_paths]
         self.image_size = image_size
+        self.prefetch_size = prefetch_size
+        self._logger = get_inference_thread_logger(self.__class__.__name__)
 
         # Process start frames
         if isinstance(folder_start_frames, int):
@@ -203,18 +420,128 @@ class VideoFoldersImageObservationGenerator:
 
         # Initialize FolderAsVideo objects for each folder
         self.folder_videos = [
-            FolderAsVideo(folder, video_extensions, True, start_frame, max_frames, normalize)
+            FolderAsVideo(
+                folder,
+                video_extensions,
+                True,
+                start_frame,
+                max_frames,
+                normalize,
+                frame_size=image_size,
+                hw_acceleration=hw_acceleration,
+                use_frame_count_index=use_frame_count_index,
+            )
             for folder, start_frame, max_frames in zip(
                 self.folder_paths, self.folder_start_frames, self.folder_frame_limits
             )
         ]
 
         self.current_folder_index = 0
+        self.num_generated_frames = 0
+        # The global frame number of the first frame of each folder. The last item is `max_frames`.
+        self.folder_offsets = [0, *itertools.accumulate(f.max_frames for f in self.folder_videos)]
+
+        self._prefetch_queue: queue.Queue[torch.Tensor | BaseException | None] = queue.Queue(max(prefetch_size, 1))
+        self._prefetch_thread: threading.Thread | None = None
+        self._stop_prefetch = threading.Event()
 
     @property
     def max_frames(self) -> int:
         return sum(f.max_frames for f in self.folder_videos)
 
+    def __len__(self) -> int:
+        return self.max_frames
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        """Read the `index`-th frame over all folders without changing the
+        read position."""
+        if index < 0:
+            index += self.max_frames
+        if not 0 <= index < self.max_frames:
+            raise IndexError(f"index {index} is out of range [0, {self.max_frames})")
+        folder_index = bisect.bisect_right(self.folder_offsets, index) - 1
+        return self.folder_videos[folder_index][index - self.folder_offsets[folder_index]]
+
+    def seek(self, frame: int) -> None:
+        """Seek the read position to the `frame`-th frame over all
+        folders."""
+        if not 0 <= frame <= self.max_frames:
+            raise ValueError(f"frame ({frame}) must be in the range [0, {self.max_frames}]")
+        self.close()
+        for i, video in enumerate(self.folder_videos):
+            video.seek(video.start_frame + min(max(frame - self.folder_offsets[i], 0), video.max_frames))
+        self.current_folder_index = bisect.bisect_right(self.folder_offsets, frame) - 1
+        self.num_generated_frames = frame
+
+    def save_state(self, path: Path) -> None:
+        path.mkdir()
+        (path / "state.json").write_text(json.dumps({"num_generated_frames": self.num_generated_frames}))
+
+    def load_state(self, path: Path) -> None:
+        state_path = path / "state.json"
+        if not state_path.exists():  # For the checkpoints saved before introducing the read position state.
+            self._logger.warning(f"'{state_path}' does not exist. The videos are read from the start.")
+            return
+        state = json.loads(state_path.read_text())
+        self.seek(state["num_generated_frames"])
+
+    def _read_next(self) -> torch.Tensor:
+        while self.current_folder_index < len(self.folder_videos):
+            current_video = self.folder_videos[self.current_folder_index]
+            if not current_video.is_finished:
+                return current_video.read()
+            else:
+                # Move to the next folder
+                self.current_folder_index += 1
+
+        raise StopIteration("All videos have been processed")
+
+    def _prefetch_worker(self) -> None:
+        """Decodes the frames into the queue until all videos are processed.
+
+        The end of the videos is put as `None`, and the exception is put
+        as is.
+        """
+        item: torch.Tensor | BaseException | None
+        while not self._stop_prefetch.is_set():
+            try:
+                item = self._read_next()
+            except StopIteration:
+                item = None
+            except BaseException as e:
+                item = e
+
+            while not self._stop_prefetch.is_set():
+                try:
+                    self._prefetch_queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if not isinstance(item, torch.Tensor):
+                return
+
+    def _get_prefetched(self) -> torch.Tensor:
+        if self._prefetch_thread is None:
+            self._prefetch_thread = threading.Thread(target=self._prefetch_worker, daemon=True)
+            self._prefetch_thread.start()
+        item = self._prefetch_queue.get()
+        if item is None:
+            self._prefetch_queue.put(None)  # Keep raising at the subsequent calls.
+            raise StopIteration("All videos have been processed")
+        if isinstance(item, BaseException):
+            self._prefetch_queue.put(item)
+            raise item
+        return item
+
+    def close(self) -> None:
+        """Stops the prefetch thread and discards the prefetched frames."""
+        if self._prefetch_thread is not None:
+            self._stop_prefetch.set()
+            self._prefetch_thread.join()
+            self._prefetch_thread = None
+            self._prefetch_queue = queue.Queue(max(self.prefetch_size, 1))
+            self._stop_prefetch.clear()
+
     def __call__(self) -> torch.Tensor:
         """Generate the next image observation.
 
@@ -224,17 +551,12 @@ class VideoFoldersImageObservationGenerator:
         Raises:
             StopIteration: When all videos in all folders have been processed.
         """
-        while self.current_folder_index < len(self.folder_videos):
-            current_video = self.folder_videos[self.current_folder_index]
-            if not current_video.is_finished:
-                frame = current_video.read()
-                # Resize the frame to the target size
-                return v2.functional.resize(frame, self.image_size)
-            else:
-                # Move to the next folder
-                self.current_folder_index += 1
-
-        raise StopIteration("All videos have been processed")
+        if self.prefetch_size > 0:
+            frame = self._get_prefetched()
+        else:
+            frame = self._read_next()
+        self.num_generated_frames += 1
+        return frame
 
     def __iter__(self) -> Iterator[torch.Tensor]:
         return self
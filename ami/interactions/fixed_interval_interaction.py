@@ -1,5 +1,7 @@
 from typing import Any
 
+from typing_extensions import override
+
 from ._types import ActType, ObsType
 from .agents.base_agent import BaseAgent
 from .environments.base_environment import BaseEnvironment
@@ -29,4 +31,11 @@ class FixedIntervalInteraction(Interaction):
 
     def step(self) -> None:
         super().step()
-        self.interval_adjustor.adjust()
+        with self.measure("interval_adjustor.adjust"):
+            self.interval_adjustor.adjust()
+
+    @override
+    def on_resumed(self) -> None:
+        super().on_resumed()
+        # Restarts the schedule, otherwise the paused time is counted as the missed deadlines.
+        self.interval_adjustor.reset()
@@ -1,9 +1,11 @@
+import contextlib
 from pathlib import Path
-from typing import Any
+from typing import Any, ContextManager
 
 from typing_extensions import override
 
 from ami.checkpointing import SaveAndLoadStateMixin
+from ami.profiling import StageProfiler
 from ami.threads.thread_control import PauseResumeEventMixin
 
 from ._types import ActType, ObsType
@@ -15,6 +17,8 @@ from .io_wrappers.base_io_wrapper import BaseActionWrapper, BaseObservationWrapp
 class Interaction(SaveAndLoadStateMixin, PauseResumeEventMixin):
     """The interaction protocol between an environment and an agent."""
 
+    profiler: StageProfiler | None = None
+
     def __init__(
         self,
         environment: BaseEnvironment[ObsType, ActType],
@@ -60,9 +64,27 @@ class Interaction(SaveAndLoadStateMixin, PauseResumeEventMixin):
 
         This method is called repeatedly by the inference thread.
         """
-        obs = self.environment.observe()
-        action = self.agent.step(self.wrap_observation(obs))
-        self.environment.affect(self.wrap_action(action))
+        with self.measure("environment.observe"):
+            obs = self.environment.observe()
+        with self.measure("observation_wrappers"):
+            obs = self.wrap_observation(obs)
+        with self.measure("agent.step"):
+            action = self.agent.step(obs)
+        with self.measure("action_wrappers"):
+            action = self.wrap_action(action)
+        with self.measure("environment.affect"):
+            self.environment.affect(action)
+
+    def attach_profiler(self, profiler: StageProfiler) -> None:
+        """Attaches the profiler for measuring the stages of `step`."""
+        self.profiler = profiler
+
+    def measure(self, stage: str) -> ContextManager[None]:
+        """Returns the context measuring the stage if the profiler is
+        attached."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.measure(stage)
 
     def teardown(self) -> None:
         """Called at the end of the interaction."""
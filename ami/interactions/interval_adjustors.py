@@ -1,6 +1,9 @@
 import math
 import time
 from abc import ABC, abstractmethod
+from enum import Enum
+
+from typing_extensions import override
 
 
 class BaseIntervalAdjustor(ABC):
@@ -48,6 +51,14 @@ class BaseIntervalAdjustor(ABC):
         self.reset()
         return delta_time
 
+    def statistics(self, reset: bool = False) -> dict[str, float]:
+        """Returns the counters of the adjustor for logging.
+
+        Args:
+            reset: If True, resets the counters after reading.
+        """
+        return {}
+
 
 class SleepIntervalAdjustor(BaseIntervalAdjustor):
     """Adjusts the interval using `time.sleep` to pause execution until the
@@ -56,3 +67,187 @@ class SleepIntervalAdjustor(BaseIntervalAdjustor):
     def _adjust(self) -> None:
         if (remaining_time := (self._last_reset_time + self._time_to_wait) - time.perf_counter()) > 0:
             time.sleep(remaining_time)
+
+
+class OverrunPolicies(str, Enum):
+    """The behaviours of `DeadlineIntervalAdjustor` when a deadline is
+    missed.
+
+    - `skip`: Drops the missed deadlines and waits for the next deadline on the original schedule.
+    - `catch_up`: Does not wait until the schedule is caught up, so the following steps run back-to-back.
+        If it falls behind more than `max_catch_up_steps` intervals, the missed deadlines are skipped.
+    - `degrade`: Stretches the interval by `degrade_factor` (up to `max_interval_scale`) and restarts the
+        schedule from now. The interval is restored step by step after `recover_after_n_steps` on-time steps.
+    """
+
+    SKIP = "skip"
+    CATCH_UP = "catch_up"
+    DEGRADE = "degrade"
+
+
+class DeadlineIntervalAdjustor(BaseIntervalAdjustor):
+    """Adjusts the loop to the absolute deadlines `start + k * interval`.
+
+    Unlike `SleepIntervalAdjustor`, the time taken by the loop body and the
+    oversleep do not shift the later deadlines, so the drift does not
+    accumulate. The handling of the overrun steps is selected by
+    `overrun_policy`.
+
+    If `spin_threshold` is positive, the adjustor sleeps until
+    `spin_threshold` seconds before the deadline, and busy-waits for the
+    rest for the sub-millisecond precision at the cost of a CPU core.
+    """
+
+    _max_lateness: float
+
+    def __init__(
+        self,
+        interval: float,
+        offset: float = 0.0,
+        overrun_policy: OverrunPolicies | str = OverrunPolicies.SKIP,
+        spin_threshold: float = 0.0,
+        max_catch_up_steps: int = 10,
+        degrade_factor: float = 1.5,
+        max_interval_scale: float = 4.0,
+        recover_after_n_steps: int = 10,
+    ) -> None:
+        """Constructs the adjustor.
+
+        Args:
+            interval: The desired time between each invocation in seconds.
+            offset: The time offset subtracted from the first interval.
+            overrun_policy: The behaviour when a deadline is missed. See `OverrunPolicies`.
+            spin_threshold: The seconds to busy-wait before each deadline. 0 is sleep only.
+            max_catch_up_steps: The max number of missed intervals to catch up. Used by `catch_up` policy.
+            degrade_factor: The factor for stretching the interval. Used by `degrade` policy.
+            max_interval_scale: The max scale of the stretched interval. Used by `degrade` policy.
+            recover_after_n_steps: The number of consecutive on-time steps to restore the interval by
+                `degrade_factor`. Used by `degrade` policy.
+        """
+        super().__init__(interval, offset)
+        assert interval > 0
+        assert spin_threshold >= 0
+        assert max_catch_up_steps >= 0
+        assert degrade_factor > 1.0
+        assert max_interval_scale >= 1.0
+        assert recover_after_n_steps > 0
+
+        self.overrun_policy = OverrunPolicies(overrun_policy)
+        self.spin_threshold = spin_threshold
+        self.max_catch_up_steps = max_catch_up_steps
+        self.degrade_factor = degrade_factor
+        self.max_interval_scale = max_interval_scale
+        self.recover_after_n_steps = recover_after_n_steps
+
+        self.interval_scale = 1.0
+        # Negative infinity until `reset`, which starts the schedule at the first `adjust` without waiting.
+        self._next_deadline = -math.inf
+        self._last_adjust_time = -math.inf
+        self._num_on_time_steps = 0
+        self.reset_statistics()
+
+    @property
+    def current_interval(self) -> float:
+        """The interval stretched by `degrade` policy."""
+        return self._interval * self.interval_scale
+
+    @override
+    def reset(self) -> float:
+        """Restarts the schedule from the current time."""
+        start = super().reset()
+        self._last_adjust_time = start
+        self._next_deadline = start + self.current_interval - self._offset
+        return start
+
+    def _wait_until(self, deadline: float) -> None:
+        if (remaining_time := deadline - time.perf_counter() - self.spin_threshold) > 0:
+            time.sleep(remaining_time)
+        while time.perf_counter() < deadline:
+            pass
+
+    @override
+    def _adjust(self) -> None:
+        if self._next_deadline == -math.inf:  # Not reset yet.
+            self.reset()
+            return
+
+        now = time.perf_counter()
+        if now <= self._next_deadline:
+            self._wait_until(self._next_deadline)
+            self._record_lateness(time.perf_counter() - self._next_deadline)
+            self._next_deadline += self.current_interval
+            self._on_time()
+            return
+
+        lateness = now - self._next_deadline
+        self._record_lateness(lateness)
+        self.missed_deadlines += 1
+        self._num_on_time_steps = 0
+
+        match self.overrun_policy:
+            case OverrunPolicies.SKIP:
+                self._skip_missed_deadlines(now)
+                self._wait_until(self._next_deadline)
+                self._next_deadline += self.current_interval
+            case OverrunPolicies.CATCH_UP:
+                if lateness > self.max_catch_up_steps * self.current_interval:
+                    self._skip_missed_deadlines(now)
+                else:
+                    self._next_deadline += self.current_interval
+            case OverrunPolicies.DEGRADE:
+                self.interval_scale = min(self.interval_scale * self.degrade_factor, self.max_interval_scale)
+                self._next_deadline = now + self.current_interval
+
+    def _skip_missed_deadlines(self, now: float) -> None:
+        num_skips = math.floor((now - self._next_deadline) / self.current_interval) + 1
+        self._next_deadline += num_skips * self.current_interval
+        self.skipped_deadlines += num_skips
+
+    def _on_time(self) -> None:
+        if self.overrun_policy is not OverrunPolicies.DEGRADE or self.interval_scale == 1.0:
+            return
+        self._num_on_time_steps += 1
+        if self._num_on_time_steps >= self.recover_after_n_steps:
+            self._num_on_time_steps = 0
+            self.interval_scale = max(self.interval_scale / self.degrade_factor, 1.0)
+
+    def _record_lateness(self, lateness: float) -> None:
+        self._num_steps += 1
+        self._total_abs_lateness += abs(lateness)
+        self._max_lateness = max(self._max_lateness, lateness)
+
+    @override
+    def adjust(self) -> float:
+        self._adjust()
+        now = time.perf_counter()
+        delta_time = now - self._last_adjust_time
+        self._last_adjust_time = now
+        return delta_time
+
+    def reset_statistics(self) -> None:
+        self.missed_deadlines = 0
+        self.skipped_deadlines = 0
+        self._num_steps = 0
+        self._total_abs_lateness = 0.0
+        self._max_lateness = 0.0
+
+    @override
+    def statistics(self, reset: bool = False) -> dict[str, float]:
+        """Returns the counters since the last reset.
+
+        - `missed_deadlines`: The number of steps which overran the deadline.
+        - `skipped_deadlines`: The number of deadlines dropped by `skip` (or `catch_up`) policy.
+        - `mean_jitter`: The mean absolute difference between the deadline and the actual time.
+        - `max_lateness`: The max delay from the deadline.
+        - `interval_scale`: The current scale of the interval by `degrade` policy.
+        """
+        stats = {
+            "missed_deadlines": self.missed_deadlines,
+            "skipped_deadlines": self.skipped_deadlines,
+            "mean_jitter": self._total_abs_lateness / self._num_steps if self._num_steps > 0 else 0.0,
+            "max_lateness": self._max_lateness,
+            "interval_scale": self.interval_scale,
+        }
+        if reset:
+            self.reset_statistics()
+        return stats
@@ -1,8 +1,14 @@
 import csv
+import json
 import os
+import threading
 import time
+import warnings
+from enum import Enum
+from pathlib import Path
 from typing import Any, Callable, Generic, TypeVar
 
+import numpy as np
 import torch
 from torch import Tensor
 from typing_extensions import override
@@ -56,6 +62,149 @@ class TensorCSVRecorder(BaseIOWrapper[Tensor, Tensor]):
             writer.writerow(row)
 
 
+class RecordFileFormats(str, Enum):
+    """Enumerates the file formats of `BufferedTensorCSVRecorder`."""
+
+    CSV = "csv"
+    NPZ = "npz"  # Columnar NumPy chunks.
+
+
+class BufferedTensorCSVRecorder(TensorCSVRecorder):
+    """Buffered version of `TensorCSVRecorder` for high-rate recording.
+
+    The file is kept open, and the rows are buffered in memory and written
+    by the background flush thread when `max_buffered_rows` rows are
+    buffered or `flush_interval` seconds have passed. The buffered rows
+    are flushed and synced to the disk at `on_paused`, `save_state`
+    (checkpointing) and `teardown`.
+
+    With `file_format="npz"`, `filename` is used as the directory, and each
+    flush writes a chunk file `chunk_{index}.npz` which has a float64 array
+    per header. The headers are written to `headers.json`.
+    """
+
+    @override
+    def __init__(
+        self,
+        filename: str,
+        headers: list[str],
+        timestamp_header: str = "timestamp",
+        max_buffered_rows: int = 1024,
+        flush_interval: float = 5.0,
+        file_format: str | RecordFileFormats = RecordFileFormats.CSV,
+    ) -> None:
+        """
+        Args:
+            filename: The name of the CSV file, or the directory of the NumPy chunks.
+            headers: List of column headers for the tensor elements.
+            timestamp_header: Header for the timestamp column.
+            max_buffered_rows: The number of buffered rows which triggers the flush.
+            flush_interval: The maximum interval in seconds between the flushes.
+            file_format: `csv` or `npz`.
+        """
+        self.file_format = RecordFileFormats(file_format)
+        self.max_buffered_rows = max_buffered_rows
+        self.flush_interval = flush_interval
+        self._rows: list[list[Any]] = []
+        self._rows_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stop_flush_thread = threading.Event()
+        self._flush_thread: threading.Thread | None = None
+        self._num_chunks = 0
+        super().__init__(filename, headers, timestamp_header)
+
+    @override
+    def _initialize_csv(self) -> None:
+        if self.file_format == RecordFileFormats.CSV:
+            self._file = open(self.filename, "w", newline="")
+            self._csv_writer = csv.writer(self._file)
+            self._csv_writer.writerow(self.headers)
+            self._file.flush()
+        else:
+            self.chunk_dir = Path(self.filename)
+            self.chunk_dir.mkdir(parents=True, exist_ok=True)
+            # The old chunks are removed as the CSV file is truncated, so they are not mixed with the new ones.
+            for chunk_file in self.chunk_dir.glob("chunk_*.npz"):
+                chunk_file.unlink()
+            self._num_chunks = 0
+            (self.chunk_dir / "headers.json").write_text(json.dumps(self.headers))
+
+    @override
+    def setup(self) -> None:
+        super().setup()
+        self._stop_flush_thread.clear()
+        self._flush_thread = threading.Thread(target=self._flush_worker, daemon=True)
+        self._flush_thread.start()
+
+    @override
+    def record_input(self, input_array: list[Any]) -> None:
+        with self._rows_lock:
+            self._rows.append([time.time()] + input_array)
+            num_rows = len(self._rows)
+        if num_rows >= self.max_buffered_rows:
+            if self._flush_thread is None:
+                self.flush()
+            else:
+                self._flush_requested.set()
+
+    def _flush_worker(self) -> None:
+        while not self._stop_flush_thread.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self.flush()
+
+    def flush(self, sync: bool = False) -> None:
+        """Writes the buffered rows to the file.
+
+        Args:
+            sync: Whether to sync the file to the disk for durability.
+        """
+        # The rows are taken under `_write_lock`, so the concurrent flushes write them in order.
+        with self._write_lock:
+            with self._rows_lock:
+                rows, self._rows = self._rows, []
+            if self.file_format == RecordFileFormats.CSV:
+                if self._file.closed:
+                    return
+                if rows:
+                    self._csv_writer.writerows(rows)
+                    self._file.flush()
+                if sync:
+                    os.fsync(self._file.fileno())
+            elif rows:
+                columns = np.asarray(rows, dtype=np.float64).T
+                chunk_file = self.chunk_dir / f"chunk_{self._num_chunks:06d}.npz"
+                with open(chunk_file, "wb") as f:
+                    np.savez(f, **dict(zip(self.headers, columns)))
+                    # The chunks are written rarely, so they are always synced.
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._num_chunks += 1
+
+    @override
+    def on_paused(self) -> None:
+        super().on_paused()
+        self.flush(sync=True)
+
+    @override
+    def save_state(self, path: Path) -> None:
+        super().save_state(path)
+        self.flush(sync=True)
+
+    @override
+    def teardown(self) -> None:
+        super().teardown()
+        if self._flush_thread is not None:
+            self._stop_flush_thread.set()
+            self._flush_requested.set()
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush(sync=True)
+        if self.file_format == RecordFileFormats.CSV:
+            self._file.close()
+
+
 ValueType = TypeVar("ValueType")
 
 
@@ -66,6 +215,11 @@ class TensorCSVReader(Generic[ValueType]):
     selected columns into a PyTorch tensor. It allows for selective reading of
     columns and conversion of string values to a specified type.
 
+    The selected columns are parsed into a single tensor at once by `numpy.loadtxt`
+    when constructed, so reading a row costs only indexing. The rows can be read
+    sequentially by `read`, or randomly by `__getitem__`. The read position is
+    saved and restored by `state_dict` and `load_state_dict`.
+
     The class supports reading a specified number of rows and handles CSV files
     with a header row. It's designed to work with CSV files that have been created
     by TensorCSVRecorder or follow a similar format.
@@ -74,6 +228,7 @@ class TensorCSVReader(Generic[ValueType]):
         file_path (str): The path to the CSV file to read from.
         column_headers (list[str]): List of column headers to select from the CSV.
         value_converter (Callable[[str], ValueType]): A function to convert string values to the desired type.
+            `float` and `int` are parsed by the fast path of NumPy.
         max_rows (int | None, optional): Maximum number of rows to read. If None, read all available rows. Defaults to None.
 
     Raises:
@@ -90,15 +245,17 @@ class TensorCSVReader(Generic[ValueType]):
         super().__init__()
 
         self.file_path = file_path
-        self.csv_file = open(file_path)
-        self.csv_reader = csv.reader(self.csv_file)
         self.value_converter = value_converter
 
-        total_rows = self._count_data_rows()
-
-        if total_rows < 0:
-            raise ValueError("CSV file is empty.")
+        with open(file_path, newline="") as f:
+            header_line = f.readline()
+            if header_line == "":
+                raise ValueError("CSV file is empty.")
+            file_headers = next(csv.reader([header_line]))
+            self.column_indices = self._get_column_indices(file_headers, column_headers)
+            self.data = self._load_columns(f, max_rows)
 
+        total_rows = len(self.data)
         if max_rows is not None:
             if max_rows > total_rows:
                 raise ValueError(f"Requested max_rows ({max_rows}) exceeds available data rows ({total_rows}).")
@@ -106,12 +263,37 @@ class TensorCSVReader(Generic[ValueType]):
         else:
             self.max_rows = total_rows
 
-        file_headers = next(self.csv_reader)
-        self.column_indices = self._get_column_indices(file_headers, column_headers)
+        self._current_row = 0
 
-    def _count_data_rows(self) -> int:
-        with open(self.file_path) as f:
-            return sum(1 for _ in f) - 1  # Subtract 1 to exclude header
+    def _load_columns(self, file: Any, max_rows: int | None) -> Tensor:
+        """Parses the selected columns of the rows into a tensor, shape (rows,
+        columns)."""
+        kwds: dict[str, Any] = {}
+        if self.value_converter is int:
+            dtype: Any = np.int64
+        elif self.value_converter is float:
+            dtype = np.float64
+        else:
+            dtype = object
+            kwds["converters"] = {i: self.value_converter for i in self.column_indices}
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)  # Warns if the file has no data rows.
+            array = np.loadtxt(
+                file,
+                dtype=dtype,
+                delimiter=",",
+                usecols=self.column_indices,
+                ndmin=2,
+                max_rows=max_rows,
+                **kwds,
+            )
+        if dtype is object:
+            return torch.tensor(array.tolist()).reshape(len(array), len(self.column_indices))
+        tensor = torch.from_numpy(array)
+        if tensor.is_floating_point():
+            # Same as the dtype of `torch.tensor` with python floats.
+            tensor = tensor.to(torch.get_default_dtype())
+        return tensor
 
     def _get_column_indices(self, file_headers: list[str], requested_headers: list[str]) -> list[int]:
         indices = []
@@ -124,12 +306,24 @@ class TensorCSVReader(Generic[ValueType]):
 
     @property
     def current_row(self) -> int:
-        return self.csv_reader.line_num - 1
+        return self._current_row
 
     @property
     def is_finished(self) -> bool:
         return self.current_row >= self.max_rows
 
+    def __len__(self) -> int:
+        return self.max_rows
+
+    def __getitem__(self, index: int) -> Tensor:
+        """Returns the row at `index` as a tensor without changing the read
+        position."""
+        if index < 0:
+            index += self.max_rows
+        if not 0 <= index < self.max_rows:
+            raise IndexError(f"index {index} is out of range [0, {self.max_rows})")
+        return self.data[index]
+
     def read(self) -> Tensor:
         """Read the next row from the CSV and return it as a tensor.
 
@@ -142,30 +336,15 @@ class TensorCSVReader(Generic[ValueType]):
         if self.is_finished:
             raise StopIteration("All rows have been read.")
 
-        row_data = next(self.csv_reader)
-        selected_data = [row_data[i] for i in self.column_indices]
-        converted_data = [self.value_converter(d) for d in selected_data]
-        return torch.tensor(converted_data)
-
-    # def __getstate__(self) -> dict[str, Any]:
-    #     """Prepare the object for pickling."""
-    #     state = self.__dict__.copy()
-    #     state["_reader_line_num"] = self.csv_reader.line_num
-    #     del state["csv_file"]
-    #     del state["csv_reader"]
-    #     return state
-
-    # def __setstate__(self, state: dict[str, Any]) -> None:
-    #     """Restore the object from its pickled state."""
-    #     reader_line_num = state.pop("_reader_line_num")
-    #     self.__dict__.update(state)
-    #     csv_file = open(self.file_path)
-    #     csv_reader = csv.reader(csv_file)
-    #     for _ in range(reader_line_num):
-    #         next(csv_reader)
-    #     self.csv_file = csv_file
-    #     self.csv_reader = csv_reader
-
-    def __del__(self) -> None:
-        if hasattr(self, "csv_file"):
-            self.csv_file.close()
+        row = self.data[self._current_row]
+        self._current_row += 1
+        return row
+
+    def state_dict(self) -> dict[str, Any]:
+        return {"current_row": self._current_row}
+
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        current_row = state_dict["current_row"]
+        if not 0 <= current_row <= self.max_rows:
+            raise ValueError(f"current_row ({current_row}) must be in the range [0, {self.max_rows}]")
+        self._current_row = current_row
@@ -1,9 +1,14 @@
 import os
+import queue
+import threading
 from datetime import datetime
+from enum import Enum
 from pathlib import Path
 
 import cv2
 import numpy as np
+import numpy.typing as npt
+import torch
 from torch import Tensor
 from typing_extensions import override
 
@@ -12,8 +17,30 @@ from ami.logger import get_inference_thread_logger
 from .base_io_wrapper import BaseIOWrapper
 
 
+class FrameOverflowPolicies(str, Enum):
+    """Enumerates the behaviors when the frame queue of
+    `TensorVideoRecorder` is full."""
+
+    DROP = "drop"  # Drops the frame and counts it.
+    BLOCK = "block"  # Waits for the writer thread.
+
+
+class _Release:
+    """Queue message for closing the current video segment."""
+
+
+class _Stop:
+    """Queue message for stopping the writer thread."""
+
+
 class TensorVideoRecorder(BaseIOWrapper[Tensor, Tensor]):
-    """Records the image tensor data to a video file."""
+    """Records the image tensor data to a video file.
+
+    The frame is converted to the uint8 BGR array on the caller thread, and
+    encoded by the writer thread via the bounded queue. If the queue is full,
+    the frame is dropped or the caller waits according to `overflow_policy`.
+    The video is split into the segment files by the duration or the file size.
+    """
 
     @override
     def __init__(
@@ -26,6 +53,10 @@ class TensorVideoRecorder(BaseIOWrapper[Tensor, Tensor]):
         fourcc: str = "mp4v",
         do_rgb_to_bgr: bool = True,
         do_scale_255: bool = True,
+        queue_size: int = 64,
+        overflow_policy: str | FrameOverflowPolicies = FrameOverflowPolicies.BLOCK,
+        max_segment_duration: float | None = None,
+        max_segment_size: int | None = None,
     ) -> None:
         """Initializes the TensorVideoRecorder.
 
@@ -38,6 +69,12 @@ class TensorVideoRecorder(BaseIOWrapper[Tensor, Tensor]):
             fourcc: FourCC (Four Character Code) used for the video writer.
             do_rgb_to_bgr: Whether to convert RGB format tensors to BGR format.
             do_scale_255: Whether to scale values by 255.
+            queue_size: The maximum number of frames waiting for the writer thread. If 0, the frames are written
+                in the caller thread.
+            overflow_policy: `block` (default) waits for the writer thread and `drop` drops the frame when the
+                queue is full.
+            max_segment_duration: The maximum video duration in seconds of a segment file. If None, not limited.
+            max_segment_size: The maximum size in bytes of a segment file. If None, not limited.
         """
         super().__init__()
 
@@ -49,22 +86,108 @@ class TensorVideoRecorder(BaseIOWrapper[Tensor, Tensor]):
         self.fourcc = fourcc
         self.do_rgb_to_bgr = do_rgb_to_bgr
         self.do_scale_255 = do_scale_255
+        self.queue_size = queue_size
+        self.overflow_policy = FrameOverflowPolicies(overflow_policy)
+        self.max_segment_frames = None if max_segment_duration is None else int(max_segment_duration * frame_rate)
+        self.max_segment_size = max_segment_size
         self.logger = get_inference_thread_logger(self.__class__.__name__)
 
+        self.video_writer: cv2.VideoWriter | None = None
+        self.num_dropped_frames = 0
+        self.num_written_frames = 0
+        self._num_segment_frames = 0
+        self._queue: queue.Queue[npt.NDArray[np.uint8] | _Release | _Stop] = queue.Queue(max(queue_size, 1))
+        self._writer_thread: threading.Thread | None = None
+        self._writer_error: BaseException | None = None
+
     def setup_video_writer(self) -> None:
         codec = cv2.VideoWriter.fourcc(*self.fourcc)
         self.video_path = self.output_dir / datetime.now().strftime(self.file_name_format)
         self.video_writer = cv2.VideoWriter(str(self.video_path), codec, self.frame_rate, self.frame_size)
+        self._num_segment_frames = 0
         self.logger.info(f"Recording video to '{self.video_path}'")
 
     def release_video_writer(self) -> None:
-        self.logger.info(f"Saved video to '{self.video_path}'")
+        if self.video_writer is None:
+            return
         self.video_writer.release()
+        self.video_writer = None
+        self.logger.info(f"Saved video to '{self.video_path}'")
+        if self.num_dropped_frames > 0:
+            self.logger.warning(f"{self.num_dropped_frames} frames have been dropped in total.")
+
+    def _is_segment_full(self) -> bool:
+        if self.max_segment_frames is not None and self._num_segment_frames >= self.max_segment_frames:
+            return True
+        if self.max_segment_size is not None and self.video_path.stat().st_size >= self.max_segment_size:
+            return True
+        return False
+
+    def _process(self, item: npt.NDArray[np.uint8] | _Release | _Stop) -> None:
+        """Processes the queue item in the writer thread (or the caller
+        thread if `queue_size` is 0)."""
+        if isinstance(item, (_Release, _Stop)):
+            self.release_video_writer()
+            return
+        if self.video_writer is not None and self._is_segment_full():
+            self.release_video_writer()
+        if self.video_writer is None:
+            self.setup_video_writer()
+        assert self.video_writer is not None
+        self.video_writer.write(item)
+        self._num_segment_frames += 1
+        self.num_written_frames += 1
+
+    def _writer_worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if self._writer_error is None:
+                    self._process(item)
+            except Exception as e:
+                self.logger.exception("Failed to write the video frame.")
+                self._writer_error = e
+            finally:
+                self._queue.task_done()
+            if isinstance(item, _Stop):
+                return
+
+    def _put(self, item: npt.NDArray[np.uint8] | _Release | _Stop) -> None:
+        if self._writer_error is not None:
+            raise RuntimeError("The video writer thread has failed.") from self._writer_error
+        if self._writer_thread is None:
+            self._process(item)
+        elif isinstance(item, np.ndarray) and self.overflow_policy == FrameOverflowPolicies.DROP:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self.num_dropped_frames += 1
+        else:
+            self._queue.put(item)
 
     @override
     def setup(self) -> None:
         super().setup()
-        self.setup_video_writer()
+        if self.queue_size > 0:
+            self._writer_thread = threading.Thread(target=self._writer_worker, daemon=True)
+            self._writer_thread.start()
+        else:
+            self.setup_video_writer()
+
+    def to_frame(self, input: Tensor) -> npt.NDArray[np.uint8]:
+        """Converts the image tensor (C, H, W) to the uint8 frame array (H, W,
+        C).
+
+        The conversion is done in the tensor ops on the input device, and
+        only the uint8 frame is copied to the cpu.
+        """
+        frame = input.detach()
+        if self.do_scale_255:
+            frame = frame * 255
+        frame = frame.to(torch.uint8)
+        if self.do_rgb_to_bgr:
+            frame = frame.flip(0)
+        return frame.permute(1, 2, 0).contiguous().cpu().numpy()
 
     @override
     def wrap(self, input: Tensor) -> Tensor:
@@ -72,32 +195,30 @@ class TensorVideoRecorder(BaseIOWrapper[Tensor, Tensor]):
 
         image shape is (C, H, W).
         """
-        frame = input.detach().cpu().clone().numpy()
-
-        frame = np.moveaxis(frame, 0, -1)
-        if self.do_scale_255:
-            frame = frame * 255
-
-        frame = frame.astype(np.uint8)
-
-        if self.do_rgb_to_bgr:
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-
-        self.video_writer.write(frame)
-
+        self._put(self.to_frame(input))
         return input
 
+    def _flush(self) -> None:
+        """Closes the current segment after writing the queued frames."""
+        self._put(_Release())
+        if self._writer_thread is not None:
+            self._queue.join()
+
     @override
     def teardown(self) -> None:
         super().teardown()
+        if self._writer_thread is not None:
+            self._queue.put(_Stop())
+            self._writer_thread.join()
+            self._writer_thread = None
         self.release_video_writer()
 
     @override
     def on_paused(self) -> None:
         super().on_paused()
-        self.release_video_writer()  # 経験が途切れるため一度リリース
+        self._flush()  # 経験が途切れるため一度リリース
 
     @override
     def on_resumed(self) -> None:
         super().on_resumed()
-        self.setup_video_writer()
+        # The next segment is opened at the next frame.
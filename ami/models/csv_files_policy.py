@@ -1,3 +1,5 @@
+from typing import Any
+
 import torch
 import torch.nn as nn
 from torch import Tensor
@@ -13,6 +15,10 @@ class CSVFilesPolicy(nn.Module):
     This class processes CSV files sequentially, yielding action
     tensors. It supports multiple CSV files, custom column headers, and
     optional limitations on the number of rows to read from each file.
+
+    The CSV files are loaded at once when constructed, so generating an
+    action costs only indexing. The read position is included in the
+    `state_dict` as the extra state.
     """
 
     def __init__(
@@ -92,3 +98,16 @@ class CSVFilesPolicy(nn.Module):
                 self.current_reader_index += 1
 
         raise StopIteration("All actions have been processed")
+
+    def get_extra_state(self) -> dict[str, Any]:
+        return {
+            "current_reader_index": self.current_reader_index,
+            "csv_readers": [r.state_dict() for r in self.csv_readers],
+        }
+
+    def set_extra_state(self, state: dict[str, Any]) -> None:
+        if len(state["csv_readers"]) != len(self.csv_readers):
+            raise ValueError("The number of CSV files does not match the saved state.")
+        self.current_reader_index = state["current_reader_index"]
+        for reader, reader_state in zip(self.csv_readers, state["csv_readers"]):
+            reader.load_state_dict(reader_state)
@@ -8,6 +8,14 @@ from typing import Any, Generic, Protocol, TypeVar
 import torch
 import torch.nn as nn
 
+from ..precision import (
+    PrecisionTypes,
+    autocast,
+    cast_floating_tensors,
+    get_autocast_dtype,
+)
+from ..profiling import StageProfiler
+
 ModuleType = TypeVar("ModuleType", bound=nn.Module)
 
 
@@ -58,6 +66,7 @@ class ModelWrapper(nn.Module, Generic[ModuleType]):
         inference_forward: InferenceForwardCallable = default_infer,
         parameter_file: str | Path | None = None,
         inference_thread_only: bool = False,
+        inference_precision: PrecisionTypes | str = PrecisionTypes.FP32,
     ) -> None:
         """Constructs the model wrapper.
 
@@ -68,6 +77,7 @@ class ModelWrapper(nn.Module, Generic[ModuleType]):
             inference_forward: The inference forward flow for the wrapped model.
             parameter_file: The path to the parameter file for wrapping model.
             inference_thread_only: Whether the model should be used in inference thread only.
+            inference_precision: The autocast precision for `infer`. The parameters and outputs are kept in float32.
         """
 
         super().__init__()
@@ -78,6 +88,7 @@ class ModelWrapper(nn.Module, Generic[ModuleType]):
             raise ValueError("`has_inference` is False but model is inference thread only!")
         self.inference_thread_only = inference_thread_only
         self._inference_forward = inference_forward
+        self.inference_precision = PrecisionTypes(inference_precision)
 
         if parameter_file is not None:
             self.model.load_state_dict(torch.load(parameter_file, map_location=self.device))
@@ -96,8 +107,17 @@ class ModelWrapper(nn.Module, Generic[ModuleType]):
         return self._default_device
 
     def infer(self, *args: Any, **kwds: Any) -> Any:
-        """Performs the inference."""
-        return self._inference_forward(self, *args, **kwds)
+        """Performs the inference.
+
+        The floating point outputs of the autocast inference are cast
+        back to float32, so the consumers and data buffers always
+        receive float32.
+        """
+        with autocast(self.inference_precision, self.device):
+            outputs = self._inference_forward(self, *args, **kwds)
+        if get_autocast_dtype(self.inference_precision) is None:
+            return outputs
+        return cast_floating_tensors(outputs, torch.float32)
 
     def to_default_device(self) -> None:
         """Sends the model to the default computing device."""
@@ -168,6 +188,25 @@ class ThreadSafeInferenceWrapper(Generic[ModuleType]):
         """
         self._wrapper = wrapper
         self._lock = threading.RLock()
+        self._version = 0
+        self._profiler: StageProfiler | None = None
+        self._profiler_stage = ""
+
+    def attach_profiler(self, profiler: StageProfiler, stage: str) -> None:
+        """Attaches the profiler for measuring the inference time (including
+        the lock wait) as `stage`."""
+        self._profiler = profiler
+        self._profiler_stage = stage
+
+    @property
+    def inference_thread_only(self) -> bool:
+        return self._wrapper.inference_thread_only
+
+    @property
+    def version(self) -> int:
+        """The counter which is incremented when the model or its parameters
+        are updated via this wrapper."""
+        return self._version
 
     @property
     def model(self) -> ModuleType:
@@ -184,12 +223,41 @@ class ThreadSafeInferenceWrapper(Generic[ModuleType]):
         """Sets the model in a thread-safe manner."""
         with self._lock:
             self._wrapper.model = m
+            self._version += 1
 
     @torch.inference_mode()
     def infer(self, *args: Any, **kwds: Any) -> Any:
         """Performs the inference in a thread-safe manner."""
+        if self._profiler is not None:
+            with self._profiler.measure(self._profiler_stage), self._lock:
+                return self._wrapper.infer(*args, **kwds)
         with self._lock:
             return self._wrapper.infer(*args, **kwds)
 
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        """Copies the parameters into the internal model in a thread-safe
+        manner.
+
+        Unlike the model switching, the parameter tensors of the
+        training model are kept, so the optimizer can continue to use
+        them.
+        """
+        with self._lock:
+            self._wrapper.model.load_state_dict(state_dict)
+            self._version += 1
+
+    def state_dict(self) -> dict[str, Any]:
+        """Returns the state dict of the internal model in a thread-safe
+        manner."""
+        with self._lock:
+            return self._wrapper.model.state_dict()
+
+    def copy_state_dict_to(self, state_dict: dict[str, Any]) -> None:
+        """Copies the parameters and buffers of the internal model into the
+        preallocated tensors of `state_dict` in a thread-safe manner."""
+        with self._lock:
+            for name, tensor in self._wrapper.model.state_dict().items():
+                state_dict[name].copy_(tensor)
+
     def __call__(self, *args: Any, **kwds: Any) -> Any:
         return self.infer(*args, **kwds)
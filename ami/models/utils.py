@@ -1,13 +1,14 @@
 """This file contains utility classes."""
 from collections import UserDict
 from pathlib import Path
-from typing import Any, TypeAlias
+from typing import Any, Callable, TypeAlias
 
 import torch
 import torch.nn as nn
 from typing_extensions import override
 
 from ami.checkpointing import SaveAndLoadStateMixin
+from ami.checkpointing.snapshot import copy_tensors_to_cpu
 
 from .model_wrapper import ModelWrapper, ThreadSafeInferenceWrapper
 
@@ -62,6 +63,19 @@ class ModelWrappersDict(UserDict[str, ModelWrapper[nn.Module]], SaveAndLoadState
             wrapper = self[name]
             torch.save(wrapper.model.state_dict(), model_path)
 
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Copies the model parameters to the cpu, and returns the function
+        which saves them to `path`."""
+        path.mkdir()
+        state_dicts = {name: copy_tensors_to_cpu(self[name].model.state_dict()) for name in self._names_without_alias}
+
+        def write() -> None:
+            for name, state_dict in state_dicts.items():
+                torch.save(state_dict, path / (name + ".pt"))
+
+        return write
+
     @override
     def load_state(self, path: Path) -> None:
         """Loads the model parameters from `path`."""
@@ -0,0 +1,133 @@
+"""Mixed precision policies for training and inference."""
+import contextlib
+import copy
+from enum import Enum
+from typing import Any, ContextManager, TypeVar
+
+import torch
+from torch import Tensor
+from torch.distributions import Distribution
+from torch.optim import Optimizer
+
+T = TypeVar("T")
+
+
+class PrecisionTypes(str, Enum):
+    FP32 = "fp32"
+    BF16_AUTOCAST = "bf16-autocast"
+    FP16_GRAD_SCALER = "fp16+GradScaler"
+
+
+def get_autocast_dtype(precision: PrecisionTypes | str) -> torch.dtype | None:
+    """Returns the dtype for autocast. None if autocast is disabled."""
+    match PrecisionTypes(precision):
+        case PrecisionTypes.BF16_AUTOCAST:
+            return torch.bfloat16
+        case PrecisionTypes.FP16_GRAD_SCALER:
+            return torch.float16
+        case _:
+            return None
+
+
+def autocast(precision: PrecisionTypes | str, device: torch.device | str) -> ContextManager[Any]:
+    """Returns the autocast context of the precision for the device.
+
+    Use this for inference, which does not need the gradient scaling.
+    """
+    dtype = get_autocast_dtype(precision)
+    if dtype is None:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=torch.device(device).type, dtype=dtype)
+
+
+def cast_floating_tensors(obj: T, dtype: torch.dtype = torch.float32) -> T:
+    """Casts the floating point tensors in the nested tuples, lists, dicts
+    and distributions (e.g., the autocast outputs) to `dtype`.
+
+    The distributions are shallow-copied with their tensor attributes
+    cast, so `MultiCategoricals` and `Normal` work as well.
+    """
+    if isinstance(obj, Tensor):
+        return obj.to(dtype) if obj.is_floating_point() else obj  # type: ignore[return-value]
+    if isinstance(obj, Distribution):
+        copied = copy.copy(obj)
+        copied.__dict__.update((k, cast_floating_tensors(v, dtype)) for k, v in obj.__dict__.items())
+        return copied  # type: ignore[return-value]
+    if isinstance(obj, dict):
+        return type(obj)((k, cast_floating_tensors(v, dtype)) for k, v in obj.items())  # type: ignore[return-value]
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(cast_floating_tensors(v, dtype) for v in obj)  # type: ignore[return-value]
+    return obj
+
+
+class PrecisionPolicy:
+    """Wraps autocast and gradient scaling according to the precision type.
+
+    - `fp32`: Runs everything in float32. All methods behave as plain float32 training.
+    - `bf16-autocast`: Runs the forward pass with bfloat16 autocast. Available on CPU and CUDA.
+    - `fp16+GradScaler`: Runs the forward pass with float16 autocast and scales the loss by `GradScaler`.
+        The gradient scaling is disabled automatically if CUDA is not available.
+
+    Usage:
+        ```py
+        with precision.autocast(device):
+            loss = compute_loss(...)
+        optimizer.zero_grad()
+        precision.backward(loss)
+        precision.unscale_(optimizer)  # Before gradient clipping or grad norm logging.
+        precision.step(optimizer)
+        ```
+    """
+
+    def __init__(self, precision: PrecisionTypes | str = PrecisionTypes.FP32) -> None:
+        self.precision = PrecisionTypes(precision)
+        self.scaler = torch.cuda.amp.GradScaler(
+            enabled=self.precision is PrecisionTypes.FP16_GRAD_SCALER and torch.cuda.is_available()
+        )
+
+    @property
+    def autocast_dtype(self) -> torch.dtype | None:
+        """The dtype for autocast. None if autocast is disabled."""
+        return get_autocast_dtype(self.precision)
+
+    @property
+    def scaler_enabled(self) -> bool:
+        """Whether the gradient scaling is enabled.
+
+        If True, the gradients may contain inf or nan at the overflow
+        steps, which are skipped by `step`.
+        """
+        return self.scaler.is_enabled()
+
+    def autocast(self, device: torch.device | str) -> ContextManager[Any]:
+        """Returns the autocast context for the device."""
+        return autocast(self.precision, device)
+
+    def backward(self, loss: Tensor) -> None:
+        """Computes the gradients of the (scaled) loss."""
+        self.scaler.scale(loss).backward()
+
+    def unscale_(self, optimizer: Optimizer) -> None:
+        """Unscales the gradients in place.
+
+        Call at most once before `step`.
+        """
+        self.scaler.unscale_(optimizer)
+
+    def step(self, optimizer: Optimizer) -> None:
+        """Steps the optimizer and updates the scale factor.
+
+        The step is skipped if the gradients contain inf or nan when
+        the gradient scaling is enabled.
+        """
+        self.scaler.step(optimizer)
+        self.scaler.update()
+
+    def state_dict(self) -> dict[str, Any]:
+        return {"precision": self.precision.value, "scaler": self.scaler.state_dict()}
+
+    def load_state_dict(self, state_dict: dict[str, Any]) -> None:
+        if state_dict["precision"] != self.precision.value:
+            return  # The scaler state is not compatible with the other precision.
+        if scaler_state := state_dict["scaler"]:
+            self.scaler.load_state_dict(scaler_state)
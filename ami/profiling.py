@@ -0,0 +1,166 @@
+"""Fixed memory latency profiling utilities."""
+import math
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class LogBucketHistogram:
+    """Histogram with logarithmically spaced buckets.
+
+    The memory usage is fixed regardless of the number of recorded values,
+    and the relative error of the percentiles is bounded by the bucket width
+    (about 12% with 20 buckets per decade). Values out of
+    `[min_value, max_value)` are counted in the underflow and overflow
+    buckets, while the exact min and max are tracked separately.
+    """
+
+    def __init__(self, min_value: float = 1e-6, max_value: float = 1e3, buckets_per_decade: int = 20) -> None:
+        """Constructs the histogram.
+
+        Args:
+            min_value: The lower bound of the bucketed range. Must be positive.
+            max_value: The upper bound of the bucketed range.
+            buckets_per_decade: The number of buckets per factor of 10.
+        """
+        assert 0 < min_value < max_value
+        assert buckets_per_decade > 0
+        self.min_value = min_value
+        self.max_value = max_value
+        self.buckets_per_decade = buckets_per_decade
+
+        self._log_min = math.log10(min_value)
+        self._num_buckets = math.ceil((math.log10(max_value) - self._log_min) * buckets_per_decade)
+        self._counts = [0] * (self._num_buckets + 2)  # With underflow and overflow buckets.
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears the recorded values."""
+        for i in range(len(self._counts)):
+            self._counts[i] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _bucket_index(self, value: float) -> int:
+        if value < self.min_value:
+            return 0
+        if value >= self.max_value:
+            return self._num_buckets + 1
+        return min(int((math.log10(value) - self._log_min) * self.buckets_per_decade), self._num_buckets - 1) + 1
+
+    def _bucket_upper_bound(self, index: int) -> float:
+        if index == 0:
+            return self.min_value
+        if index > self._num_buckets:
+            return self.max
+        return 10 ** (self._log_min + index / self.buckets_per_decade)
+
+    def record(self, value: float) -> None:
+        """Records a value."""
+        self._counts[self._bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else math.nan
+
+    def percentile(self, q: float) -> float:
+        """Returns the approximate `q` percentile (0 <= q <= 100).
+
+        The upper bound of the bucket containing the percentile is
+        returned, clamped into the recorded min and max.
+        """
+        assert 0.0 <= q <= 100.0
+        if self.count == 0:
+            return math.nan
+        rank = max(math.ceil(self.count * q / 100), 1)
+        cumulative = 0
+        for index, count in enumerate(self._counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(max(self._bucket_upper_bound(index), self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        """Returns the count, mean, p50, p90, p99 and max."""
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max if self.count > 0 else math.nan,
+        }
+
+
+class StageProfiler:
+    """Records the elapsed time of named stages into `LogBucketHistogram`s.
+
+    Thread-safe: the stages are measured in the inference thread and the
+    summaries are read from the other threads (e.g., the web api handler).
+
+    Usage:
+        ```py
+        with profiler.measure("environment.observe"):
+            obs = environment.observe()
+
+        profiler.summaries()  # {"environment.observe": {"p50": ..., ...}}
+        ```
+    """
+
+    def __init__(self, min_value: float = 1e-6, max_value: float = 1e3, buckets_per_decade: int = 20) -> None:
+        """Constructs the profiler.
+
+        Args:
+            min_value: See `LogBucketHistogram`. The unit is seconds.
+            max_value: See `LogBucketHistogram`.
+            buckets_per_decade: See `LogBucketHistogram`.
+        """
+        self._histogram_args = (min_value, max_value, buckets_per_decade)
+        self._histograms: dict[str, LogBucketHistogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, elapsed: float) -> None:
+        """Records the elapsed seconds of the stage."""
+        with self._lock:
+            if (histogram := self._histograms.get(stage)) is None:
+                histogram = self._histograms[stage] = LogBucketHistogram(*self._histogram_args)
+            histogram.record(elapsed)
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """Measures the elapsed time of the `with` block as the stage.
+
+        NOTE: CUDA kernels run asynchronously, so the time of a model call
+            does not include the kernel execution unless its output is
+            transferred to the CPU in the block.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def summaries(self, reset: bool = False) -> dict[str, dict[str, float]]:
+        """Returns the summary of each stage.
+
+        Args:
+            reset: If True, clears the histograms after reading.
+        """
+        with self._lock:
+            summaries = {stage: histogram.summary() for stage, histogram in self._histograms.items()}
+            if reset:
+                for histogram in self._histograms.values():
+                    histogram.reset()
+        return summaries
+
+    def reset(self) -> None:
+        with self._lock:
+            for histogram in self._histograms.values():
+                histogram.reset()
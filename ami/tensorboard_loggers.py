@@ -1,9 +1,15 @@
+import atexit
+import logging
 import math
+import threading
 import time
-from collections import ChainMap
+from collections import ChainMap, defaultdict
 from collections.abc import Mapping, MutableSequence
+from enum import Enum
+from queue import Empty, Full, Queue
 from typing import Any, TypeAlias
 
+import torch
 from torch import Tensor
 from torch.utils.tensorboard import SummaryWriter
 from typing_extensions import override
@@ -11,9 +17,247 @@ from typing_extensions import override
 LoggableTypes: TypeAlias = Tensor | float | int | bool | str
 
 
+class DropPolicy(str, Enum):
+    """Enumerates the behaviours of `AsyncSummaryWriter` when its queue is
+    full."""
+
+    BLOCK = "block"  # Waits until the writer thread makes room.
+    DROP_NEWEST = "drop_newest"  # Discards the incoming record.
+    DROP_OLDEST = "drop_oldest"  # Discards the oldest queued record.
+
+
+class _ControlCommands(Enum):
+    FLUSH = "flush"
+    CLOSE = "close"
+
+
+# (method name of `SummaryWriter`, args, kwds) or (control command, completion event, None).
+_RecordType: TypeAlias = tuple[str, tuple[Any, ...], dict[str, Any]]
+_ControlRecordType: TypeAlias = tuple[_ControlCommands, threading.Event, None]
+
+
+class AsyncSummaryWriter:
+    """Writes the TensorBoard events from a dedicated writer thread.
+
+    The calls are pushed into a bounded queue and returned immediately, so the
+    caller (inference or training thread) does not pay for the device
+    synchronization of tensor scalars, protobuf encoding, figure rendering and
+    file I/O. The writer thread drains the queue in batches, and copies the
+    tensor scalars in each batch to the CPU with one transfer per device.
+
+    When the queue is full, the record is handled according to `drop_policy`,
+    and the number of dropped records is counted in `dropped_count` and
+    `dropped_counts` (per method name).
+
+    NOTE: The arguments are not copied except for detaching tensors. Do not
+        modify the logged objects (e.g. matplotlib figures) after passing them.
+    """
+
+    def __init__(
+        self,
+        writer: SummaryWriter,
+        max_queue_size: int = 1024,
+        drop_policy: DropPolicy | str = DropPolicy.DROP_NEWEST,
+        max_batch_size: int = 256,
+    ) -> None:
+        """Constructs the writer and starts the writer thread.
+
+        Args:
+            writer: The summary writer which actually writes the events.
+            max_queue_size: The max number of records waiting for writing.
+            drop_policy: The behaviour when the queue is full.
+            max_batch_size: The max number of records written at once.
+        """
+        self._writer = writer
+        self._drop_policy = DropPolicy(drop_policy)
+        self._max_batch_size = max_batch_size
+        self._queue: Queue[_RecordType | _ControlRecordType] = Queue(maxsize=max_queue_size)
+
+        self._counter_lock = threading.Lock()
+        self.dropped_count = 0
+        self.dropped_counts: defaultdict[str, int] = defaultdict(int)
+
+        self._logger = logging.getLogger(self.__class__.__name__)
+        self._closed = False
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def log_dir(self) -> str:
+        return self._writer.log_dir
+
+    def add_scalar(
+        self, tag: str, scalar_value: Any, global_step: int | None = None, walltime: float | None = None
+    ) -> None:
+        if isinstance(scalar_value, Tensor):
+            scalar_value = scalar_value.detach()
+        self._put("add_scalar", tag, scalar_value, global_step, walltime or time.time())
+
+    def add_image(self, tag: str, img_tensor: Any, global_step: int | None = None, **kwds: Any) -> None:
+        if isinstance(img_tensor, Tensor):
+            img_tensor = img_tensor.detach()
+        kwds.setdefault("walltime", time.time())
+        self._put("add_image", tag, img_tensor, global_step, **kwds)
+
+    def add_figure(self, tag: str, figure: Any, global_step: int | None = None, **kwds: Any) -> None:
+        """Renders the matplotlib figure in the writer thread."""
+        kwds.setdefault("walltime", time.time())
+        self._put("add_figure", tag, figure, global_step, **kwds)
+
+    def add_histogram(self, tag: str, values: Any, global_step: int | None = None, **kwds: Any) -> None:
+        if isinstance(values, Tensor):
+            values = values.detach()
+        kwds.setdefault("walltime", time.time())
+        self._put("add_histogram", tag, values, global_step, **kwds)
+
+    def add_text(self, tag: str, text_string: str, global_step: int | None = None, **kwds: Any) -> None:
+        kwds.setdefault("walltime", time.time())
+        self._put("add_text", tag, text_string, global_step, **kwds)
+
+    def add_hparams(self, hparam_dict: dict[str, Any], metric_dict: dict[str, Any], **kwds: Any) -> None:
+        self._put("add_hparams", hparam_dict, metric_dict, **kwds)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Waits until the all queued records are written to the disk.
+
+        Returns:
+            bool: Whether the flush has completed within `timeout`.
+        """
+        if self._closed:
+            return True
+        return self._put_control(_ControlCommands.FLUSH, timeout)
+
+    def close(self) -> None:
+        """Writes the remaining records and stops the writer thread."""
+        if self._closed:
+            return
+        self._put_control(_ControlCommands.CLOSE, None)
+        self._thread.join()
+        self._closed = True
+        self._writer.close()
+
+    def _put(self, method: str, *args: Any, **kwds: Any) -> None:
+        record: _RecordType = (method, args, kwds)
+        match self._drop_policy:
+            case DropPolicy.BLOCK:
+                self._queue.put(record)
+            case DropPolicy.DROP_NEWEST:
+                try:
+                    self._queue.put_nowait(record)
+                except Full:
+                    self._on_dropped(record)
+            case DropPolicy.DROP_OLDEST:
+                while True:
+                    try:
+                        self._queue.put_nowait(record)
+                        break
+                    except Full:
+                        self._discard_oldest()
+
+    def _discard_oldest(self) -> None:
+        try:
+            oldest = self._queue.get_nowait()
+        except Empty:
+            return
+        if isinstance(oldest[0], _ControlCommands):  # Control records must not be dropped.
+            self._queue.put(oldest)
+        else:
+            self._on_dropped(oldest)
+
+    def _on_dropped(self, record: _RecordType) -> None:
+        method, args, _ = record
+        with self._counter_lock:
+            self.dropped_count += 1
+            self.dropped_counts[method] += 1
+        if method == "add_figure":  # The figures are closed by `SummaryWriter.add_figure` if written.
+            import matplotlib.pyplot as plt
+
+            plt.close(args[1])
+
+    def _put_control(self, command: _ControlCommands, timeout: float | None) -> bool:
+        done = threading.Event()
+        self._queue.put((command, done, None))
+        return done.wait(timeout)
+
+    def _worker(self) -> None:
+        running = True
+        while running:
+            batch: list[_RecordType] = []
+            controls: list[_ControlRecordType] = []
+            record = self._queue.get()
+            while True:
+                if isinstance(record[0], _ControlCommands):
+                    controls.append(record)
+                    break  # Writes the records queued before the control record at first.
+                batch.append(record)
+                if len(batch) >= self._max_batch_size:
+                    break
+                try:
+                    record = self._queue.get_nowait()
+                except Empty:
+                    break
+
+            try:
+                self._write_batch(batch)
+            except Exception:
+                # Keeps draining the queue, otherwise the producers and `flush` wait forever.
+                self._logger.exception(f"Failed to write a batch of {len(batch)} records.")
+
+            for command, done, _ in controls:
+                try:
+                    self._writer.flush()
+                except Exception:
+                    self._logger.exception("Failed to flush the summary writer.")
+                finally:
+                    if command is _ControlCommands.CLOSE:
+                        running = False
+                    done.set()
+
+    def _write_batch(self, batch: list[_RecordType]) -> None:
+        """Writes the records, copying the tensor scalars to the CPU with one
+        transfer per device."""
+        scalar_indices: defaultdict[torch.device, list[int]] = defaultdict(list)
+        for i, (method, args, _) in enumerate(batch):
+            if method == "add_scalar" and isinstance(args[1], Tensor):
+                scalar_indices[args[1].device].append(i)
+
+        cpu_scalars: dict[int, float] = {}
+        for indices in scalar_indices.values():
+            values = torch.stack([batch[i][1][1].reshape(()).double() for i in indices]).cpu().tolist()
+            cpu_scalars.update(zip(indices, values))
+
+        for i, (method, args, kwds) in enumerate(batch):
+            if i in cpu_scalars:
+                tag, _, global_step, walltime = args
+                args = (tag, cpu_scalars[i], global_step, walltime)
+            try:
+                getattr(self._writer, method)(*args, **kwds)
+            except Exception:
+                self._logger.exception(f"Failed to write a record by {method!r}.")
+
+
 class TensorBoardLogger:
-    def __init__(self, log_dir: str, **tensorboard_kwds: Any):
-        self.tensorboard = SummaryWriter(log_dir=log_dir, **tensorboard_kwds)
+    def __init__(
+        self,
+        log_dir: str,
+        async_writing: bool = False,
+        max_queue_size: int = 1024,
+        drop_policy: DropPolicy | str = DropPolicy.DROP_NEWEST,
+        **tensorboard_kwds: Any,
+    ):
+        """Constructs the logger.
+
+        Args:
+            log_dir: The directory for saving the TensorBoard event files.
+            async_writing: Whether to write the events in the background thread. See `AsyncSummaryWriter`.
+            max_queue_size: The max number of records waiting for writing. Used if `async_writing` is True.
+            drop_policy: The behaviour when the queue of the writer is full. Used if `async_writing` is True.
+            **tensorboard_kwds: Keyword arguments for `SummaryWriter`.
+        """
+        self.tensorboard: SummaryWriter | AsyncSummaryWriter = SummaryWriter(log_dir=log_dir, **tensorboard_kwds)
+        if async_writing:
+            self.tensorboard = AsyncSummaryWriter(self.tensorboard, max_queue_size, drop_policy)
         self.global_step = 0
 
     @property
@@ -1,12 +1,18 @@
 import time
 from pathlib import Path
 
-import numpy as np
+import torch
+import torch.nn as nn
 from typing_extensions import override
 
-from ..data.utils import DataCollectorsDict
+from ..data.trajectory_recorder import TrajectoryRecorder
+from ..data.utils import DataArrivalNotifier, DataCollectorsDict
+from ..interactions.fixed_interval_interaction import FixedIntervalInteraction
 from ..interactions.interaction import Interaction
+from ..models.model_wrapper import ThreadSafeInferenceWrapper
 from ..models.utils import InferenceWrappersDict
+from ..profiling import StageProfiler
+from ..tensorboard_loggers import TensorBoardLogger
 from .background_thread import BackgroundThread
 from .shared_object_names import SharedObjectNames
 from .thread_types import ThreadTypes
@@ -17,20 +23,47 @@ class InferenceThread(BackgroundThread):
     THREAD_TYPE = ThreadTypes.INFERENCE
 
     def __init__(
-        self, interaction: Interaction, data_collectors: DataCollectorsDict, log_step_time_interval: float = 60.0
+        self,
+        interaction: Interaction,
+        data_collectors: DataCollectorsDict,
+        log_step_time_interval: float = 60.0,
+        notify_new_data_every_n: int = 1,
+        profile_stages: bool = True,
+        tensorboard_logger: TensorBoardLogger | None = None,
+        trajectory_recorder: TrajectoryRecorder | None = None,
     ) -> None:
         """Constructs the inference thread class.
 
         Args:
             log_step_time_interval: The interval for logging the elapsed time of `interacition.step`.
+            notify_new_data_every_n: The number of collected steps to wake up the training thread waiting for new data.
+            profile_stages: Whether to measure each stage of the interaction step and each model inference.
+                If False, only the whole step time is measured.
+            tensorboard_logger: The logger for the percentiles of the elapsed times.
+            trajectory_recorder: The recorder which writes all collected step data to the disk.
         """
         super().__init__()
 
         self.interaction = interaction
         self.data_collectors = data_collectors
         self.log_step_time_interval = log_step_time_interval
+        self.profile_stages = profile_stages
+        self.tensorboard_logger = tensorboard_logger
+        self.trajectory_recorder = trajectory_recorder
+
+        self.profiler = StageProfiler()
+        if profile_stages:
+            self.interaction.attach_profiler(self.profiler)
+
+        self.data_arrival_notifier = DataArrivalNotifier(notify_new_data_every_n)
+        self.data_collectors.attach_notifier(self.data_arrival_notifier)
+        if trajectory_recorder is not None:
+            self.data_collectors.add_subscriber(trajectory_recorder)
 
         self.share_object(SharedObjectNames.DATA_USERS, data_collectors.get_data_users())
+        self.share_object(SharedObjectNames.DATA_ARRIVAL_NOTIFIER, self.data_arrival_notifier)
+        self.share_object(SharedObjectNames.DATA_COLLECTORS, data_collectors)
+        self.share_object(SharedObjectNames.INFERENCE_PROFILER, self.profiler)
 
     def on_shared_objects_pool_attached(self) -> None:
         super().on_shared_objects_pool_attached()
@@ -43,52 +76,109 @@ class InferenceThread(BackgroundThread):
         self.interaction.agent.attach_data_collectors(self.data_collectors)
         self.interaction.agent.attach_inference_models(self.inference_models)
 
+        if self.profile_stages:
+            attached_ids: set[int] = set()
+            for name, wrapper in self.inference_models.items():
+                if id(wrapper) not in attached_ids:  # Skip aliases.
+                    wrapper.attach_profiler(self.profiler, f"model.{name}")
+                    attached_ids.add(id(wrapper))
+
     def worker(self) -> None:
         self.logger.info("Start inference thread.")
 
         try:
+            if self.trajectory_recorder is not None:
+                self.trajectory_recorder.start()
             self.interaction.setup()
 
             self.logger.debug("Start the interaction loop.")
 
-            elapsed_times: list[float] = []
             previous_logged_time = time.perf_counter()
 
             while self.thread_command_handler.manage_loop():
-                start = time.perf_counter()
-
-                self.interaction.step()
-                time.sleep(1e-9)  # GILのコンテキストスイッチングを意図的に呼び出す。
-
-                elapsed_times.append(time.perf_counter() - start)
+                with self.profiler.measure("step"):
+                    self.interaction.step()
 
                 if time.perf_counter() - previous_logged_time > self.log_step_time_interval:
-                    mean_elapsed_time = np.mean(elapsed_times)
-                    std_elapsed_time = np.std(elapsed_times)
-                    self.logger.info(
-                        f"Step time: {mean_elapsed_time:.3e} ± {std_elapsed_time:.3e} [s] in {len(elapsed_times)} steps."
-                    )
-                    elapsed_times.clear()
+                    self.log_profile()
                     previous_logged_time = time.perf_counter()
 
             self.logger.debug("End the interaction loop.")
         finally:
             self.interaction.teardown()
+            if self.trajectory_recorder is not None:
+                self.trajectory_recorder.close()
 
         self.logger.info("End the inference thread.")
 
+    def log_profile(self) -> None:
+        """Logs the elapsed time percentiles of the stages and the statistics
+        of the interval adjustor, and resets them."""
+        summaries = self.profiler.summaries(reset=True)
+        for stage, summary in summaries.items():
+            if summary["count"] == 0:
+                continue
+            message = (
+                f"{stage} time: p50 {summary['p50']:.3e}, p90 {summary['p90']:.3e}, p99 {summary['p99']:.3e}, "
+                f"max {summary['max']:.3e} [s] in {summary['count']} calls."
+            )
+            if stage == "step":
+                self.logger.info(message)
+            else:
+                self.logger.debug(message)
+
+            if self.tensorboard_logger is not None:
+                for key in ("p50", "p90", "p99", "max"):
+                    self.tensorboard_logger.log(f"inference-profile/{stage}/{key}", summary[key], force_log=True)
+        if isinstance(self.interaction, FixedIntervalInteraction):
+            adjustor_stats = self.interaction.interval_adjustor.statistics(reset=True)
+            if len(adjustor_stats) > 0:
+                self.logger.info("Interval adjustor: " + ", ".join(f"{k} {v:.3g}" for k, v in adjustor_stats.items()))
+            if self.tensorboard_logger is not None:
+                for key, value in adjustor_stats.items():
+                    self.tensorboard_logger.log(f"interval-adjustor/{key}", value, force_log=True)
+
+        if self.tensorboard_logger is not None:
+            self.tensorboard_logger.update()
+
+    def _inference_thread_only_models(self) -> dict[str, ThreadSafeInferenceWrapper[nn.Module]]:
+        """Returns the models which are not saved by the training thread,
+        without aliases."""
+        models: dict[str, ThreadSafeInferenceWrapper[nn.Module]] = {}
+        for name, wrapper in sorted(self.inference_models.items()):
+            if wrapper.inference_thread_only and all(wrapper is not w for w in models.values()):
+                models[name] = wrapper
+        return models
+
     @override
     def save_state(self, path: Path) -> None:
         path.mkdir()
         self.interaction.save_state(path / "interaction")
+        if self.trajectory_recorder is not None:
+            self.trajectory_recorder.flush()
+
+        models_path = path / "inference_thread_only_models"
+        models_path.mkdir()
+        for name, wrapper in self._inference_thread_only_models().items():
+            torch.save(wrapper.state_dict(), models_path / (name + ".pt"))
 
     @override
     def load_state(self, path: Path) -> None:
         self.interaction.load_state(path / "interaction")
 
+        models_path = path / "inference_thread_only_models"
+        for name, wrapper in self._inference_thread_only_models().items():
+            model_path = models_path / (name + ".pt")
+            if not model_path.exists():
+                self.logger.warning(f"The state of the inference thread only model {name!r} is not found.")
+                continue
+            wrapper.load_state_dict(torch.load(model_path, map_location="cpu"))
+
     @override
     def on_paused(self) -> None:
         self.interaction.on_paused()
+        if self.trajectory_recorder is not None:
+            self.trajectory_recorder.flush()
 
     @override
     def on_resumed(self) -> None:
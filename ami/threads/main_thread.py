@@ -1,7 +1,10 @@
+import threading
 import time
-from typing import TypeAlias
+from pathlib import Path
+from typing import Callable, TypeAlias
 
 from ..checkpointing.checkpoint_schedulers import BaseCheckpointScheduler
+from ..profiling import StageProfiler
 from .base_thread import BaseThread
 from .shared_object_names import SharedObjectNames
 from .thread_control import ExceptionNotifier, ThreadController, ThreadControllerStatus
@@ -31,6 +34,7 @@ class MainThread(BaseThread):
         timeout_for_all_threads_pause: float = 60.0,
         max_attempts_to_pause_all_threads: int = 3,
         max_uptime: float = float("inf"),
+        background_checkpoint_writing: bool = True,
     ) -> None:
         """Constructs the main thread object.
 
@@ -40,6 +44,8 @@ class MainThread(BaseThread):
             timeout_for_all_threads_pause: Timeout seconds to wait for all threads pause. (for saving checkpoint.)
             max_attempts_to_pause_all_threads: Number of trials for failed attempts to pause all threads.
             max_uptime: Maximum system uptime. When this time is reached, the system will terminate.
+            background_checkpoint_writing: Whether to write the checkpoint in the background after resuming the
+                threads. If False, the threads are resumed after writing it.
         """
         super().__init__()
 
@@ -51,6 +57,8 @@ class MainThread(BaseThread):
         self._timeout_for_all_threads_pause = timeout_for_all_threads_pause
         self._max_attempts_to_pause_all_threads = max_attempts_to_pause_all_threads
         self._max_uptime = max_uptime
+        self._background_checkpoint_writing = background_checkpoint_writing
+        self._checkpoint_writer_thread: threading.Thread | None = None
 
         self.share_object(SharedObjectNames.THREAD_COMMAND_HANDLERS, self.thread_controller.handlers)
 
@@ -60,6 +68,9 @@ class MainThread(BaseThread):
             for thread_type in BACKGROUND_THREAD_TYPES
         }
 
+        profiler: StageProfiler = self.get_shared_object(ThreadTypes.INFERENCE, SharedObjectNames.INFERENCE_PROFILER)
+        self.web_api_handler.attach_metrics_provider(profiler.summaries)
+
     def worker(self) -> None:
         self.logger.info("Start main thread.")
         self.logger.info(f"Maxmum uptime is set to {self._max_uptime}.")
@@ -95,6 +106,7 @@ class MainThread(BaseThread):
         finally:
             self.logger.info("Shutting down...")
             self.thread_controller.shutdown()
+            self.wait_for_checkpoint_writing()
 
         self.logger.info("End main thread.")
 
@@ -115,10 +127,16 @@ class MainThread(BaseThread):
                     self.save_checkpoint()
 
     def save_checkpoint(self) -> None:
-        """Saves a checkpoint after pausing the all background thread."""
+        """Saves a checkpoint after pausing the all background thread.
+
+        The threads are paused only while taking the in-memory snapshot
+        of them, and the snapshot is written after resuming.
+        """
 
         self.logger.info("Saving checkpoint...")
+        self.wait_for_checkpoint_writing()
 
+        pause_start_time = time.perf_counter()
         for i in range(self._max_attempts_to_pause_all_threads):
             self.thread_controller.pause()
 
@@ -135,10 +153,34 @@ class MainThread(BaseThread):
             self.logger.error("Failed to save checkpoint because the thread pause process could not be completed... ")
             return
 
-        ckpt_path = self.checkpoint_scheduler.checkpointing.save_checkpoint()
-        self.logger.info(f"Saved a checkpoint to '{ckpt_path}'")
+        try:
+            ckpt_path, write = self.checkpoint_scheduler.checkpointing.take_snapshot()
+        finally:
+            self.thread_controller.resume()
+        self.logger.info(f"Took a snapshot. Pause time: {time.perf_counter() - pause_start_time:.3f} [s].")
 
-        self.thread_controller.resume()
+        if self._background_checkpoint_writing:
+            self._checkpoint_writer_thread = threading.Thread(target=self._write_checkpoint, args=(ckpt_path, write))
+            self._checkpoint_writer_thread.start()
+        else:
+            self._write_checkpoint(ckpt_path, write)
+
+    def _write_checkpoint(self, ckpt_path: Path, write: Callable[[], None]) -> None:
+        start_time = time.perf_counter()
+        try:
+            write()
+        except Exception:
+            self.logger.exception(f"Failed to write the checkpoint to '{ckpt_path}'")
+            return
+        elapsed = time.perf_counter() - start_time
+        self.logger.info(f"Saved a checkpoint to '{ckpt_path}'. Write time: {elapsed:.3f} [s].")
+
+    def wait_for_checkpoint_writing(self) -> None:
+        """Waits for the checkpoint being written in the background."""
+        if self._checkpoint_writer_thread is not None and self._checkpoint_writer_thread.is_alive():
+            self.logger.info("Waiting for the previous checkpoint writing...")
+            self._checkpoint_writer_thread.join()
+        self._checkpoint_writer_thread = None
 
     def check_background_threads_exception(self) -> bool:
         """Checks the some exceptions has occurred in the background
@@ -6,3 +6,6 @@ class SharedObjectNames(str, Enum):
     DATA_USERS = auto()
     INFERENCE_MODELS = auto()
     EXCEPTION_NOTIFIER = auto()
+    DATA_ARRIVAL_NOTIFIER = auto()
+    DATA_COLLECTORS = auto()
+    INFERENCE_PROFILER = auto()
@@ -0,0 +1,579 @@
+"""Process based training backend.
+
+`TrainingProcessThread` takes the place of the `TrainingThread` in the main
+process, and runs the actual `TrainingThread` in a spawned child process so
+that the python work of the trainers does not compete with the inference
+thread for the GIL.
+
+Transport between the processes:
+    - Collected data: The step data collected in the inference thread are
+        stacked into a chunk per key, and sent to the child process through
+        the `torch.multiprocessing` queue (the tensor storages are moved to
+        the shared memory). The child process collects them into its own data
+        collectors. When a data user is cleared in the child process, the
+        generation of the collector is incremented, and the chunks of old
+        generations are discarded.
+    - Model weights: The state dicts of the inference models are allocated in
+        the shared memory once. The child process copies the trained weights
+        into them with a version counter, and this thread loads the updated
+        ones into the inference models.
+    - Commands: pause, resume, save, load and shutdown are sent in the same
+        queue as the data chunks, and acknowledged by the child process.
+        For the checkpoint snapshot, the child process takes the in-memory
+        copy at `snapshot` and writes it in its writer thread. The `write`
+        command is acknowledged after the copy is written.
+"""
+import atexit
+import logging
+import multiprocessing.queues
+import multiprocessing.synchronize
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, TypeAlias
+
+import hydra
+import torch
+import torch.multiprocessing as mp
+from omegaconf import DictConfig, OmegaConf
+from torch import Tensor
+from typing_extensions import override
+
+from ..data.interfaces import ThreadSafeDataCollector, ThreadSafeDataUser
+from ..data.step_data import StepData
+from ..data.utils import DataArrivalNotifier, DataCollectorsDict, DataUsersDict
+from ..models.model_wrapper import ThreadSafeInferenceWrapper
+from ..models.utils import InferenceWrappersDict, ModelWrappersDict
+from .background_thread import BackgroundThread
+from .shared_object_names import SharedObjectNames
+from .thread_control import ThreadController
+from .thread_types import ThreadTypes
+
+# (shared memory state dict, version counter, lock) for each published model.
+PublishedModelType = tuple[dict[str, Tensor], Any, multiprocessing.synchronize.Lock]
+
+# The commands, data chunks and responses are sent as tuples.
+# Quoted because the queue class is not subscriptable at runtime.
+MessageQueueType: TypeAlias = "multiprocessing.queues.Queue[tuple[Any, ...]]"
+
+# The interval [s] to release the response lock while waiting for the acknowledgement.
+RESPONSE_POLL_INTERVAL = 0.1
+
+
+class _Commands:
+    DATA = "data"
+    PAUSE = "pause"
+    RESUME = "resume"
+    SAVE = "save"
+    SNAPSHOT = "snapshot"
+    WRITE = "write"
+    LOAD = "load"
+    SHUTDOWN = "shutdown"
+    EXIT = "exit"
+
+
+class _Responses:
+    ACK = "ack"
+    ERROR = "error"
+    CLEAR = "clear"
+
+
+class TrainingProcessThread(BackgroundThread):
+    """Proxy of the training thread which runs the trainers in a child
+    process.
+
+    It keeps the same contract as `TrainingThread` for the other threads:
+    the thread type is TRAINING, the inference models are shared as
+    `INFERENCE_MODELS`, and pause, resume, shutdown and checkpointing are
+    forwarded to the child process.
+
+    NOTE: The data added times of the buffers in the child process are the
+        received times, not the collected times.
+    """
+
+    THREAD_TYPE = ThreadTypes.TRAINING
+
+    def __init__(
+        self,
+        models: ModelWrappersDict,
+        models_cfg: DictConfig,
+        trainers_cfg: DictConfig,
+        data_collectors_cfg: DictConfig,
+        training_thread_cfg: DictConfig | None = None,
+        data_transfer_interval: float = 0.5,
+        publish_interval: float = 0.5,
+        command_timeout: float | None = 600.0,
+    ) -> None:
+        """Constructs the proxy thread.
+
+        Args:
+            models: The models instantiated in the main process. Their inference models are used in the inference
+                thread, and their initial weights are sent to the child process. The training models are moved to
+                the cpu because they are trained in the child process.
+            models_cfg: The config for instantiating the models in the child process.
+            trainers_cfg: The config for instantiating the trainers in the child process.
+            data_collectors_cfg: The config for instantiating the data collectors in the child process.
+            training_thread_cfg: The config of `TrainingThread` run in the child process.
+            data_transfer_interval: The interval for sending the collected data to the child process.
+            publish_interval: The interval for checking the weights published by the child process.
+            command_timeout: The timeout for waiting the acknowledgement of the commands.
+        """
+        super().__init__()
+
+        self.models = models
+        self.data_transfer_interval = data_transfer_interval
+        self.publish_interval = publish_interval
+        self.command_timeout = command_timeout
+
+        # Interpolations are resolved here because the child process does not have the root config.
+        def to_container(cfg: DictConfig | None) -> Any:
+            return None if cfg is None else OmegaConf.to_container(cfg, resolve=True)
+
+        self._process_args: dict[str, Any] = {
+            "models_cfg": to_container(models_cfg),
+            "trainers_cfg": to_container(trainers_cfg),
+            "data_collectors_cfg": to_container(data_collectors_cfg),
+            "training_thread_cfg": to_container(training_thread_cfg)
+            or {"_target_": "ami.threads.training_thread.TrainingThread"},
+        }
+
+        self.share_object(SharedObjectNames.INFERENCE_MODELS, models.inference_wrappers_dict)
+        removed_names = self.models.remove_inference_thread_only_models()
+        if len(removed_names) != 0:
+            self.logger.debug(f"The inference thread only models are not trained in the process: {removed_names!r}")
+
+        self._context = mp.get_context("spawn")
+        self._published_models = self._allocate_published_models(models.inference_wrappers_dict)
+        self._loaded_versions = {name: 0 for name in self._published_models}
+        self._offload_training_models()
+
+        self._command_queue: MessageQueueType = self._context.Queue()
+        self._response_queue: MessageQueueType = self._context.Queue()
+        self._response_lock = threading.Lock()
+        self._command_lock = threading.Lock()
+        self._command_id = 0
+        self._acked_ids: set[int] = set()
+        self._process: Any = None
+        self._load_path: Path | None = None
+
+        self._pending_steps: list[StepData] = []
+        self._pending_lock = threading.Lock()
+        self._generations: dict[str, int] = {}
+
+    def _allocate_published_models(self, inference_models: InferenceWrappersDict) -> dict[str, PublishedModelType]:
+        published: dict[str, PublishedModelType] = {}
+        published_ids: set[int] = set()
+        for name, wrapper in inference_models.items():
+            if name not in self.models or id(wrapper) in published_ids:  # Inference thread only or alias.
+                continue
+            published_ids.add(id(wrapper))
+            state_dict = {k: v.detach().cpu().clone().share_memory_() for k, v in wrapper.model.state_dict().items()}
+            published[name] = (state_dict, self._context.Value("q", 0), self._context.Lock())
+        return published
+
+    def _offload_training_models(self) -> None:
+        """Moves the training models of the main process to the cpu.
+
+        They are trained in the child process, so only the inference
+        models are kept on the computing device.
+        """
+        for wrapper in self.models.values():
+            wrapper.to(torch.device("cpu"))
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def on_shared_objects_pool_attached(self) -> None:
+        super().on_shared_objects_pool_attached()
+
+        self.data_collectors: DataCollectorsDict = self.get_shared_object(
+            ThreadTypes.INFERENCE, SharedObjectNames.DATA_COLLECTORS
+        )
+        self._generations = {name: 0 for name in self.data_collectors}
+        self.data_collectors.add_subscriber(self._on_step_data_collected)
+
+    def _on_step_data_collected(self, step_data: StepData) -> None:
+        """Called in the inference thread."""
+        with self._pending_lock:
+            self._pending_steps.append(StepData(step_data))
+
+    def start(self) -> None:
+        self._process = self._context.Process(
+            target=_training_process_main,
+            kwargs=dict(
+                **self._process_args,
+                published_models=self._published_models,
+                command_queue=self._command_queue,
+                response_queue=self._response_queue,
+                load_path=None if self._load_path is None else str(self._load_path),
+                publish_interval=self.publish_interval,
+                log_level=logging.getLogger().level,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        atexit.register(self.close)
+        super().start()
+
+    def worker(self) -> None:
+        self.logger.info("Starts the training process proxy.")
+
+        previous_transfer_time = time.perf_counter()
+        try:
+            while self.thread_command_handler.manage_loop():
+                if not self._process.is_alive():
+                    raise RuntimeError(f"The training process exited unexpectedly ({self._process.exitcode}).")
+
+                if time.perf_counter() - previous_transfer_time > self.data_transfer_interval:
+                    self.transfer_data()
+                    previous_transfer_time = time.perf_counter()
+
+                self.handle_responses()
+                self.load_published_models()
+                time.sleep(min(self.data_transfer_interval, self.publish_interval))
+        except Exception:
+            self.close()
+            raise
+
+        self.shutdown_process()
+
+        self.logger.info("End the training process proxy.")
+
+    def transfer_data(self) -> None:
+        """Sends the pending step data as a chunk to the child process."""
+        with self._pending_lock:
+            steps, self._pending_steps = self._pending_steps, []
+        for collector in self.data_collectors.values():
+            collector.renew()  # The data are stored in the child process.
+        if len(steps) == 0:
+            return
+
+        chunk: dict[Any, Any] = {}
+        for key in steps[0].keys():
+            values = [step[key] for step in steps]
+            if all(isinstance(v, Tensor) for v in values):
+                try:
+                    chunk[key] = torch.stack([v.detach().cpu() for v in values])
+                    continue
+                except RuntimeError:  # Different shapes.
+                    pass
+            chunk[key] = values
+        self._command_queue.put((_Commands.DATA, dict(self._generations), len(steps), chunk))
+
+    def handle_responses(self, wait_ack_id: int | None = None, timeout: float | None = None) -> None:
+        """Handles the responses from the child process.
+
+        Args:
+            wait_ack_id: If specified, blocks until the acknowledgement of the command id is received.
+            timeout: The timeout for waiting the acknowledgement.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            # The lock is released at each poll, so the other threads waiting for their commands can proceed.
+            with self._response_lock:
+                if wait_ack_id in self._acked_ids:  # Received by the other thread.
+                    self._acked_ids.remove(wait_ack_id)
+                    return
+                try:
+                    if wait_ack_id is None:
+                        response = self._response_queue.get_nowait()
+                    else:
+                        remaining = RESPONSE_POLL_INTERVAL
+                        if deadline is not None:
+                            remaining = min(max(deadline - time.perf_counter(), 0.0), remaining)
+                        response = self._response_queue.get(timeout=remaining)
+                except queue.Empty:
+                    if wait_ack_id is None:
+                        return
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        raise TimeoutError(f"The training process did not respond in {timeout} seconds.")
+                    continue
+
+                match response:
+                    case (_Responses.CLEAR, name, generation):
+                        self._generations[name] = generation
+                    case (_Responses.ERROR, message):
+                        raise RuntimeError(f"An error occurred in the training process: {message}")
+                    case (_Responses.ACK, command_id):
+                        if command_id == wait_ack_id:
+                            return
+                        self._acked_ids.add(command_id)
+
+    def send_command(self, command: str, *args: Any) -> int:
+        """Sends the command to the child process and waits for the
+        acknowledgement.
+
+        Returns:
+            int: The id of the command.
+        """
+        with self._command_lock:
+            self._command_id += 1
+            command_id = self._command_id
+            self._command_queue.put((command, command_id, *args))
+        self.handle_responses(command_id, self.command_timeout)
+        return command_id
+
+    def load_published_models(self) -> None:
+        """Loads the weights published by the child process into the
+        inference models."""
+        inference_models = self.models.inference_wrappers_dict
+        for name, (state_dict, version, lock) in self._published_models.items():
+            if version.value == self._loaded_versions[name]:
+                continue
+            with lock:
+                inference_models[name].load_state_dict(state_dict)
+                self._loaded_versions[name] = version.value
+
+    def shutdown_process(self) -> None:
+        """Stops training in the child process.
+
+        The process is kept alive to save the final checkpoint, and
+        exits at :meth:`close`.
+        """
+        if self._process is not None and self._process.is_alive():
+            self.send_command(_Commands.SHUTDOWN)
+
+    def close(self) -> None:
+        """Exits the child process."""
+        if self._process is None or not self._process.is_alive():
+            return
+        try:
+            self.send_command(_Commands.EXIT)
+        except (TimeoutError, RuntimeError) as e:
+            self.logger.error(f"Failed to exit the training process: {e!r}")
+        self._process.join(self.command_timeout)
+        if self._process.is_alive():
+            self.logger.error("The training process did not exit. Terminating...")
+            self._process.terminate()
+
+    @override
+    def save_state(self, path: Path) -> None:
+        self.transfer_data()
+        self.send_command(_Commands.SAVE, str(path))
+
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Takes the snapshot in the child process, and returns the function
+        which waits for the child process to write it."""
+        self.transfer_data()
+        snapshot_id = self.send_command(_Commands.SNAPSHOT, str(path))
+
+        def write() -> None:
+            self.send_command(_Commands.WRITE, snapshot_id)
+
+        return write
+
+    @override
+    def load_state(self, path: Path) -> None:
+        if self._process is None:  # Loaded after spawning the process.
+            self._load_path = path
+        else:
+            self.send_command(_Commands.LOAD, str(path))
+
+    @override
+    def on_paused(self) -> None:
+        self.transfer_data()  # The queued data are processed before pausing.
+        self.send_command(_Commands.PAUSE)
+        self.load_published_models()
+
+    @override
+    def on_resumed(self) -> None:
+        self.send_command(_Commands.RESUME)
+
+
+class _GenerationCountingDataUser(ThreadSafeDataUser[Any]):
+    """Data user which notifies when it is cleared."""
+
+    def __init__(self, collector: ThreadSafeDataCollector[Any], on_cleared: Callable[[], None]) -> None:
+        super().__init__(collector)
+        self._on_cleared = on_cleared
+
+    @override
+    def clear(self) -> None:
+        super().clear()
+        self._on_cleared()
+
+
+class _ModelsPublisher:
+    """Copies the trained inference models into the shared memory."""
+
+    def __init__(
+        self, inference_models: InferenceWrappersDict, published_models: dict[str, PublishedModelType]
+    ) -> None:
+        self.inference_models = inference_models
+        self.published_models = published_models
+        self._published_versions: dict[str, int] = {}
+
+    def publish(self, force: bool = False) -> None:
+        for name, (state_dict, version, lock) in self.published_models.items():
+            wrapper: ThreadSafeInferenceWrapper[Any] = self.inference_models[name]
+            current_version = wrapper.version
+            if not force and self._published_versions.get(name) == current_version:
+                continue
+            with lock:
+                wrapper.copy_state_dict_to(state_dict)
+                version.value += 1
+            self._published_versions[name] = current_version
+
+
+def _training_process_main(
+    models_cfg: dict[str, Any],
+    trainers_cfg: dict[str, Any] | None,
+    data_collectors_cfg: dict[str, Any] | None,
+    training_thread_cfg: dict[str, Any],
+    published_models: dict[str, PublishedModelType],
+    command_queue: MessageQueueType,
+    response_queue: MessageQueueType,
+    load_path: str | None,
+    publish_interval: float,
+    log_level: int,
+) -> None:
+    """The entry point of the training process."""
+    from ..hydra_instantiators import (
+        instantiate_data_collectors,
+        instantiate_models,
+        instantiate_trainers,
+    )
+    from .training_thread import TrainingThread
+
+    logging.basicConfig(level=log_level, format="[%(asctime)s][%(name)s][%(levelname)s] - %(message)s")
+    logger = logging.getLogger("training_process")
+
+    try:
+        models = instantiate_models(OmegaConf.create(models_cfg))
+        models.send_to_default_device()
+        for name, (state_dict, _, _) in published_models.items():
+            models[name].model.load_state_dict(state_dict)  # Starts from the same weights as the main process.
+        trainers = instantiate_trainers(None if trainers_cfg is None else OmegaConf.create(trainers_cfg))
+        data_collectors = instantiate_data_collectors(
+            None if data_collectors_cfg is None else OmegaConf.create(data_collectors_cfg)
+        )
+
+        notifier = DataArrivalNotifier()
+        data_collectors.attach_notifier(notifier)
+        generations = {name: 0 for name in data_collectors}
+
+        def create_on_cleared(name: str) -> Callable[[], None]:
+            def on_cleared() -> None:
+                generations[name] += 1
+                response_queue.put((_Responses.CLEAR, name, generations[name]))
+
+            return on_cleared
+
+        data_users = DataUsersDict(
+            {name: _GenerationCountingDataUser(c, create_on_cleared(name)) for name, c in data_collectors.items()}
+        )
+
+        training_thread: TrainingThread = hydra.utils.instantiate(
+            OmegaConf.create(training_thread_cfg), trainers=trainers, models=models
+        )
+        controller = ThreadController()
+        training_thread.attach_shared_object_pool(
+            OrderedDict(
+                [
+                    (ThreadTypes.MAIN, OrderedDict([(SharedObjectNames.THREAD_COMMAND_HANDLERS, controller.handlers)])),
+                    (
+                        ThreadTypes.INFERENCE,
+                        OrderedDict(
+                            [
+                                (SharedObjectNames.DATA_USERS, data_users),
+                                (SharedObjectNames.DATA_ARRIVAL_NOTIFIER, notifier),
+                            ]
+                        ),
+                    ),
+                    (ThreadTypes.TRAINING, training_thread.shared_objects_from_this_thread),
+                ]
+            )
+        )
+        if load_path is not None:
+            training_thread.load_state(Path(load_path))
+
+        publisher = _ModelsPublisher(models.inference_wrappers_dict, published_models)
+        publisher.publish(force=True)
+        training_thread.start()
+    except Exception as e:
+        logger.exception("Failed to start the training process.")
+        response_queue.put((_Responses.ERROR, repr(e)))
+        return
+
+    handler = controller.handlers[ThreadTypes.TRAINING]
+    snapshot_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SnapshotWriter")
+    pending_writes: dict[int, Future[None]] = {}
+
+    def create_on_written(command_id: int) -> Callable[[Future[None]], None]:
+        def on_written(future: Future[None]) -> None:
+            if (e := future.exception()) is not None:
+                logger.error(f"Failed to write the snapshot: {e!r}")
+                response_queue.put((_Responses.ERROR, repr(e)))
+            else:
+                response_queue.put((_Responses.ACK, command_id))
+
+        return on_written
+
+    while True:
+        try:
+            command = command_queue.get(timeout=publish_interval)
+        except queue.Empty:
+            command = None
+
+        if not controller.is_shutdown():
+            publisher.publish()
+            if not training_thread.is_alive():
+                response_queue.put((_Responses.ERROR, "The training thread has stopped."))
+                break
+        if command is None:
+            continue
+
+        try:
+            match command:
+                case (_Commands.DATA, chunk_generations, length, chunk):
+                    names = [name for name in data_collectors if chunk_generations[name] >= generations[name]]
+                    for i in range(length):
+                        step_data = StepData(
+                            {k: v[i].clone() if isinstance(v, Tensor) else v[i] for k, v in chunk.items()}
+                        )
+                        if len(names) == len(data_collectors):
+                            data_collectors.collect(step_data)
+                        else:
+                            for name in names:
+                                data_collectors[name].collect(step_data)
+                            notifier.notify()
+                    continue
+                case (_Commands.PAUSE, command_id):
+                    controller.pause()
+                    handler.wait_for_loop_pause()
+                    publisher.publish()
+                case (_Commands.RESUME, command_id):
+                    controller.resume()
+                case (_Commands.SAVE, command_id, path):
+                    training_thread.save_state(Path(path))
+                case (_Commands.SNAPSHOT, command_id, path):
+                    pending_writes[command_id] = snapshot_writer.submit(training_thread.snapshot_state(Path(path)))
+                case (_Commands.WRITE, command_id, snapshot_id):
+                    # Acknowledged when written, so the data are received while writing.
+                    pending_writes.pop(snapshot_id).add_done_callback(create_on_written(command_id))
+                    continue
+                case (_Commands.LOAD, command_id, path):
+                    training_thread.load_state(Path(path))
+                    publisher.publish(force=True)
+                case (_Commands.SHUTDOWN, command_id):
+                    # Stops training, but keeps serving the commands for saving the final checkpoint.
+                    controller.shutdown()
+                    training_thread.join()
+                    publisher.publish()
+                case (_Commands.EXIT, command_id):
+                    response_queue.put((_Responses.ACK, command_id))
+                    break
+                case _:
+                    raise ValueError(f"Unknown command: {command!r}")
+            response_queue.put((_Responses.ACK, command_id))
+        except Exception as e:
+            logger.exception(f"Failed to process the command {command[0]!r}.")
+            response_queue.put((_Responses.ERROR, repr(e)))
+
+    snapshot_writer.shutdown()
+    if not controller.is_shutdown():
+        controller.shutdown()
+        training_thread.join()
@@ -1,10 +1,15 @@
 import time
 from pathlib import Path
+from typing import Callable
 
 from typing_extensions import override
 
-from ..data.utils import DataUsersDict
+from ..checkpointing.snapshot import chain_writers
+from ..data.utils import DataArrivalNotifier, DataUsersDict
 from ..models.utils import ModelWrappersDict
+from ..trainers.base_trainer import BaseTrainer
+from ..trainers.selection_policies import BaseTrainerSelectionPolicy
+from ..trainers.time_budget_scheduler import TimeBudgetScheduler
 from ..trainers.utils import TrainersList
 from .background_thread import BackgroundThread
 from .shared_object_names import SharedObjectNames
@@ -15,17 +20,32 @@ class TrainingThread(BackgroundThread):
 
     THREAD_TYPE = ThreadTypes.TRAINING
 
-    def __init__(self, trainers: TrainersList, models: ModelWrappersDict, training_interval: float = 1e-10) -> None:
+    def __init__(
+        self,
+        trainers: TrainersList,
+        models: ModelWrappersDict,
+        training_interval: float = 0.0,
+        scheduler: TimeBudgetScheduler | None = None,
+        selection_policy: BaseTrainerSelectionPolicy | None = None,
+        idle_wait_timeout: float = 1.0,
+    ) -> None:
         """Constructs the training thread class with the trainers and models.
 
         Args:
-            training_interval: The interval to run a trainer.
+            training_interval: The sleep time after running a trainer. No sleep if 0.
+            scheduler: The time budgeted scheduler. If None, the trainers are run to completion one by one.
+            selection_policy: The policy for selecting the trainer to be run next. If None, the trainers are
+                selected in strict round-robin. Not used if `scheduler` is specified.
+            idle_wait_timeout: The timeout for waiting new data when no trainer is trainable.
         """
         super().__init__()
 
         self.trainers = trainers
         self.models = models
         self.training_interval = training_interval
+        self.scheduler = scheduler
+        self.selection_policy = selection_policy
+        self.idle_wait_timeout = idle_wait_timeout
 
         self.share_object(SharedObjectNames.INFERENCE_MODELS, models.inference_wrappers_dict)
 
@@ -37,6 +57,9 @@ class TrainingThread(BackgroundThread):
         super().on_shared_objects_pool_attached()
 
         self.data_users: DataUsersDict = self.get_shared_object(ThreadTypes.INFERENCE, SharedObjectNames.DATA_USERS)
+        self.data_arrival_notifier: DataArrivalNotifier = self.get_shared_object(
+            ThreadTypes.INFERENCE, SharedObjectNames.DATA_ARRIVAL_NOTIFIER
+        )
 
         self.trainers.attach_data_users_dict(self.data_users)
         self.trainers.attach_model_wrappers_dict(self.models)
@@ -44,22 +67,62 @@ class TrainingThread(BackgroundThread):
     def worker(self) -> None:
         self.logger.info("Starts the training thread.")
 
+        num_idle_trials = 0
         while self.thread_command_handler.manage_loop():
-            if len(self.trainers) == 0:
-                time.sleep(self.training_interval)
+            observed_data_count = self.data_arrival_notifier.count
+            if self.run_once():
+                num_idle_trials = 0
+                if self.training_interval > 0:
+                    time.sleep(self.training_interval)  # See Issue: https://github.com/MLShukai/ami/issues/175
                 continue
 
-            trainer = self.trainers.get_next_trainer()
-            if trainer.is_trainable():
-                self.logger.info(f"Running a trainer: {trainer.name!r}")
-                start = time.perf_counter()
-                trainer.run()
-                self.logger.info(f"Training time: {time.perf_counter() - start:.2f} [s].")
-
-            time.sleep(self.training_interval)  # See Issue: https://github.com/MLShukai/ami/issues/175
+            # 全てのTrainerが学習不可能な場合は、新しいデータが届くまで待機する。
+            num_idle_trials += 1
+            if num_idle_trials >= self.num_trials_before_waiting:
+                self.data_arrival_notifier.wait_for_new_data(observed_data_count, self.idle_wait_timeout)
+                num_idle_trials = 0
 
         self.logger.info("End the training thread.")
 
+    @property
+    def num_trials_before_waiting(self) -> int:
+        """The number of consecutive idle trials to confirm that no trainer is
+        trainable."""
+        if self.scheduler is None and self.selection_policy is None:
+            return max(len(self.trainers), 1)  # Strict round-robin checks one trainer per trial.
+        return 1
+
+    def run_once(self) -> bool:
+        """Runs the trainer(s) once.
+
+        Returns:
+            bool: Whether any trainer has been run.
+        """
+        if len(self.trainers) == 0:
+            return False
+
+        if self.scheduler is not None:
+            return self.scheduler.run_cycle(self.trainers)
+
+        if self.selection_policy is not None:
+            selected = self.selection_policy.select(self.trainers)
+            if selected is None:
+                return False
+            self.run_trainer(selected)
+            return True
+
+        trainer = self.trainers.get_next_trainer()
+        if trainer.is_trainable():
+            self.run_trainer(trainer)
+            return True
+        return False
+
+    def run_trainer(self, trainer: BaseTrainer) -> None:
+        self.logger.info(f"Running a trainer: {trainer.name!r}")
+        start = time.perf_counter()
+        trainer.run()
+        self.logger.info(f"Training time: {time.perf_counter() - start:.2f} [s].")
+
     @override
     def save_state(self, path: Path) -> None:
         path.mkdir()
@@ -67,6 +130,15 @@ class TrainingThread(BackgroundThread):
         self.trainers.save_state(path / "trainers")
         self.data_users.save_state(path / "data")
 
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        path.mkdir()
+        return chain_writers(
+            self.models.snapshot_state(path / "models"),
+            self.trainers.snapshot_state(path / "trainers"),
+            self.data_users.snapshot_state(path / "data"),
+        )
+
     @override
     def load_state(self, path: Path) -> None:
         self.models.load_state(path / "models")
@@ -1,8 +1,9 @@
 import json
+import math
 import threading
 from enum import Enum, auto
 from queue import Queue
-from typing import TypeAlias
+from typing import Any, Callable, TypeAlias
 
 import bottle
 
@@ -10,6 +11,7 @@ from ..logger import get_main_thread_logger
 from .thread_control import ThreadControllerStatus
 
 PayloadType: TypeAlias = dict[str, str]
+MetricsType: TypeAlias = dict[str, dict[str, float]]
 
 
 class ControlCommands(Enum):
@@ -42,6 +44,10 @@ class WebApiHandler:
         POST /api/shutdown: Shutdown the system. (status: active or paused -> stopped)
         > curl -X POST http://localhost:8080/api/shutdown
         {"result": "ok"}
+
+        GET /api/metrics: Get the elapsed time percentiles [s] of the inference stages in the current logging window.
+        > curl http://localhost:8080/api/metrics
+        {"metrics": {"step": {"count": 120, "mean": 0.09, "p50": 0.1, "p90": 0.1, "p99": 0.11, "max": 0.12}, ...}}
     """
 
     def __init__(
@@ -66,6 +72,11 @@ class WebApiHandler:
         self._handler_thread = threading.Thread(target=self.run, daemon=True)
 
         self._received_commands_queue: Queue[ControlCommands] = Queue()
+        self._metrics_provider: Callable[[], MetricsType] | None = None
+
+    def attach_metrics_provider(self, provider: Callable[[], MetricsType]) -> None:
+        """Attaches the function returning the metrics for `/api/metrics`."""
+        self._metrics_provider = provider
 
     def run(self) -> None:
         """Run the API server."""
@@ -109,6 +120,7 @@ class WebApiHandler:
         bottle.post("/api/resume", callback=self._post_resume)
         bottle.post("/api/shutdown", callback=self._post_shutdown)
         bottle.post("/api/save-checkpoint", callback=self._post_save_checkpoint)
+        bottle.get("/api/metrics", callback=self._get_metrics)
 
         bottle.error(404)(self._error_404)
         bottle.error(405)(self._error_405)
@@ -148,6 +160,16 @@ class WebApiHandler:
         self._received_commands_queue.put(ControlCommands.SAVE_CHECKPOINT)
         return {"result": "ok"}
 
+    def _get_metrics(self) -> dict[str, Any]:
+        metrics: MetricsType = {} if self._metrics_provider is None else self._metrics_provider()
+        # NaN is not valid JSON.
+        return {
+            "metrics": {
+                stage: {k: None if math.isnan(v) else v for k, v in summary.items()}
+                for stage, summary in metrics.items()
+            }
+        }
+
     def _error_404(self, error: bottle.HTTPError) -> str:
         request = bottle.request
         self._logger.error(f"404: {request.method} {request.path} is invalid API endpoint")
@@ -1,11 +1,17 @@
 """This file contains an abstract base class for all trainers."""
+import math
+import time
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, TypeAlias
+from typing import Any, Callable, Iterator, Sequence, TypeAlias
 
+import torch
 import torch.nn as nn
+from torch import Tensor
+from torch.optim import Optimizer
 
 from ami.checkpointing import SaveAndLoadStateMixin
+from ami.precision import PrecisionPolicy, PrecisionTypes
 from ami.threads import PauseResumeEventMixin
 
 from ..data.interfaces import ThreadSafeDataUser
@@ -25,7 +31,9 @@ class BaseTrainer(ABC, SaveAndLoadStateMixin, PauseResumeEventMixin):
         - `on_model_wrappers_dict_attached`: To retrieve the models.
         - `on_data_users_dict_attached`: To retrieve the data users.
         - `train`: To implement the training process.
+        - `train_steps`: To make the training process preemptible between steps. See `run_steps`.
         - `is_trainable`: To determine whether or not the training can be executed.
+        - `count_new_data`: To report the data arrival for the time budgeted scheduling.
 
     DNN models and data buffers become available after the thread has started.
 
@@ -65,9 +73,30 @@ class BaseTrainer(ABC, SaveAndLoadStateMixin, PauseResumeEventMixin):
     _model_wrappers_dict: ModelWrappersDict
     _data_users_dict: DataUsersDict
 
-    def __init__(self) -> None:
-        """Constructs the trainer class."""
+    def __init__(
+        self,
+        precision: PrecisionTypes | str = PrecisionTypes.FP32,
+        num_micro_batches: int = 1,
+        micro_batch_memory_budget_gib: float | None = None,
+    ) -> None:
+        """Constructs the trainer class.
+
+        Args:
+            precision: The precision type for training. See `PrecisionPolicy`.
+            num_micro_batches: The number of micro batches which a batch is split into. The gradients are
+                accumulated over the micro batches. See `accumulate_gradients`.
+            micro_batch_memory_budget_gib: The budget of peak allocated CUDA memory (GiB) while processing a micro
+                batch. If specified, the micro batch size is probed automatically by halving it from
+                `batch_size / num_micro_batches` until the peak memory fits the budget and no OOM occurs.
+        """
         super().__init__()
+        assert num_micro_batches >= 1
+        self.precision = PrecisionPolicy(precision)
+        self.num_micro_batches = num_micro_batches
+        self.micro_batch_memory_budget_gib = micro_batch_memory_budget_gib
+        self.micro_batch_size: int | None = None  # Determined by the probing.
+        self._micro_batch_size_probed = False
+        self._training_steps: Iterator[None] | None = None
         self._synchronized_model_names: set[str] = set()
         self._training_model_names: set[str] = set()
         self._frozen_model_names: set[str] = set()
@@ -172,6 +201,94 @@ class BaseTrainer(ABC, SaveAndLoadStateMixin, PauseResumeEventMixin):
         for training_model_name in self._training_model_names:
             self._get_model(training_model_name).unfreeze_model()
 
+    def accumulate_gradients(
+        self,
+        batch: Sequence[Tensor],
+        optimizer: Optimizer,
+        step_fn: Callable[[list[Tensor]], dict[str, Tensor]],
+        device: torch.device,
+    ) -> dict[str, Tensor]:
+        """Computes the gradients of a batch by accumulating them over micro
+        batches.
+
+        The gradients of `optimizer` are reset (`set_to_none=True`) at first. The tensors in `batch` are split
+        along the first dimension, and each micro batch is passed to `step_fn` under the autocast of the precision
+        policy. `step_fn` must return a dict which has the "loss" averaged over the micro batch. The loss is weighted
+        by the fraction of the micro batch size, so the accumulated gradients are equal to the gradients of the
+        whole batch for the mean reduced losses.
+
+        Call `optimizer` step (via `self.precision.step`) after this method.
+
+        Args:
+            batch: The tensors of the batch. All tensors must have the same size of first dimension.
+            optimizer: The optimizer whose gradients are accumulated.
+            step_fn: The function computing the losses and metrics from a micro batch.
+            device: The computing device. Used for measuring the peak memory.
+
+        Returns:
+            dict[str, Tensor]: The detached outputs of `step_fn` averaged over the micro batches weighted by size.
+        """
+        batch_size = batch[0].size(0)
+        while True:
+            micro_batch_size = self._get_micro_batch_size(batch_size)
+            try:
+                output = self._accumulate_micro_batches(batch, optimizer, step_fn, device, micro_batch_size)
+            except torch.cuda.OutOfMemoryError:
+                if not self._is_probing_micro_batch_size() or micro_batch_size == 1:
+                    raise
+                output = None
+            if output is not None:
+                self._micro_batch_size_probed = self.micro_batch_memory_budget_gib is not None
+                return output
+
+            # Retry with the half size. The references of the failed step are released here.
+            optimizer.zero_grad(set_to_none=True)
+            torch.cuda.empty_cache()
+            self.micro_batch_size = max(micro_batch_size // 2, 1)
+
+    def _is_probing_micro_batch_size(self) -> bool:
+        return self.micro_batch_memory_budget_gib is not None and not self._micro_batch_size_probed
+
+    def _get_micro_batch_size(self, batch_size: int) -> int:
+        if self.micro_batch_size is None:
+            return math.ceil(batch_size / self.num_micro_batches)
+        return min(self.micro_batch_size, batch_size)
+
+    def _accumulate_micro_batches(
+        self,
+        batch: Sequence[Tensor],
+        optimizer: Optimizer,
+        step_fn: Callable[[list[Tensor]], dict[str, Tensor]],
+        device: torch.device,
+        micro_batch_size: int,
+    ) -> dict[str, Tensor] | None:
+        """Returns None if the peak memory exceeds the budget while
+        probing."""
+        measure_memory = self._is_probing_micro_batch_size() and torch.device(device).type == "cuda"
+        budget_bytes = (self.micro_batch_memory_budget_gib or 0.0) * 1024**3
+        batch_size = batch[0].size(0)
+
+        optimizer.zero_grad(set_to_none=True)
+        output: dict[str, Tensor] = {}
+        for start in range(0, batch_size, micro_batch_size):
+            if measure_memory:
+                torch.cuda.reset_peak_memory_stats(device)
+
+            micro_batch = [t[start : start + micro_batch_size] for t in batch]
+            weight = micro_batch[0].size(0) / batch_size
+            with self.precision.autocast(device):
+                out = step_fn(micro_batch)
+            self.precision.backward(out["loss"] * weight)
+
+            if measure_memory and torch.cuda.max_memory_allocated(device) > budget_bytes and micro_batch_size > 1:
+                return None
+
+            for name, value in out.items():
+                value = value.detach().float() * weight
+                output[name] = output[name] + value if name in output else value
+
+        return output
+
     @abstractmethod
     def train(self) -> None:
         """Train the deep neural network models.
@@ -183,12 +300,66 @@ class BaseTrainer(ABC, SaveAndLoadStateMixin, PauseResumeEventMixin):
         """
         raise NotImplementedError
 
+    def train_steps(self) -> Iterator[None]:
+        """Train the models step by step.
+
+        Override this method as a generator which yields after each
+        optimization step, so that the training can be preempted and
+        resumed by :meth:`run_steps`. The default implementation runs
+        :meth:`train` at once.
+        """
+        self.train()
+        yield
+
+    @staticmethod
+    def snapshot_files(path: Path, states: dict[str, Any]) -> Callable[[], None]:
+        """Creates the `path` directory, and returns the function which saves
+        each state to the file name in it by `torch.save`.
+
+        Used for implementing :meth:`snapshot_state`. The states must be
+        copied beforehand (e.g., by `copy_tensors_to_cpu`).
+        """
+        path.mkdir()
+
+        def write() -> None:
+            for file_name, state in states.items():
+                torch.save(state, path / file_name)
+
+        return write
+
+    def count_new_data(self, since: float) -> int:
+        """Returns the number of data added to the training data since the
+        unix time `since`.
+
+        Used by the time budgeted scheduler to adapt the budget share.
+        Override this method if the trainer has a data buffer which
+        records the added times.
+        """
+        return 0
+
+    @property
+    def is_training_suspended(self) -> bool:
+        """Whether a training session has been preempted by :meth:`run_steps`
+        and not been finished yet."""
+        return self._training_steps is not None
+
     def synchronize(self) -> None:
         """Synchronizes the trained models with their corresponding inference
         models."""
         for name in self._synchronized_model_names:
             self._sync_a_model(name)
 
+    def synchronize_in_place(self) -> None:
+        """Synchronizes the trained models with their corresponding inference
+        models by copying the parameters.
+
+        Used when the training is preempted, because the optimizer of
+        the suspended training keeps referring the parameters of the
+        training models.
+        """
+        for name in self._synchronized_model_names:
+            self._inference_wrappers_dict[name].load_state_dict(self._model_wrappers_dict[name].model.state_dict())
+
     def _sync_a_model(self, name: str) -> None:
         """Synchronizes the trained state of a DNN model with its corresponding
         inference model.
@@ -221,3 +392,35 @@ class BaseTrainer(ABC, SaveAndLoadStateMixin, PauseResumeEventMixin):
         self.train()
         self.synchronize()
         self.teardown()
+
+    def run_steps(self, time_budget: float) -> bool:
+        """Runs the training process within the time budget.
+
+        The training session started by :meth:`train_steps` is preempted between steps when the budget is used up,
+        and the trained parameters are copied to the inference models. The next call resumes the session after
+        setting up again because other trainers may have changed the models meanwhile. At least one step is run
+        for each call.
+
+        NOTE: The optimizer state of a suspended session is not included in the checkpoint until the session is
+            finished.
+
+        Args:
+            time_budget: The wall-clock time budget in seconds.
+
+        Returns:
+            bool: Whether the training session has finished.
+        """
+        deadline = time.perf_counter() + time_budget
+        self.setup()
+        if self._training_steps is None:
+            self._training_steps = self.train_steps()
+
+        for _ in self._training_steps:
+            if time.perf_counter() >= deadline:
+                self.synchronize_in_place()
+                return False
+
+        self._training_steps = None
+        self.synchronize()
+        self.teardown()
+        return True
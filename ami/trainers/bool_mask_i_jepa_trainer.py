@@ -2,6 +2,7 @@ import itertools
 import time
 from functools import partial
 from pathlib import Path
+from typing import Callable, Iterator
 
 import torch
 import torch.nn.functional as F
@@ -10,12 +11,15 @@ from torch.optim import Optimizer
 from torch.utils.data import DataLoader, Dataset
 from typing_extensions import override
 
+from ami.checkpointing.snapshot import copy_tensors_to_cpu
 from ami.data.buffers.buffer_names import BufferNames
 from ami.data.buffers.random_data_buffer import RandomDataBuffer
 from ami.data.interfaces import ThreadSafeDataUser
+from ami.data.step_data import DataKeys
 from ami.models.bool_mask_i_jepa import BoolMaskIJEPAEncoder, BoolTargetIJEPAPredictor
 from ami.models.model_names import ModelNames
 from ami.models.model_wrapper import ModelWrapper
+from ami.precision import PrecisionTypes
 from ami.tensorboard_loggers import StepIntervalLogger
 
 from .base_trainer import BaseTrainer
@@ -32,6 +36,9 @@ class BoolMaskIJEPATrainer(BaseTrainer):
         max_epochs: int = 1,
         minimum_dataset_size: int = 1,
         minimum_new_data_count: int = 0,
+        precision: PrecisionTypes | str = PrecisionTypes.FP32,
+        num_micro_batches: int = 1,
+        micro_batch_memory_budget_gib: float | None = None,
     ) -> None:
         """Initializes an BoolMaskIJEPATrainer object.
 
@@ -40,8 +47,11 @@ class BoolMaskIJEPATrainer(BaseTrainer):
             partial_optimizer: A partially instantiated optimizer lacking provided parameters.
             device: The accelerator device (e.g., CPU, GPU) utilized for training the model.
             minimum_new_data_count: Minimum number of new data count required to run the training.
+            precision: The precision type for training.
+            num_micro_batches: The number of micro batches for the gradient accumulation.
+            micro_batch_memory_budget_gib: The CUDA memory budget for probing the micro batch size automatically.
         """
-        super().__init__()
+        super().__init__(precision, num_micro_batches, micro_batch_memory_budget_gib)
         self.partial_optimizer = partial_optimizer
         self.partial_dataloader = partial_dataloader
         self.device = device
@@ -88,12 +98,56 @@ class BoolMaskIJEPATrainer(BaseTrainer):
             >= self.minimum_new_data_count
         )
 
+    @override
+    def count_new_data(self, since: float) -> int:
+        return self.image_data_user.buffer.count_data_added_since(since)
+
     def get_dataset(self) -> Dataset[Tensor]:
         dataset = self.image_data_user.get_dataset()
         self.dataset_previous_get_time = time.time()
         return dataset
 
+    def training_step(self, batch: list[Tensor]) -> dict[str, Tensor]:
+        """Computes the loss of a (micro) batch."""
+        (image_batch, masks_for_context_encoder, targets_for_predictor) = batch
+        image_batch = self.image_data_user.buffer.decode(DataKeys.OBSERVATION, image_batch.to(self.device))
+        masks_for_context_encoder = masks_for_context_encoder.to(self.device)
+        targets_for_predictor = targets_for_predictor.to(self.device)
+
+        # target encoder
+        with torch.no_grad():
+            latent_from_target_encoder: Tensor = self.target_encoder(image_batch)
+            # normalize over feature-dim
+            latent_from_target_encoder = F.layer_norm(
+                latent_from_target_encoder, (latent_from_target_encoder.size(-1),)
+            )
+
+        # context encoder
+        latent_from_context_encoder = self.context_encoder(image_batch, masks_for_context_encoder)
+
+        # predictor
+        latent_from_predictor = self.predictor(latent_from_context_encoder, targets_for_predictor)
+
+        # Element wise smooth l1 loss for masking.
+        losses = F.smooth_l1_loss(latent_from_predictor, latent_from_target_encoder, reduction="none").mean(-1)
+        # shape: [batch, n_patches]
+
+        # Ignore patches that are not selected for prediction.
+        losses = torch.masked_fill(losses, ~targets_for_predictor, 0.0)
+        loss = losses.sum() / targets_for_predictor.sum()
+
+        # The biased std is used, so the metrics are not nan when the micro batch size is 1.
+        return {
+            "loss": loss,
+            "target_encoder_latent_std": latent_from_target_encoder.std(0, unbiased=False).mean(),
+            "context_encoder_latent_std": latent_from_context_encoder.std(0, unbiased=False).mean(),
+        }
+
     def train(self) -> None:
+        for _ in self.train_steps():
+            pass
+
+    def train_steps(self) -> Iterator[None]:
         # move to device
         self.context_encoder = self.context_encoder.to(self.device)
         self.predictor = self.predictor.to(self.device)
@@ -109,39 +163,11 @@ class BoolMaskIJEPATrainer(BaseTrainer):
         for _ in range(self.max_epochs):
             batch: tuple[Tensor, Tensor, Tensor]
             for batch in dataloader:
-                (image_batch, masks_for_context_encoder, targets_for_predictor) = batch
-                image_batch = image_batch.to(self.device)
-                masks_for_context_encoder = masks_for_context_encoder.to(self.device)
-                targets_for_predictor = targets_for_predictor.to(self.device)
-                optimizer.zero_grad()
-
-                # target encoder
-                with torch.no_grad():
-                    latent_from_target_encoder: Tensor = self.target_encoder(image_batch)
-                    # normalize over feature-dim
-                    latent_from_target_encoder = F.layer_norm(
-                        latent_from_target_encoder, (latent_from_target_encoder.size(-1),)
-                    )
-
-                # context encoder
-                latent_from_context_encoder = self.context_encoder(image_batch, masks_for_context_encoder)
-
-                # predictor
-                latent_from_predictor = self.predictor(latent_from_context_encoder, targets_for_predictor)
-
-                # Element wise smooth l1 loss for masking.
-                losses = F.smooth_l1_loss(latent_from_predictor, latent_from_target_encoder, reduction="none").mean(-1)
-                # shape: [batch, n_patches]
-
-                # Ignore patches that are not selected for prediction.
-                losses = torch.masked_fill(losses, ~targets_for_predictor, 0.0)
-                loss = losses.sum() / targets_for_predictor.sum()
-
-                self.logger.log("i-jepa/metrics/target-encoder-latent-std", latent_from_target_encoder.std(0).mean())
-                self.logger.log("i-jepa/metrics/context-encoder-latent-std", latent_from_context_encoder.std(0).mean())
-                self.logger.log("i-jepa/losses/smooth-l1", loss)
-                loss.backward()
-                optimizer.step()
+                out = self.accumulate_gradients(batch, optimizer, self.training_step, self.device)
+                self.logger.log("i-jepa/metrics/target-encoder-latent-std", out["target_encoder_latent_std"])
+                self.logger.log("i-jepa/metrics/context-encoder-latent-std", out["context_encoder_latent_std"])
+                self.logger.log("i-jepa/losses/smooth-l1", out["loss"])
+                self.precision.step(optimizer)
                 self.logger.update()
 
                 # target_encoder updates weights by moving average from context_encoder
@@ -153,19 +179,32 @@ class BoolMaskIJEPATrainer(BaseTrainer):
                         self.target_encoder.parameters(), self.context_encoder.parameters()
                     ):
                         target_encoder_param.data.mul_(m).add_((1.0 - m) * context_encoder_param.detach().data)
+                yield
 
         self.optimizer_state = optimizer.state_dict()
         self.logger_state = self.logger.state_dict()
 
     @override
     def save_state(self, path: Path) -> None:
-        path.mkdir()
-        torch.save(self.optimizer_state, path / "optimizer.pt")
-        torch.save(self.logger.state_dict(), path / "logger.pt")
-        torch.save(self.dataset_previous_get_time, path / "dataset_previous_get_time.pt")
+        # The files are listed only in `snapshot_state`.
+        self.snapshot_state(path)()
+
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        return self.snapshot_files(
+            path,
+            {
+                "optimizer.pt": copy_tensors_to_cpu(self.optimizer_state),
+                "logger.pt": self.logger.state_dict(),
+                "precision.pt": copy_tensors_to_cpu(self.precision.state_dict()),
+                "dataset_previous_get_time.pt": self.dataset_previous_get_time,
+            },
+        )
 
     @override
     def load_state(self, path: Path) -> None:
         self.optimizer_state = torch.load(path / "optimizer.pt")
         self.logger.load_state_dict(torch.load(path / "logger.pt"))
+        if (path / "precision.pt").exists():  # For the checkpoints saved before introducing the precision policy.
+            self.precision.load_state_dict(torch.load(path / "precision.pt"))
         self.dataset_previous_get_time = torch.load(path / "dataset_previous_get_time.pt")
@@ -0,0 +1,184 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Literal, Sequence
+
+import numpy as np
+import numpy.typing as npt
+import torch
+import torchvision.io as io
+import torchvision.transforms.v2 as v2
+
+
+class PackedImageArray:
+    """uint8 images of the same shape packed in a single memory mapped
+    `.npy` file.
+
+    The directory layout is:
+        - `images.npy`: The images, shape (N, C, H, W), uint8.
+        - `written.npy`: The flags whether each image has been written, shape (N,), bool.
+        - `index.json`: The number of images, the image shape and the optional names of images.
+
+    The array can be written from multiple processes by opening it in
+    each process, and the `written` flags make the interrupted writing
+    resumable.
+
+    Example:
+        array = PackedImageArray.create("/path/to/packed", num_images=1000, image_shape=(3, 144, 144))
+        array.write(0, image)
+        array.flush()
+    """
+
+    IMAGES_FILE_NAME = "images.npy"
+    WRITTEN_FILE_NAME = "written.npy"
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, path: str | Path, writable: bool = False) -> None:
+        """Opens the existing packed image array.
+
+        Args:
+            path: The directory of the packed image array.
+            writable: Whether to open the array in read-write mode.
+        """
+        self.path = Path(path)
+        self.writable = writable
+        mode: Literal["r+", "r"] = "r+" if writable else "r"
+        self.index: dict[str, Any] = json.loads((self.path / self.INDEX_FILE_NAME).read_text())
+        self.images: np.memmap[Any, np.dtype[np.uint8]] = np.load(self.path / self.IMAGES_FILE_NAME, mmap_mode=mode)
+        self.written: np.memmap[Any, np.dtype[np.bool_]] = np.load(self.path / self.WRITTEN_FILE_NAME, mmap_mode=mode)
+        self._pending_indices: list[int] = []
+
+    @classmethod
+    def create(
+        cls,
+        path: str | Path,
+        num_images: int,
+        image_shape: tuple[int, ...],
+        names: list[str] | None = None,
+    ) -> "PackedImageArray":
+        """Creates the packed image array, or opens it for resuming if the
+        array with the same layout already exists.
+
+        Args:
+            path: The directory of the packed image array.
+            num_images: The number of images.
+            image_shape: The shape of each image, (C, H, W).
+            names: The names of images (e.g., source frame numbers).
+
+        Raises:
+            ValueError: If the existing array has a different layout.
+        """
+        path = Path(path)
+        index = {"num_images": num_images, "image_shape": list(image_shape), "names": names}
+        index_file = path / cls.INDEX_FILE_NAME
+        if index_file.exists():
+            existing_index = json.loads(index_file.read_text())
+            if existing_index != index:
+                raise ValueError(f"The packed image array at '{path}' exists with a different layout.")
+            return cls(path, writable=True)
+
+        path.mkdir(parents=True, exist_ok=True)
+        np.lib.format.open_memmap(
+            path / cls.IMAGES_FILE_NAME, mode="w+", dtype=np.uint8, shape=(num_images, *image_shape)
+        ).flush()
+        np.lib.format.open_memmap(path / cls.WRITTEN_FILE_NAME, mode="w+", dtype=np.bool_, shape=(num_images,)).flush()
+        # The index is written last, so its existence means the array files are allocated.
+        index_file.write_text(json.dumps(index))
+        return cls(path, writable=True)
+
+    @property
+    def names(self) -> list[str] | None:
+        return self.index["names"]
+
+    @property
+    def image_shape(self) -> tuple[int, ...]:
+        return tuple(self.index["image_shape"])
+
+    @property
+    def num_written(self) -> int:
+        return int(np.count_nonzero(self.written))
+
+    @property
+    def is_complete(self) -> bool:
+        return bool(np.all(self.written))
+
+    def __len__(self) -> int:
+        return self.index["num_images"]
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        """Returns the copy of the image as the uint8 tensor."""
+        return torch.from_numpy(np.array(self.images[index]))
+
+    def write(self, index: int, image: torch.Tensor | npt.NDArray[np.uint8]) -> None:
+        """Writes the uint8 image.
+
+        The image is marked as written at :meth:`flush` to keep the
+        `written` flags consistent with the flushed images.
+        """
+        if not self.writable:
+            raise RuntimeError("The packed image array is opened as read-only.")
+        if isinstance(image, torch.Tensor):
+            image = image.cpu().numpy()
+        if image.dtype != np.uint8:
+            raise ValueError(f"The image dtype must be uint8, but got {image.dtype}.")
+        self.images[index] = image
+        self._pending_indices.append(index)
+
+    def flush(self) -> None:
+        """Flushes the written images, and then marks them as written."""
+        if not self.writable:
+            return
+        self.images.flush()
+        self.written[self._pending_indices] = True
+        self.written.flush()
+        self._pending_indices.clear()
+
+
+def pack_image_folder(
+    image_files: Sequence[str | Path],
+    output_path: str | Path,
+    image_size: tuple[int, int] | None = None,
+    num_workers: int | None = None,
+    chunk_size: int = 1024,
+) -> PackedImageArray:
+    """Decodes the image files in parallel and packs them into the
+    `PackedImageArray`.
+
+    The interrupted packing is resumed by calling again with the same arguments.
+
+    Args:
+        image_files: The image files to pack, in order.
+        output_path: The directory of the packed image array.
+        image_size: The size (height, width) for resizing the images. If None, all images must have the same size.
+        num_workers: The number of decoding threads. If None, the default of `ThreadPoolExecutor`.
+        chunk_size: The number of images flushed at once.
+
+    Returns:
+        PackedImageArray: The packed image array opened as read-only.
+    """
+    if len(image_files) == 0:
+        raise ValueError("No image files to pack.")
+
+    def decode(file: str | Path) -> torch.Tensor:
+        image = io.read_image(str(file), io.ImageReadMode.RGB)
+        if image_size is not None and tuple(image.shape[-2:]) != tuple(image_size):
+            image = v2.functional.resize(image, list(image_size), antialias=True)
+        return image
+
+    image_shape = tuple(decode(image_files[0]).shape)
+    names = [Path(f).stem for f in image_files]
+    packed = PackedImageArray.create(output_path, len(image_files), image_shape, names)
+    indices = np.flatnonzero(~np.asarray(packed.written)).tolist()
+
+    with ThreadPoolExecutor(num_workers, thread_name_prefix="ImageDecoder") as executor:
+        for begin in range(0, len(indices), chunk_size):
+            chunk = indices[begin : begin + chunk_size]
+            for i, image in zip(chunk, executor.map(decode, [image_files[i] for i in chunk])):
+                if tuple(image.shape) != image_shape:
+                    raise ValueError(
+                        f"The image shape of '{image_files[i]}' is {tuple(image.shape)}, expected {image_shape}."
+                    )
+                packed.write(i, image)
+            packed.flush()
+
+    return PackedImageArray(output_path)
@@ -1,11 +1,14 @@
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import torch
 import torchvision.io as io
 import torchvision.transforms.v2 as v2
 from torch.utils.data import Dataset
 
+from .packed_image_array import PackedImageArray, pack_image_folder
+
 
 class IntervalSamplingImageDataset(Dataset[tuple[torch.Tensor]]):
     """Dataset class for sampling images at regular intervals from a directory.
@@ -18,6 +21,7 @@ class IntervalSamplingImageDataset(Dataset[tuple[torch.Tensor]]):
     - Supports multiple image formats (jpeg, jpg, png by default).
     - Applies specified transformations to the images.
     - Option to pre-load images into memory for faster access.
+    - Option to load the images from the packed uint8 shard (`PackedImageArray`).
 
     Usage:
     - Initialize the dataset with the desired parameters.
@@ -31,6 +35,8 @@ class IntervalSamplingImageDataset(Dataset[tuple[torch.Tensor]]):
     Note:
     - Ensure the image directory contains only image files of the specified extensions.
     - Pre-loading images can significantly increase memory usage for large datasets.
+    - With `shard_path`, the shard is built from the image directory at the first time, and the transform
+      is applied lazily on the uint8 image in `__getitem__`. The pre-loaded images are kept as uint8.
     """
 
     def __init__(
@@ -40,6 +46,8 @@ class IntervalSamplingImageDataset(Dataset[tuple[torch.Tensor]]):
         num_sample: int,
         extensions: tuple[str, ...] = ("jpeg", "JPEG", "jpg", "JPG", "png", "PNG"),
         pre_loading: bool = True,
+        shard_path: str | Path | None = None,
+        num_workers: int | None = None,
     ) -> None:
         """Initializes the IntervalSamplingImageDataset.
 
@@ -49,19 +57,44 @@ class IntervalSamplingImageDataset(Dataset[tuple[torch.Tensor]]):
             num_sample: Target number of samples to extract.
             extensions: Tuple of allowed image file extensions.
             pre_loading: If True, pre-loads all images into memory.
+            shard_path: The directory of the packed uint8 shard of the images. If it does not exist or is
+                incomplete, it is built from `image_dir`.
+            num_workers: The number of decoding threads for building the shard.
         """
         super().__init__()
         self.image_dir = Path(image_dir)
-        assert self.image_dir.is_dir()
         self.transform = transform
         self.extensions = extensions
-        available_image_files = self._list_image_files()
-        self._interval = max(len(available_image_files) // num_sample, 1)
-        self.image_files = self._sample_image_files(available_image_files, self._interval)
+
+        self.shard: PackedImageArray | None = None
+        self.shard_indices: list[int] = []
+        self.image_files: list[Path] = []
+        if shard_path is not None:
+            self.shard = self._open_shard(Path(shard_path), num_workers)
+            self._interval = max(len(self.shard) // num_sample, 1)
+            self.shard_indices = list(range(0, len(self.shard), self._interval))
+        else:
+            assert self.image_dir.is_dir()
+            available_image_files = self._list_image_files()
+            self._interval = max(len(available_image_files) // num_sample, 1)
+            self.image_files = self._sample_image_files(available_image_files, self._interval)
 
         self.image_data: list[torch.Tensor] | None = None
+        self.shard_data: torch.Tensor | None = None
         if pre_loading:
-            self.image_data = [self._read_image(f) for f in self.image_files]
+            if self.shard is not None:
+                # Contiguous uint8 copy, 4x smaller than float tensors.
+                self.shard_data = torch.from_numpy(np.ascontiguousarray(self.shard.images[self.shard_indices]))
+            else:
+                self.image_data = [self._read_image(f) for f in self.image_files]
+
+    def _open_shard(self, shard_path: Path, num_workers: int | None) -> PackedImageArray:
+        if (shard_path / PackedImageArray.INDEX_FILE_NAME).exists():
+            shard = PackedImageArray(shard_path)
+            if shard.is_complete:
+                return shard
+        assert self.image_dir.is_dir()
+        return pack_image_folder(self._list_image_files(), shard_path, num_workers=num_workers)
 
     def _list_image_files(self) -> list[Path]:
 
@@ -84,10 +117,18 @@ class IntervalSamplingImageDataset(Dataset[tuple[torch.Tensor]]):
         return self.transform(image)
 
     def __len__(self) -> int:
+        if self.shard is not None:
+            return len(self.shard_indices)
         return len(self.image_files)
 
     def __getitem__(self, index: int) -> tuple[torch.Tensor]:
-        if self.image_data is None:
+        if self.shard is not None:
+            if self.shard_data is not None:
+                image = self.shard_data[index]
+            else:
+                image = self.shard[self.shard_indices[index]]
+            image = self.transform(image)
+        elif self.image_data is None:
             image = self._read_image(self.image_files[index])
         else:
             image = self.image_data[index]
@@ -1,6 +1,7 @@
 import time
 from functools import partial
 from pathlib import Path
+from typing import Callable, Iterator
 
 import torch
 from torch import Tensor
@@ -9,12 +10,15 @@ from torch.optim import Optimizer
 from torch.utils.data import DataLoader, Dataset
 from typing_extensions import override
 
+from ami.checkpointing.snapshot import copy_tensors_to_cpu
 from ami.data.buffers.buffer_names import BufferNames
 from ami.data.buffers.causal_data_buffer import CausalDataBuffer
 from ami.data.interfaces import ThreadSafeDataUser
+from ami.data.step_data import DataKeys
 from ami.models.forward_dynamics import ForwardDynamcisWithActionReward
 from ami.models.model_names import ModelNames
 from ami.models.model_wrapper import ModelWrapper
+from ami.precision import PrecisionTypes
 from ami.tensorboard_loggers import StepIntervalLogger
 
 from .base_trainer import BaseTrainer
@@ -37,6 +41,9 @@ class ForwardDynamicsWithActionRewardTrainer(BaseTrainer):
         action_loss_coef: float = 1.0,
         reward_loss_coef: float = 1.0,
         gradient_clip_norm: float | None = None,
+        precision: PrecisionTypes | str = PrecisionTypes.FP32,
+        num_micro_batches: int = 1,
+        micro_batch_memory_budget_gib: float | None = None,
     ) -> None:
         """Initialization.
 
@@ -46,8 +53,11 @@ class ForwardDynamicsWithActionRewardTrainer(BaseTrainer):
             partial_optimizer: A partially instantiated optimizer lacking provided parameters.
             device: The accelerator device (e.g., CPU, GPU) utilized for training the model.
             minimum_new_data_count: Minimum number of new data count required to run the training.
+            precision: The precision type for training.
+            num_micro_batches: The number of micro batches for the gradient accumulation.
+            micro_batch_memory_budget_gib: The CUDA memory budget for probing the micro batch size automatically.
         """
-        super().__init__()
+        super().__init__(precision, num_micro_batches, micro_batch_memory_budget_gib)
         self.partial_optimizer = partial_optimizer
         self.partial_dataloader = partial_dataloader
         self.partial_sampler = partial_sampler
@@ -89,12 +99,68 @@ class ForwardDynamicsWithActionRewardTrainer(BaseTrainer):
             >= self.minimum_new_data_count
         )
 
+    @override
+    def count_new_data(self, since: float) -> int:
+        return self.trajectory_data_user.buffer.count_data_added_since(since)
+
     def get_dataset(self) -> Dataset[Tensor]:
         dataset = self.trajectory_data_user.get_dataset()
         self.dataset_previous_get_time = time.time()
         return dataset
 
+    def training_step(self, batch: list[Tensor]) -> dict[str, Tensor]:
+        """Computes the losses of a (micro) batch."""
+        observations, hiddens, actions, rewards = batch
+        # Decodes the stored data after the device transfer.
+        buffer = self.trajectory_data_user.buffer
+        observations = buffer.decode(DataKeys.OBSERVATION, observations.to(self.device))
+        hiddens = buffer.decode(DataKeys.HIDDEN, hiddens.to(self.device))
+        actions = buffer.decode(DataKeys.ACTION, actions.to(self.device))
+        rewards = buffer.decode(DataKeys.REWARD, rewards.to(self.device))
+        if self.observation_encoder is not None:
+            with torch.no_grad():
+                batch_time_shape = observations.shape[:2]
+                observations = self.observation_encoder.infer(observations.flatten(0, 1))
+                output_shape = batch_time_shape + observations.shape[1:]
+                observations = observations.reshape(output_shape)
+
+        observations, hidden, actions, observations_next, actions_next, rewards = (
+            observations[:, :-1],  # o_0:T-1
+            hiddens[:, 0],  # h_0
+            actions[:, :-1],  # a_0:T-1
+            observations[:, 1:],  # o_1:T
+            actions[:, 1:],  # a_1:T
+            rewards[:, :-1],  # r_1:T because rewards are always t+1.
+        )
+
+        observations_next_hat_dist: Distribution
+        actions_next_hat_dist: Distribution
+        reward_hat_dist: Distribution
+        observations_next_hat_dist, actions_next_hat_dist, reward_hat_dist, _ = self.forward_dynamics(
+            observations, hidden, actions
+        )
+
+        observation_loss = -observations_next_hat_dist.log_prob(observations_next).mean()
+        action_loss = -actions_next_hat_dist.log_prob(actions_next).mean()
+        reward_loss = -reward_hat_dist.log_prob(rewards).mean()
+
+        loss = (
+            self.obs_loss_coef * observation_loss
+            + self.action_loss_coef * action_loss
+            + self.reward_loss_coef * reward_loss
+        )
+        return {
+            "loss": loss,
+            "observation_loss": observation_loss,
+            "action_loss": action_loss,
+            "reward_loss": reward_loss,
+        }
+
     def train(self) -> None:
+        for _ in self.train_steps():
+            pass
+
+    def train_steps(self) -> Iterator[None]:
         self.forward_dynamics.to(self.device)
         if self.observation_encoder is not None:
             self.observation_encoder.to(self.device)
@@ -108,53 +174,12 @@ class ForwardDynamicsWithActionRewardTrainer(BaseTrainer):
 
         for _ in range(self.max_epochs):
             for batch in dataloader:
-                observations, hiddens, actions, rewards = batch
-                if self.observation_encoder is not None:
-                    with torch.no_grad():
-                        batch_time_shape = observations.shape[:2]
-                        observations = self.observation_encoder.infer(observations.flatten(0, 1))
-                        output_shape = batch_time_shape + observations.shape[1:]
-                        observations = observations.reshape(output_shape)
-                observations = observations.to(self.device)
-                actions = actions.to(self.device)
-
-                observations, hidden, actions, observations_next, actions_next, rewards = (
-                    observations[:, :-1],  # o_0:T-1
-                    hiddens[:, 0],  # h_0
-                    actions[:, :-1],  # a_0:T-1
-                    observations[:, 1:],  # o_1:T
-                    actions[:, 1:],  # a_1:T
-                    rewards[:, :-1],  # r_1:T because rewards are always t+1.
-                )
-
-                hidden = hidden.to(self.device)
-                rewards = rewards.to(self.device)
-
-                optimizer.zero_grad()
-
-                observations_next_hat_dist: Distribution
-                actions_next_hat_dist: Distribution
-                reward_hat_dist: Distribution
-                observations_next_hat_dist, actions_next_hat_dist, reward_hat_dist, _ = self.forward_dynamics(
-                    observations, hidden, actions
-                )
-
-                observation_loss = -observations_next_hat_dist.log_prob(observations_next).mean()
-                action_loss = -actions_next_hat_dist.log_prob(actions_next).mean()
-                reward_loss = -reward_hat_dist.log_prob(rewards).mean()
-
-                loss = (
-                    self.obs_loss_coef * observation_loss
-                    + self.action_loss_coef * action_loss
-                    + self.reward_loss_coef * reward_loss
-                )
+                out = self.accumulate_gradients(batch, optimizer, self.training_step, self.device)
                 prefix = "forward_dynamics/"
-                self.logger.log(prefix + "loss", loss)
-                self.logger.log(prefix + "observation_loss", observation_loss)
-                self.logger.log(prefix + "action_loss", action_loss)
-                self.logger.log(prefix + "reward_loss", reward_loss)
+                for name, value in out.items():
+                    self.logger.log(prefix + name, value)
 
-                loss.backward()
+                self.precision.unscale_(optimizer)
 
                 grad_norm = grad_norm = torch.cat(
                     [p.grad.flatten() for p in self.forward_dynamics.parameters() if p.grad is not None]
@@ -163,22 +188,38 @@ class ForwardDynamicsWithActionRewardTrainer(BaseTrainer):
 
                 if self.gradient_clip_norm is not None:
                     torch.nn.utils.clip_grad_norm_(
-                        self.forward_dynamics.parameters(), self.gradient_clip_norm, error_if_nonfinite=True
+                        self.forward_dynamics.parameters(),
+                        self.gradient_clip_norm,
+                        # The overflow steps are skipped by the gradient scaler.
+                        error_if_nonfinite=not self.precision.scaler_enabled,
                     )
-                optimizer.step()
+                self.precision.step(optimizer)
                 self.logger.update()
+                yield
 
         self.optimizer_state = optimizer.state_dict()
 
     @override
     def save_state(self, path: Path) -> None:
-        path.mkdir()
-        torch.save(self.optimizer_state, path / "optimizer.pt")
-        torch.save(self.logger.state_dict(), path / "logger.pt")
-        torch.save(self.dataset_previous_get_time, path / "dataset_previous_get_time.pt")
+        # The files are listed only in `snapshot_state`.
+        self.snapshot_state(path)()
+
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        return self.snapshot_files(
+            path,
+            {
+                "optimizer.pt": copy_tensors_to_cpu(self.optimizer_state),
+                "logger.pt": self.logger.state_dict(),
+                "precision.pt": copy_tensors_to_cpu(self.precision.state_dict()),
+                "dataset_previous_get_time.pt": self.dataset_previous_get_time,
+            },
+        )
 
     @override
     def load_state(self, path: Path) -> None:
         self.optimizer_state = torch.load(path / "optimizer.pt")
         self.logger.load_state_dict(torch.load(path / "logger.pt"))
+        if (path / "precision.pt").exists():  # For the checkpoints saved before introducing the precision policy.
+            self.precision.load_state_dict(torch.load(path / "precision.pt"))
         self.dataset_previous_get_time = torch.load(path / "dataset_previous_get_time.pt")
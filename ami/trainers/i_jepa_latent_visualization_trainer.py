@@ -1,7 +1,7 @@
 import time
 from functools import partial
 from pathlib import Path
-from typing import Literal
+from typing import Callable, Iterator, Literal
 
 # import matplotlib.pyplot as plt
 import torch
@@ -13,15 +13,18 @@ from torch.optim import Optimizer
 from torch.utils.data import DataLoader, Dataset
 from typing_extensions import override
 
+from ami.checkpointing.snapshot import copy_tensors_to_cpu
 from ami.data.buffers.buffer_names import BufferNames
 from ami.data.buffers.random_data_buffer import RandomDataBuffer
 from ami.data.interfaces import ThreadSafeDataUser
+from ami.data.step_data import DataKeys
 from ami.models.bool_mask_i_jepa import BoolMaskIJEPAEncoder
 from ami.models.i_jepa_latent_visualization_decoder import (
     IJEPALatentVisualizationDecoder,
 )
 from ami.models.model_names import ModelNames
 from ami.models.model_wrapper import ModelWrapper
+from ami.precision import PrecisionTypes
 from ami.tensorboard_loggers import StepIntervalLogger
 from ami.utils import min_max_normalize
 
@@ -47,6 +50,7 @@ class IJEPALatentVisualizationDecoderTrainer(BaseTrainer):
         validation_dataloader: DataLoader[tuple[Tensor]] | None = None,
         num_visualize_images: int = 64,
         visualize_grid_row: int = 8,
+        precision: PrecisionTypes | str = PrecisionTypes.FP32,
     ) -> None:
         """Initializes an IJEPALatentVisualizationDecoderTrainer object.
 
@@ -62,8 +66,9 @@ class IJEPALatentVisualizationDecoderTrainer(BaseTrainer):
             validation_dataloader DataLoader instance for validation.
             num_visualize_images: Number of images to use for visualization. Default is 64.
             visualize_grid_row: Number of images per row in the visualization grid. Default is 8.
+            precision: The precision type for training and validation. Default is fp32.
         """
-        super().__init__()
+        super().__init__(precision)
 
         self.partial_optimizer = partial_optimizer
         self.partial_dataloader = partial_dataloader
@@ -114,6 +119,10 @@ class IJEPALatentVisualizationDecoderTrainer(BaseTrainer):
             >= self.minimum_new_data_count
         )
 
+    @override
+    def count_new_data(self, since: float) -> int:
+        return self.image_data_user.buffer.count_data_added_since(since)
+
     def get_dataset(self) -> Dataset[Tensor]:
         dataset = self.image_data_user.get_dataset()
         self.dataset_previous_get_time = time.time()
@@ -132,8 +141,10 @@ class IJEPALatentVisualizationDecoderTrainer(BaseTrainer):
             input_image_batch_list.append(image_batch)
             image_batch = image_batch.to(self.device)
 
-            latents = self.encoder.infer(image_batch)
-            reconstructions: Tensor = self.decoder(latents)
+            with self.precision.autocast(self.device):
+                latents = self.encoder.infer(image_batch)
+                reconstructions: Tensor = self.decoder(latents)
+            reconstructions = reconstructions.float()
             rec_img_size = reconstructions.shape[-2:]
             resized_image_batch = torchvision.transforms.v2.functional.resize(image_batch, rec_img_size)
             loss_list.append(F.mse_loss(resized_image_batch, reconstructions, reduction="none").flatten(1).mean(1))
@@ -179,6 +190,11 @@ class IJEPALatentVisualizationDecoderTrainer(BaseTrainer):
 
     @override
     def train(self) -> None:
+        for _ in self.train_steps():
+            pass
+
+    @override
+    def train_steps(self) -> Iterator[None]:
         # move to device
         self.encoder.to(self.device)
         self.decoder.to(self.device)
@@ -195,31 +211,33 @@ class IJEPALatentVisualizationDecoderTrainer(BaseTrainer):
             ]
             for batch in dataloader:
                 (image_batch,) = batch
-                image_batch = image_batch.to(self.device)
+                image_batch = self.image_data_user.buffer.decode(DataKeys.OBSERVATION, image_batch.to(self.device))
 
-                with torch.no_grad():
-                    latents = self.encoder.infer(image_batch)
-                    # latents: [batch_size, n_patches_height * n_patches_width, latents_dim]
+                with self.precision.autocast(self.device):
+                    with torch.no_grad():
+                        latents = self.encoder.infer(image_batch)
+                        # latents: [batch_size, n_patches_height * n_patches_width, latents_dim]
 
-                image_out: Tensor = self.decoder(latents)
-                image_size = image_out.size()[-2:]
+                    image_out: Tensor = self.decoder(latents)
+                    image_size = image_out.size()[-2:]
 
-                image_batch_resized = torchvision.transforms.v2.functional.resize(image_batch, image_size)
+                    image_batch_resized = torchvision.transforms.v2.functional.resize(image_batch, image_size)
 
-                # calc loss
-                loss = F.mse_loss(
-                    image_out,
-                    image_batch_resized,
-                    reduction="mean",
-                )
+                    # calc loss
+                    loss = F.mse_loss(
+                        image_out,
+                        image_batch_resized,
+                        reduction="mean",
+                    )
 
                 optimizer.zero_grad()
-                loss.backward()
-                optimizer.step()
+                self.precision.backward(loss)
+                self.precision.step(optimizer)
 
                 self.logger.log(self.log_prefix + "losses/reconstruction", loss)
 
                 self.logger.update()
+                yield
 
         if self.validation_dataloader is not None:
             self.validation(self.validation_dataloader)
@@ -229,13 +247,25 @@ class IJEPALatentVisualizationDecoderTrainer(BaseTrainer):
 
     @override
     def save_state(self, path: Path) -> None:
-        path.mkdir()
-        torch.save(self.optimizer_state, path / "optimizer.pt")
-        torch.save(self.logger.state_dict(), path / "logger.pt")
-        torch.save(self.dataset_previous_get_time, path / "dataset_previous_get_time.pt")
+        # The files are listed only in `snapshot_state`.
+        self.snapshot_state(path)()
+
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        return self.snapshot_files(
+            path,
+            {
+                "optimizer.pt": copy_tensors_to_cpu(self.optimizer_state),
+                "logger.pt": self.logger.state_dict(),
+                "precision.pt": copy_tensors_to_cpu(self.precision.state_dict()),
+                "dataset_previous_get_time.pt": self.dataset_previous_get_time,
+            },
+        )
 
     @override
     def load_state(self, path: Path) -> None:
         self.optimizer_state = torch.load(path / "optimizer.pt")
         self.logger.load_state_dict(torch.load(path / "logger.pt"))
+        if (path / "precision.pt").exists():  # For the checkpoints saved before introducing the precision policy.
+            self.precision.load_state_dict(torch.load(path / "precision.pt"))
         self.dataset_previous_get_time = torch.load(path / "dataset_previous_get_time.pt")
@@ -1,6 +1,6 @@
 from functools import partial
 from pathlib import Path
-from typing import Mapping, TypedDict
+from typing import Callable, Iterator, Mapping, TypedDict
 
 import torch
 from torch import Tensor
@@ -8,6 +8,8 @@ from torch.distributions import Distribution
 from torch.utils.data import DataLoader
 from typing_extensions import override
 
+from ami.checkpointing.snapshot import copy_tensors_to_cpu
+from ami.precision import PrecisionTypes
 from ami.tensorboard_loggers import StepIntervalLogger
 
 from ..data.buffers.buffer_names import BufferNames
@@ -39,6 +41,9 @@ class PPOPolicyTrainer(BaseTrainer):
         clip_vloss: bool = True,
         entropy_coef: float = 0.001,
         vfunc_coef: float = 0.5,
+        precision: PrecisionTypes | str = PrecisionTypes.FP32,
+        num_micro_batches: int = 1,
+        micro_batch_memory_budget_gib: float | None = None,
     ) -> None:
         """Initializes a PPOLitModule.
 
@@ -53,8 +58,11 @@ class PPOPolicyTrainer(BaseTrainer):
             clip_vloss: Toggles the use of a clipped loss for the value function, as per the paper.
             entropy_coef: The coefficient for entropy.
             vfunc_coef: The coefficient for the value function.
+            precision: The precision type for training.
+            num_micro_batches: The number of micro batches for the gradient accumulation.
+            micro_batch_memory_budget_gib: The CUDA memory budget for probing the micro batch size automatically.
         """
-        super().__init__()
+        super().__init__(precision, num_micro_batches, micro_batch_memory_budget_gib)
 
         self.partial_optimizer = partial_optimizer
         self.partial_dataloader = partial_dataloader
@@ -84,12 +92,20 @@ class PPOPolicyTrainer(BaseTrainer):
         self.trajectory_data_user.update()
         return self.trajectory_data_user.buffer.dataset_size >= self.minimum_dataset_size
 
+    @override
+    def count_new_data(self, since: float) -> int:
+        return self.trajectory_data_user.buffer.count_data_added_since(since)
+
     def model_forward(self, obs: Tensor, hiddens: Tensor) -> tuple[Distribution, Tensor]:
         """Written for type annotation."""
         return self.policy_value(obs, hiddens)
 
-    def training_step(self, batch: tuple[Tensor, ...]) -> dict[str, Tensor]:
-        """Perform a single training step on a batch of data."""
+    def training_step(self, batch: list[Tensor]) -> dict[str, Tensor]:
+        """Perform a single training step on a (micro) batch of data.
+
+        The advantages must be normalized beforehand over the whole
+        batch. See `normalize_advantages`.
+        """
         obses, hiddens, actions, logprobs, advantanges, returns, values = batch
 
         new_action_dist, new_values = self.model_forward(obses, hiddens)
@@ -103,9 +119,6 @@ class PPOPolicyTrainer(BaseTrainer):
             approx_kl = ((ratio - 1.0) - logratio).mean()
             clipfracs = ((ratio - 1.0).abs() > self.clip_coef).float().mean()
 
-        if self.norm_advantage:
-            advantanges = (advantanges - advantanges.mean()) / (advantanges.std() + 1e-8)
-
         if advantanges.ndim == 1:
             advantanges = advantanges.unsqueeze(1)
 
@@ -140,7 +153,19 @@ class PPOPolicyTrainer(BaseTrainer):
         }
         return output
 
+    def normalize_advantages(self, batch: list[Tensor]) -> list[Tensor]:
+        """Normalizes the advantages over the whole batch before splitting it
+        into micro batches."""
+        if self.norm_advantage:
+            advantanges = batch[4]
+            batch[4] = (advantanges - advantanges.mean()) / (advantanges.std() + 1e-8)
+        return batch
+
     def train(self) -> None:
+        for _ in self.train_steps():
+            pass
+
+    def train_steps(self) -> Iterator[None]:
         self.policy_value.to(self.device)
 
         optimizer = self.partial_optimizer(self.policy_value.parameters())
@@ -150,19 +175,19 @@ class PPOPolicyTrainer(BaseTrainer):
 
         for _ in range(self.max_epochs):
             for batch in dataloader:
-                batch = [d.to(self.device) for d in batch]
-                out = self.training_step(batch)
+                batch = self.normalize_advantages([d.to(self.device) for d in batch])
+                out = self.accumulate_gradients(batch, optimizer, self.training_step, self.device)
                 for name, value in out.items():
                     self.logger.log(f"ppo_policy/{name}", value)
 
-                optimizer.zero_grad()
-                out["loss"].backward()
+                self.precision.unscale_(optimizer)
                 grad_norm = torch.cat(
                     [p.grad.flatten() for p in self.policy_value.parameters() if p.grad is not None]
                 ).norm()
                 self.logger.log("ppo_policy/grad_norm", grad_norm)
-                optimizer.step()
+                self.precision.step(optimizer)
                 self.logger.update()
+                yield
 
         self.optimizer_state = optimizer.state_dict()
 
@@ -172,11 +197,23 @@ class PPOPolicyTrainer(BaseTrainer):
 
     @override
     def save_state(self, path: Path) -> None:
-        path.mkdir()
-        torch.save(self.optimizer_state, path / "optimizer.pt")
-        torch.save(self.logger.state_dict(), path / "logger.pt")
+        # The files are listed only in `snapshot_state`.
+        self.snapshot_state(path)()
+
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        return self.snapshot_files(
+            path,
+            {
+                "optimizer.pt": copy_tensors_to_cpu(self.optimizer_state),
+                "logger.pt": self.logger.state_dict(),
+                "precision.pt": copy_tensors_to_cpu(self.precision.state_dict()),
+            },
+        )
 
     @override
     def load_state(self, path: Path) -> None:
         self.optimizer_state = torch.load(path / "optimizer.pt")
         self.logger.load_state_dict(torch.load(path / "logger.pt"))
+        if (path / "precision.pt").exists():  # For the checkpoints saved before introducing the precision policy.
+            self.precision.load_state_dict(torch.load(path / "precision.pt"))
@@ -0,0 +1,181 @@
+"""Policies for selecting the trainer to be run next in the training
+thread.
+
+The trainers are identified by their `name` (the key in the trainers
+config).
+"""
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Mapping, Sequence
+
+from ami.logger import get_training_thread_logger
+
+from .base_trainer import BaseTrainer
+
+
+class BaseTrainerSelectionPolicy(ABC):
+    """Abstract base class of the trainer selection policies.
+
+    A trainer is a candidate if it is trainable and at least its minimum run
+    interval has passed since its last run. If some candidates exceed their
+    maximum run interval, the most overdue one is selected preferentially.
+    Otherwise, :meth:`choose` of the subclass selects one of the candidates.
+
+    The trainability check is cheap when no new data has been collected,
+    because `ThreadSafeDataUser.update` is skipped by the change counter of
+    the data collector.
+    """
+
+    def __init__(
+        self,
+        min_run_intervals: Mapping[str, float] | None = None,
+        max_run_intervals: Mapping[str, float] | None = None,
+    ) -> None:
+        """Constructs the policy.
+
+        Args:
+            min_run_intervals: The minimum seconds between the runs of each trainer.
+            max_run_intervals: The seconds after which each trainer is preferred over the others if it is trainable.
+        """
+        self.min_run_intervals = dict(min_run_intervals or {})
+        self.max_run_intervals = dict(max_run_intervals or {})
+        self._last_run_times: dict[str, float] = {}
+
+    def get_last_run_time(self, trainer: BaseTrainer) -> float:
+        """Returns the unix time when the trainer was selected last."""
+        return self._last_run_times.get(trainer.name, float("-inf"))
+
+    def select(self, trainers: Sequence[BaseTrainer]) -> BaseTrainer | None:
+        """Selects the trainer to be run next.
+
+        Returns:
+            BaseTrainer | None: The selected trainer. None if no trainer can be run.
+        """
+        now = time.time()
+        candidates = [
+            t
+            for t in trainers
+            if now - self.get_last_run_time(t) >= self.min_run_intervals.get(t.name, 0.0) and t.is_trainable()
+        ]
+        if len(candidates) == 0:
+            return None
+
+        overdue_ratios = {
+            t.name: (now - self.get_last_run_time(t)) / self.max_run_intervals[t.name]
+            for t in candidates
+            if t.name in self.max_run_intervals
+        }
+        overdues = [t for t in candidates if overdue_ratios.get(t.name, 0.0) > 1.0]
+        if len(overdues) > 0:
+            trainer = max(overdues, key=lambda t: overdue_ratios[t.name])
+        else:
+            trainer = self.choose(candidates, trainers)
+
+        self._last_run_times[trainer.name] = now
+        return trainer
+
+    @abstractmethod
+    def choose(self, candidates: list[BaseTrainer], trainers: Sequence[BaseTrainer]) -> BaseTrainer:
+        """Chooses one of the candidates.
+
+        Args:
+            candidates: The runnable trainers. Not empty.
+            trainers: All trainers.
+        """
+        raise NotImplementedError
+
+
+class RoundRobinSelectionPolicy(BaseTrainerSelectionPolicy):
+    """Selects the trainable trainers in round-robin order.
+
+    Unlike `TrainersList.get_next_trainer`, untrainable trainers are
+    skipped without waiting.
+    """
+
+    def __init__(
+        self,
+        min_run_intervals: Mapping[str, float] | None = None,
+        max_run_intervals: Mapping[str, float] | None = None,
+    ) -> None:
+        super().__init__(min_run_intervals, max_run_intervals)
+        self._next_index = 0
+
+    def choose(self, candidates: list[BaseTrainer], trainers: Sequence[BaseTrainer]) -> BaseTrainer:
+        length = len(trainers)
+        for offset in range(length):
+            trainer = trainers[(self._next_index + offset) % length]
+            if trainer in candidates:
+                self._next_index = (self._next_index + offset + 1) % length
+                return trainer
+        return candidates[0]
+
+
+class WeightedPrioritySelectionPolicy(BaseTrainerSelectionPolicy):
+    """Selects the trainers in proportion to their priorities by the smooth
+    weighted round-robin.
+
+    For example, with the priorities `{"a": 2, "b": 1}`, the selection
+    order is `a, b, a, a, b, a, ...` while both are trainable.
+    """
+
+    def __init__(
+        self,
+        priorities: Mapping[str, float],
+        default_priority: float = 1.0,
+        min_run_intervals: Mapping[str, float] | None = None,
+        max_run_intervals: Mapping[str, float] | None = None,
+    ) -> None:
+        """Constructs the policy.
+
+        Args:
+            priorities: The positive priority of each trainer.
+            default_priority: The priority of the trainers not in `priorities`.
+        """
+        super().__init__(min_run_intervals, max_run_intervals)
+        assert all(p > 0 for p in priorities.values())
+        assert default_priority > 0
+        self.priorities = dict(priorities)
+        self.default_priority = default_priority
+        self._current_weights: dict[str, float] = {}
+
+    def choose(self, candidates: list[BaseTrainer], trainers: Sequence[BaseTrainer]) -> BaseTrainer:
+        total = 0.0
+        for t in candidates:
+            priority = self.priorities.get(t.name, self.default_priority)
+            self._current_weights[t.name] = self._current_weights.get(t.name, 0.0) + priority
+            total += priority
+        trainer = max(candidates, key=lambda t: self._current_weights[t.name])
+        self._current_weights[trainer.name] -= total
+        return trainer
+
+
+class MostNewDataFirstSelectionPolicy(BaseTrainerSelectionPolicy):
+    """Selects the trainer which has the most new data since its last run.
+
+    The new data are counted by :meth:`BaseTrainer.count_new_data`. Ties
+    are broken by the longest time since the last run. The trainers which
+    do not override it always count 0, so a warning is logged for them.
+    """
+
+    def __init__(
+        self,
+        min_run_intervals: Mapping[str, float] | None = None,
+        max_run_intervals: Mapping[str, float] | None = None,
+    ) -> None:
+        super().__init__(min_run_intervals, max_run_intervals)
+        self._logger = get_training_thread_logger(self.__class__.__name__)
+        self._checked_trainer_names: set[str] = set()
+
+    def choose(self, candidates: list[BaseTrainer], trainers: Sequence[BaseTrainer]) -> BaseTrainer:
+        for t in candidates:
+            if t.name not in self._checked_trainer_names:
+                self._checked_trainer_names.add(t.name)
+                if type(t).count_new_data is BaseTrainer.count_new_data:
+                    self._logger.warning(
+                        f"Trainer {t.name!r} does not override `count_new_data`, so it is chosen only when the "
+                        "other trainers have no new data."
+                    )
+        return max(
+            candidates,
+            key=lambda t: (t.count_new_data(self.get_last_run_time(t)), -self.get_last_run_time(t)),
+        )
@@ -0,0 +1,113 @@
+import time
+
+from ami.logger import get_training_thread_logger
+from ami.tensorboard_loggers import TimeIntervalLogger
+
+from .base_trainer import BaseTrainer
+from .utils import TrainersList
+
+
+class TimeBudgetScheduler:
+    """Runs the trainers within a wall-clock time budget per cycle.
+
+    In each cycle, the trainers which are trainable or have a suspended
+    training session share `cycle_budget` seconds. Each trainer is run
+    by :meth:`BaseTrainer.run_steps`, so it is preempted between steps
+    when its budget is used up, and resumed in the next cycle.
+
+    The budget share is adapted to the data arrival rate of each trainer
+    (:meth:`BaseTrainer.count_new_data`), smoothed by the exponential
+    moving average. Every trainer gets at least `min_share` of the
+    equally divided budget.
+    """
+
+    def __init__(
+        self,
+        cycle_budget: float = 12.8,
+        min_share: float = 0.5,
+        data_rate_smoothing: float = 0.9,
+        logger: TimeIntervalLogger | None = None,
+    ) -> None:
+        """Constructs the scheduler.
+
+        Args:
+            cycle_budget: The wall-clock time budget of a cycle in seconds.
+            min_share: The minimum share of each trainer relative to the equally divided budget. Range is [0, 1].
+                If 1, the budget is always divided equally.
+            data_rate_smoothing: The smoothing factor of the moving average of data arrival rate. Range is [0, 1).
+            logger: The tensorboard logger for the time use of each trainer.
+        """
+        assert cycle_budget > 0
+        assert 0.0 <= min_share <= 1.0
+        assert 0.0 <= data_rate_smoothing < 1.0
+        self.cycle_budget = cycle_budget
+        self.min_share = min_share
+        self.data_rate_smoothing = data_rate_smoothing
+        self.logger = logger
+        self._console_logger = get_training_thread_logger(self.__class__.__name__)
+
+        self._data_rates: dict[int, float] = {}
+        self._previous_cycle_time = time.time()
+
+    def update_data_rates(self, trainers: TrainersList) -> None:
+        """Updates the moving average of the data arrival rate of each
+        trainer."""
+        current_time = time.time()
+        elapsed = max(current_time - self._previous_cycle_time, 1e-6)
+        for i, trainer in enumerate(trainers):
+            rate = trainer.count_new_data(self._previous_cycle_time) / elapsed
+            if i in self._data_rates:
+                a = self.data_rate_smoothing
+                rate = a * self._data_rates[i] + (1 - a) * rate
+            self._data_rates[i] = rate
+        self._previous_cycle_time = current_time
+
+    def compute_budgets(self, indices: list[int]) -> dict[int, float]:
+        """Divides the cycle budget to the trainers of `indices`."""
+        n = len(indices)
+        total_rate = sum(self._data_rates.get(i, 0.0) for i in indices)
+        budgets = {}
+        for i in indices:
+            if total_rate > 0:
+                rate_share = self._data_rates.get(i, 0.0) / total_rate
+            else:
+                rate_share = 1 / n
+            share = self.min_share / n + (1 - self.min_share) * rate_share
+            budgets[i] = self.cycle_budget * share
+        return budgets
+
+    def run_cycle(self, trainers: TrainersList) -> bool:
+        """Runs a scheduling cycle.
+
+        Returns:
+            bool: Whether any trainer has been run.
+        """
+        self.update_data_rates(trainers)
+
+        indices = [i for i, trainer in enumerate(trainers) if trainer.is_training_suspended or trainer.is_trainable()]
+        if len(indices) == 0:
+            return False
+
+        budgets = self.compute_budgets(indices)
+        for i in indices:
+            trainer = trainers[i]
+            start = time.perf_counter()
+            finished = trainer.run_steps(budgets[i])
+            elapsed = time.perf_counter() - start
+            self._console_logger.debug(
+                f"{trainer.name!r} used {elapsed:.2f} / {budgets[i]:.2f} [s]. "
+                + ("Finished." if finished else "Preempted.")
+            )
+            self._log(i, trainer, budgets[i], elapsed)
+
+        if self.logger is not None:
+            self.logger.update()
+        return True
+
+    def _log(self, index: int, trainer: BaseTrainer, budget: float, elapsed: float) -> None:
+        if self.logger is None:
+            return
+        prefix = f"training-scheduler/{index}-{trainer.name}/"
+        self.logger.log(prefix + "time-use", elapsed)
+        self.logger.log(prefix + "budget", budget)
+        self.logger.log(prefix + "data-rate", self._data_rates.get(index, 0.0))
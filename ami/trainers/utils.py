@@ -1,9 +1,11 @@
 from collections import UserList
 from pathlib import Path
+from typing import Callable
 
 from typing_extensions import override
 
 from ami.checkpointing import SaveAndLoadStateMixin
+from ami.checkpointing.snapshot import chain_writers
 from ami.threads import PauseResumeEventMixin
 
 from ..data.utils import DataUsersDict
@@ -90,6 +92,12 @@ class TrainersList(UserList[BaseTrainer], SaveAndLoadStateMixin, PauseResumeEven
             trainer_path = path / str(i)
             trainer.save_state(trainer_path)
 
+    @override
+    def snapshot_state(self, path: Path) -> Callable[[], None]:
+        """Takes the snapshots of the trainer states."""
+        path.mkdir()
+        return chain_writers(*(trainer.snapshot_state(path / str(i)) for i, trainer in enumerate(self)))
+
     @override
     def load_state(self, path: Path) -> None:
         """Loads the internal state from the `path`"""
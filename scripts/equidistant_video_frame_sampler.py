@@ -1,48 +1,72 @@
 """Video Frame Sampler.
 
-This script samples frames from video folders and saves them as JPEG images.
+This script samples frames from video folders at equidistant intervals and saves them as JPEG images,
+or as a single packed uint8 array (`PackedImageArray`).
+
+The sampled frames are sharded by video file and frame range, and extracted in a process pool. Each
+worker seeks to the needed frames only, and resizes them right after decoding. The interrupted run
+is resumed by running the same command again: the existing JPEG files or the written flags of the
+packed array are skipped.
 
 Usage:
-    python script_name.py --folder_paths PATH [PATH ...] --output_dir PATH
-                          [--image_size WIDTH HEIGHT] [--folder_frame_limits LIMIT]
-                          [--num_sample SAMPLES]
+    python script_name.py --folder-paths PATH [PATH ...] --output-dir PATH
+                          [--image-size WIDTH HEIGHT] [--folder-frame-limits LIMIT]
+                          [--num-sample SAMPLES] [--num-workers WORKERS]
+                          [--chunk-size SIZE] [--output-format {jpeg,packed}]
 
 Arguments:
-    --folder_paths PATH [PATH ...]
+    --folder-paths PATH [PATH ...]
         Paths to one or more folders containing video files. Required.
 
-    --output_dir PATH
-        Directory where sampled frames will be saved as JPEG images. Required.
+    --output-dir PATH
+        Directory where sampled frames will be saved. Required.
 
-    --image_size WIDTH HEIGHT
-        Size of the output images in pixels. Default is 256 256.
+    --image-size WIDTH HEIGHT
+        Size of the output images in pixels. Default is 144 144.
 
-    --folder_frame_limits LIMIT
-        Maximum number of frames to process from each folder. Default is 14400 (4 hours at 60 fps).
+    --folder-frame-limits LIMIT
+        Maximum number of frames to process from each folder. Default is 144000 (4 hours at 10 fps).
 
-    --num_sample SAMPLES
+    --num-sample SAMPLES
         Number of frames to sample across all videos. Default is 65536 (2^16).
 
+    --num-workers WORKERS
+        Number of worker processes. Default is the number of CPUs.
+
+    --chunk-size SIZE
+        Maximum number of sampled frames per task. Default is 256.
+
+    --output-format {jpeg,packed}
+        `jpeg` writes one JPEG file per frame. `packed` writes a single `PackedImageArray`. Default is jpeg.
+
 Example:
-    python video_frame_sampler.py --folder_paths /path/to/videos1 /path/to/videos2
-                                  --output_dir /path/to/output
-                                  --image_size 512 512
-                                  --folder_frame_limits 7200
-                                  --num_sample 10000
+    python video_frame_sampler.py --folder-paths /path/to/videos1 /path/to/videos2
+                                  --output-dir /path/to/output
+                                  --image-size 512 512
+                                  --folder-frame-limits 7200
+                                  --num-sample 10000
+                                  --output-format packed
 
 Note:
-    The script uses the VideoFoldersImageObservationGenerator from the ami.interactions.environments
-    module to process video frames. Ensure you have the necessary dependencies installed.
+    The script uses the FolderAsVideo from the ami.interactions.environments module to process
+    video frames. Ensure you have the necessary dependencies installed.
 """
 
 import argparse
+import multiprocessing as mp
+import os
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
+import cv2
 from torchvision.io import write_jpeg
 
 from ami.interactions.environments.video_folders_image_observation_generator import (
-    VideoFoldersImageObservationGenerator,
+    FolderAsVideo,
 )
+from ami.trainers.components.packed_image_array import PackedImageArray
 
 
 def parse_args() -> argparse.Namespace:
@@ -52,34 +76,156 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--folder-frame-limits", type=int, default=60 * 60 * 4 * 10, help="Frame limit per folder")
     parser.add_argument("--output-dir", type=Path, required=True, help="Output directory for sampled frames")
     parser.add_argument("--num-sample", type=int, default=2**16, help="Number of frames to sample")
+    parser.add_argument("--num-workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Maximum number of sampled frames per task")
+    parser.add_argument("--output-format", choices=["jpeg", "packed"], default="jpeg", help="Output format")
     return parser.parse_args()
 
 
-def main() -> None:
-    args = parse_args()
+@dataclass
+class ExtractionTask:
+    """Sampled frames in a frame range of a folder."""
+
+    folder: str
+    folder_frame_limit: int
+    image_size: tuple[int, int]  # (height, width)
+    frame_indices: list[int]  # Frame indices in the folder.
+    output_indices: list[int]  # Indices of the sampled frames over all folders.
+    output_names: list[str]
+
+
+def build_tasks(args: argparse.Namespace) -> tuple[list[ExtractionTask], list[str], dict[str, list[dict[str, Any]]]]:
+    """Samples the equidistant frames over all folders, and shards them by
+    video file and frame range.
+
+    Returns:
+        The tasks, the names of all sampled frames, and the index entries of each folder.
+    """
+    width, height = args.image_size
+    videos = [
+        FolderAsVideo(folder, max_frames=None, normalize=False, frame_size=(height, width))
+        for folder in args.folder_paths
+    ]
+    folder_frame_limits = [min(args.folder_frame_limits, v.max_frames) for v in videos]
+    max_frames = sum(folder_frame_limits)
+    print("Available frames: ", max_frames)
+    frame_write_interval = max(max_frames // args.num_sample, 1)
+    print("Frame interval: ", frame_write_interval)
 
-    generator = VideoFoldersImageObservationGenerator(
-        folder_paths=args.folder_paths,
-        image_size=tuple(args.image_size),
-        folder_start_frames=0,
-        folder_frame_limits=args.folder_frame_limits,
+    name_width = len(str(max_frames))
+    tasks: list[ExtractionTask] = []
+    names: list[str] = []
+    folder_offset = 0
+    for folder, video, limit in zip(args.folder_paths, videos, folder_frame_limits):
+        # Frame indices in the folder whose global index is a multiple of the interval.
+        first = -folder_offset % frame_write_interval
+        frame_indices = list(range(first, limit, frame_write_interval))
+        # Shard by video file so that each worker opens a file only once, and then by the chunk size.
+        video_indices = [video.locate(video.start_frame + i)[0] for i in frame_indices]
+        begin = 0
+        for end in range(1, len(frame_indices) + 1):
+            if (
+                end == len(frame_indices)
+                or video_indices[end] != video_indices[begin]
+                or end - begin >= args.chunk_size
+            ):
+                chunk = frame_indices[begin:end]
+                chunk_names = [str(folder_offset + i).zfill(name_width) for i in chunk]
+                tasks.append(
+                    ExtractionTask(
+                        folder=folder,
+                        folder_frame_limit=limit,
+                        image_size=(height, width),
+                        frame_indices=chunk,
+                        output_indices=list(range(len(names), len(names) + len(chunk))),
+                        output_names=chunk_names,
+                    )
+                )
+                names.extend(chunk_names)
+                begin = end
+        folder_offset += limit
+    folder_index_entries = {folder: video.index_entries for folder, video in zip(args.folder_paths, videos)}
+    return tasks, names, folder_index_entries
+
+
+# The index entries of `FolderAsVideo` for each folder, shared with the worker processes.
+_folder_index_entries: dict[str, list[dict[str, Any]]] = {}
+
+
+def _initialize_worker(folder_index_entries: dict[str, list[dict[str, Any]]]) -> None:
+    # The parallelism is provided by the processes.
+    cv2.setNumThreads(1)
+    # The index built by the parent is reused, because it is not cached if the folder is read-only.
+    _folder_index_entries.update(folder_index_entries)
+
+
+def extract_frames(task: ExtractionTask, output_dir: Path, output_format: str) -> int:
+    """Extracts the frames of the task, and returns the number of extracted
+    frames."""
+    packed = PackedImageArray(output_dir, writable=True) if output_format == "packed" else None
+    pending = []
+    for frame_index, output_index, name in zip(task.frame_indices, task.output_indices, task.output_names):
+        if packed is not None:
+            if not packed.written[output_index]:
+                pending.append((frame_index, output_index, name))
+        elif not (output_dir / f"{name}.jpg").exists():
+            pending.append((frame_index, output_index, name))
+    if len(pending) == 0:
+        return 0
+
+    video = FolderAsVideo(
+        task.folder,
+        max_frames=task.folder_frame_limit,
         normalize=False,
+        frame_size=task.image_size,
+        index_entries=_folder_index_entries.get(task.folder),
     )
+    for frame_index, output_index, name in pending:
+        # Ascending indices are decoded forward or sought to the nearest keyframe.
+        frame = video[frame_index]
+        if packed is not None:
+            packed.write(output_index, frame)
+        else:
+            # Write to the temporary file and rename it, so the interrupted file is not left as completed.
+            tmp_file = output_dir / f"{name}.jpg.tmp"
+            write_jpeg(frame, str(tmp_file))
+            tmp_file.rename(output_dir / f"{name}.jpg")
+    if packed is not None:
+        packed.flush()
+    return len(pending)
+
+
+def _run_task(task_and_config: tuple[ExtractionTask, Path, str]) -> tuple[int, int]:
+    task, output_dir, output_format = task_and_config
+    return extract_frames(task, output_dir, output_format), len(task.frame_indices)
 
-    args.output_dir.mkdir(parents=True, exist_ok=True)
-    print("Available frames: ", generator.max_frames)
-    frame_write_interval = generator.max_frames // args.num_sample
-    print("Frame interval: ", frame_write_interval)
 
-    sample_count = 0
-    for i, frame in enumerate(generator):
-        if i % frame_write_interval == 0:
-            sample_count += 1
-            name = str(i).zfill(len(str(generator.max_frames)))
-            write_jpeg(frame, str(args.output_dir / f"{name}.jpg"))
-            print(f"\r{sample_count / args.num_sample * 100:.2f}%", end="", flush=True)
+def main() -> None:
+    args = parse_args()
+    tasks, names, folder_index_entries = build_tasks(args)
+    num_samples = len(names)
 
-    print("\nDone!")
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    if args.output_format == "packed":
+        width, height = args.image_size
+        packed = PackedImageArray.create(args.output_dir, num_samples, (3, height, width), names)
+        print(f"Resuming from {packed.num_written} written frames.")
+
+    start_time = time.perf_counter()
+    num_extracted = 0
+    num_done = 0
+    context = mp.get_context("spawn")
+    with context.Pool(args.num_workers, initializer=_initialize_worker, initargs=(folder_index_entries,)) as pool:
+        for extracted, done in pool.imap_unordered(
+            _run_task, [(task, args.output_dir, args.output_format) for task in tasks]
+        ):
+            num_extracted += extracted
+            num_done += done
+            fps = num_extracted / (time.perf_counter() - start_time)
+            print(f"\r{num_done / num_samples * 100:.2f}% ({fps:.1f} frames/s)", end="", flush=True)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"\nDone! Extracted {num_extracted} frames in {elapsed:.1f} s ({num_extracted / elapsed:.1f} frames/s).")
 
 
 if __name__ == "__main__":
@@ -1,11 +1,12 @@
 """Launch script file for the ami system."""
 import os
 import sys
+from typing import Any
 
 import hydra
 import rootutils
 import torch
-from omegaconf import DictConfig, open_dict
+from omegaconf import DictConfig, OmegaConf, open_dict
 
 from ami.checkpointing.checkpoint_schedulers import BaseCheckpointScheduler
 from ami.checkpointing.checkpointing import Checkpointing
@@ -26,6 +27,7 @@ from ami.threads import (
     TrainingThread,
     attach_shared_objects_pool_to_threads,
 )
+from ami.threads.training_process import TrainingProcessThread
 from ami.trainers.utils import TrainersList
 
 # Add the project root path to environment vartiable `PROJECT_ROOT`
@@ -55,15 +57,19 @@ def main(cfg: DictConfig) -> None:
     models.send_to_default_device()
     param_count = create_model_parameter_count_dict(models)
 
-    logger.info("Instantiating Trainers...")
-    trainers: TrainersList = instantiate_trainers(cfg.trainers)
+    threads_cfg = cfg.threads
+    use_training_process = issubclass(
+        hydra.utils.get_class(threads_cfg.training_thread._target_), TrainingProcessThread
+    )
+    if not use_training_process:
+        logger.info("Instantiating Trainers...")
+        trainers: TrainersList = instantiate_trainers(cfg.trainers)
 
     logger.info("Instantiating Checkpointing...")
     checkpoint_scheduler: BaseCheckpointScheduler = hydra.utils.instantiate(cfg.checkpointing)
     checkpointing = checkpoint_scheduler.checkpointing
 
     logger.info("Instantiating Thread Classes...")
-    threads_cfg = cfg.threads
     logger.info(f"Instantiating MainThread: <{threads_cfg.main_thread._target_}>")
     main_thread: MainThread = hydra.utils.instantiate(
         threads_cfg.main_thread, checkpoint_scheduler=checkpoint_scheduler
@@ -75,9 +81,22 @@ def main(cfg: DictConfig) -> None:
     )
 
     logger.info(f"Instantiating TrainingThread: <{threads_cfg.training_thread._target_}>")
-    training_thread: TrainingThread = hydra.utils.instantiate(
-        threads_cfg.training_thread, trainers=trainers, models=models
-    )
+    training_thread: TrainingThread | TrainingProcessThread
+    if use_training_process:
+        # The trainers are instantiated in the training process from the resolved configs.
+        def to_resolved_container(c: DictConfig | None) -> Any:
+            return None if c is None else OmegaConf.to_container(c, resolve=True)
+
+        training_thread = hydra.utils.instantiate(
+            threads_cfg.training_thread,
+            models=models,
+            models_cfg=to_resolved_container(cfg.models),
+            trainers_cfg=to_resolved_container(cfg.trainers),
+            data_collectors_cfg=to_resolved_container(cfg.data_collectors),
+            _recursive_=False,
+        )
+    else:
+        training_thread = hydra.utils.instantiate(threads_cfg.training_thread, trainers=trainers, models=models)
 
     # Logging to tensorboard.
     tensorboard_logger = TensorBoardLogger(
@@ -0,0 +1,51 @@
+"""Image Folder Packer.
+
+This script packs the images in a folder into a `PackedImageArray`, the uint8 shard loaded by
+`IntervalSamplingImageDataset(shard_path=...)`. The interrupted packing is resumed by running the
+same command again.
+
+Usage:
+    python pack_image_folder.py --image-dir PATH --output-dir PATH [--image-size HEIGHT WIDTH]
+                                [--num-workers WORKERS]
+
+Example:
+    python pack_image_folder.py --image-dir /path/to/images --output-dir /path/to/shard
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from ami.trainers.components.packed_image_array import pack_image_folder
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pack the images in a folder into a uint8 shard")
+    parser.add_argument("--image-dir", type=Path, required=True, help="Directory containing the images")
+    parser.add_argument("--output-dir", type=Path, required=True, help="Output directory of the shard")
+    parser.add_argument("--image-size", nargs=2, type=int, default=None, help="Resize images to (height width)")
+    parser.add_argument("--num-workers", type=int, default=None, help="Number of decoding threads")
+    parser.add_argument(
+        "--extensions", nargs="+", default=["jpeg", "JPEG", "jpg", "JPG", "png", "PNG"], help="Image extensions"
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    files: list[Path] = []
+    for ext in args.extensions:
+        files.extend(args.image_dir.glob(f"*.{ext}"))
+    files.sort()
+    print("Images: ", len(files))
+
+    start_time = time.perf_counter()
+    packed = pack_image_folder(
+        files, args.output_dir, None if args.image_size is None else tuple(args.image_size), args.num_workers
+    )
+    elapsed = time.perf_counter() - start_time
+    print(f"Done! Packed {len(packed)} images of shape {packed.image_shape} in {elapsed:.1f} s.")
+
+
+if __name__ == "__main__":
+    main()